@@ -0,0 +1,73 @@
+"""Partition activity_logs by month
+
+Revision ID: 8d2f6c1a9b3e
+Revises: 4a651211b32d
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6c1a9b3e'
+down_revision: Union[str, Sequence[str], None] = '4a651211b32d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created beyond the current one; later months are added by
+# app/db/partitions.py (partition maintenance) before they are needed
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, count: int) -> date:
+    years, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every unique key of a partitioned table must include the partitioning column
+    op.execute("ALTER TABLE activity_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)")
+
+    # Timeline indexes; the old single-column/entity indexes are their prefixes
+    op.create_index('ix_activity_user_time', 'activity_logs', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_activity_entity_time', 'activity_logs', ['entity_type', 'entity_id', 'created_at'], unique=False)
+    op.drop_index('ix_entity', table_name='activity_logs')
+    op.drop_index(op.f('ix_activity_logs_user_id'), table_name='activity_logs')
+
+    current = date.today().replace(day=1)
+    first = current
+    if not context.is_offline_mode():
+        oldest = op.get_bind().execute(sa.text("SELECT MIN(created_at) FROM activity_logs")).scalar()
+        if oldest is not None:
+            first = min(first, oldest.date().replace(day=1))
+
+    partitions = []
+    month = first
+    while month <= _add_months(current, MONTHS_AHEAD):
+        upper = _add_months(month, 1)
+        partitions.append(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))"
+        )
+        month = upper
+    partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+
+    op.execute(
+        "ALTER TABLE activity_logs PARTITION BY RANGE (TO_DAYS(created_at)) ("
+        + ", ".join(partitions)
+        + ")"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE activity_logs REMOVE PARTITIONING")
+    op.create_index(op.f('ix_activity_logs_user_id'), 'activity_logs', ['user_id'], unique=False)
+    op.create_index('ix_entity', 'activity_logs', ['entity_type', 'entity_id'], unique=False)
+    op.drop_index('ix_activity_entity_time', table_name='activity_logs')
+    op.drop_index('ix_activity_user_time', table_name='activity_logs')
+    op.execute("ALTER TABLE activity_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
@@ -0,0 +1,52 @@
+"""Saved searches
+
+Revision ID: a8c4e1f7b2d9
+Revises: f3b9d2e6a1c7
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c4e1f7b2d9'
+down_revision: Union[str, Sequence[str], None] = 'f3b9d2e6a1c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('saved_searches',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('location', sa.String(length=150), nullable=True),
+    sa.Column('job_type', sa.Enum('FULL_TIME', 'PART_TIME', 'CONTRACT', 'INTERNSHIP', name='jobtype'), nullable=True),
+    sa.Column('min_salary', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('is_deleted', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_saved_searches_user', 'saved_searches', ['user_id', 'is_deleted'], unique=False)
+    op.create_table('saved_search_skills',
+    sa.Column('saved_search_id', sa.BigInteger(), nullable=False),
+    sa.Column('skill_id', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('is_deleted', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['saved_search_id'], ['saved_searches.id'], ),
+    sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ),
+    sa.PrimaryKeyConstraint('saved_search_id', 'skill_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('saved_search_skills')
+    op.drop_index('ix_saved_searches_user', table_name='saved_searches')
+    op.drop_table('saved_searches')
@@ -0,0 +1,41 @@
+"""Composite indexes for hot queries
+
+Revision ID: c47e2b9d5a10
+Revises: 8d2f6c1a9b3e
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47e2b9d5a10'
+down_revision: Union[str, Sequence[str], None] = '8d2f6c1a9b3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_jobs_search', 'jobs', ['status', 'is_deleted', 'job_type', 'salary_min'], unique=False)
+    op.create_index('ix_jobs_recruiter', 'jobs', ['recruiter_id', 'is_deleted'], unique=False)
+    op.create_index('ix_applications_seeker', 'applications', ['job_seeker_id', 'is_deleted'], unique=False)
+
+    # MySQL created these for the unnamed foreign keys; the composite indexes
+    # above now lead with the same column and back the constraints instead
+    op.drop_index('recruiter_id', table_name='jobs')
+    op.drop_index('job_seeker_id', table_name='applications')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Foreign keys need an index on the column at all times: recreate first
+    op.create_index('job_seeker_id', 'applications', ['job_seeker_id'], unique=False)
+    op.create_index('recruiter_id', 'jobs', ['recruiter_id'], unique=False)
+
+    op.drop_index('ix_applications_seeker', table_name='applications')
+    op.drop_index('ix_jobs_recruiter', table_name='jobs')
+    op.drop_index('ix_jobs_search', table_name='jobs')
@@ -0,0 +1,37 @@
+"""Job match notifications
+
+Revision ID: f3b9d2e6a1c7
+Revises: e51a7c3f2d84
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d2e6a1c7'
+down_revision: Union[str, Sequence[str], None] = 'e51a7c3f2d84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_match_notifications',
+    sa.Column('job_seeker_id', sa.BigInteger(), nullable=False),
+    sa.Column('job_id', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('is_deleted', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.ForeignKeyConstraint(['job_seeker_id'], ['job_seekers.id'], ),
+    sa.PrimaryKeyConstraint('job_seeker_id', 'job_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('job_match_notifications')
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import users, jobs, auth, applications, profiles, ext_features
+from app.api.v1.endpoints import users, jobs, auth, applications, profiles, ext_features, activity, saved_searches
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -7,4 +7,6 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 api_router.include_router(applications.router, prefix="/applications", tags=["applications"])
 api_router.include_router(profiles.router, prefix="/profiles", tags=["profiles"])
+api_router.include_router(activity.router, prefix="/activity", tags=["activity"])
+api_router.include_router(saved_searches.router, prefix="/saved-searches", tags=["saved-searches"])
 api_router.include_router(ext_features.router, tags=["extra-features"])
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from typing import Any, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.security import get_current_active_user, get_current_admin_user
+from app.db.session import get_read_db
+from app.models.models import User, UserRole
+from app.repositories.activity_log import activity_log_repo
+from app.schemas.activity_log import ActivityLogEntry, ActivityTimeline
+
+router = APIRouter()
+
+def _time_range(start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    end = end or datetime.now()
+    start = start or end - timedelta(days=30)
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    if end - start > timedelta(days=settings.ACTIVITY_LOG_MAX_RANGE_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Time range cannot exceed {settings.ACTIVITY_LOG_MAX_RANGE_DAYS} days"
+        )
+    return start, end
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    if cursor is None:
+        return None
+    try:
+        created_at, id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(created_at), int(id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def _page(entries: list, limit: int) -> ActivityTimeline:
+    next_cursor = None
+    if len(entries) == limit:
+        last = entries[-1]
+        next_cursor = f"{last.created_at.isoformat()}_{last.id}"
+    return ActivityTimeline(
+        items=[ActivityLogEntry.model_validate(entry) for entry in entries],
+        next_cursor=next_cursor
+    )
+
+@router.get("/users/{user_id}", response_model=ActivityTimeline)
+async def read_user_activity(
+    user_id: int,
+    db: AsyncSession = Depends(get_read_db, scope="function"),
+    start: Optional[datetime] = Query(None, description="From (inclusive); defaults to 30 days before end"),
+    end: Optional[datetime] = Query(None, description="Until (exclusive); defaults to now"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Activity of one user, newest first (Protected - own activity, or Admin)
+    """
+    if current_user.id != user_id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+    start, end = _time_range(start, end)
+    entries = await activity_log_repo.timeline(
+        db, start=start, end=end, user_id=user_id, before=_parse_cursor(cursor), limit=limit
+    )
+    return _page(entries, limit)
+
+@router.get("/entities/{entity_type}/{entity_id}", response_model=ActivityTimeline)
+async def read_entity_activity(
+    entity_type: str,
+    entity_id: int,
+    db: AsyncSession = Depends(get_read_db, scope="function"),
+    start: Optional[datetime] = Query(None, description="From (inclusive); defaults to 30 days before end"),
+    end: Optional[datetime] = Query(None, description="Until (exclusive); defaults to now"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Activity on one entity (e.g. JOB/42), newest first (Admin only)
+    """
+    start, end = _time_range(start, end)
+    entries = await activity_log_repo.timeline(
+        db,
+        start=start,
+        end=end,
+        entity_type=entity_type.upper(),
+        entity_id=entity_id,
+        before=_parse_cursor(cursor),
+        limit=limit
+    )
+    return _page(entries, limit)
@@ -1,11 +1,14 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from typing import Any, List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.models.models import ApplicationStatus, User
-from app.services import application_service
+from app.models.models import ApplicationStatus, User, UserRole
+from app.services import application_service, profile_service
 from app.core.security import get_current_active_user
-from pydantic import BaseModel
+from app.core.idempotency import idempotency_cache
+from app.services.application_intake import application_intake
+from pydantic import BaseModel, Field
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -21,34 +24,115 @@ class ApplicationResponse(BaseModel):
 class ApplyRequest(BaseModel):
     job_id: int
 
+class ApplicationQueuedResponse(BaseModel):
+    request_id: str
+    status: str
+    status_url: str
+
+class ApplicationRequestStatus(BaseModel):
+    request_id: str
+    status: str  # queued, applied, duplicate or rejected
+    job_id: int
+    application_id: Optional[int] = None
+    detail: Optional[str] = None
+
 class StatusUpdateRequest(BaseModel):
     new_status: ApplicationStatus
 
-@router.post("/", response_model=ApplicationResponse, status_code=status.HTTP_201_CREATED)
+class BulkStatusUpdateRequest(BaseModel):
+    application_ids: List[int] = Field(..., min_length=1, max_length=settings.APPLICATION_BULK_MAX_IDS)
+    new_status: ApplicationStatus
+
+class BulkStatusUpdateResponse(BaseModel):
+    updated: int
+    unchanged: List[int]
+    not_found: List[int]
+
+@router.post(
+    "/",
+    response_model=Union[ApplicationResponse, ApplicationQueuedResponse],
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": ApplicationQueuedResponse}}
+)
 async def apply_to_job(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     apply_in: ApplyRequest,
-    background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_active_user)
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
 ) -> Any:
     """
     Submit a job application (Protected - Job Seeker)
+    Retries carrying the same Idempotency-Key replay the first response.
+    With APPLICATION_INTAKE_MODE=buffered the application is queued and
+    answered with 202 and a status URL to poll.
     """
+    buffered = settings.APPLICATION_INTAKE_MODE == "buffered"
+    if buffered:
+        response.status_code = status.HTTP_202_ACCEPTED
+    scope = f"apply:{current_user.id}"
+    request_body = apply_in.model_dump()
+    if idempotency_key:
+        replay = await idempotency_cache.begin(scope, idempotency_key, request_body)
+        if replay is not None:
+            if "request_id" in replay:
+                response.status_code = status.HTTP_202_ACCEPTED
+            return replay
+
     # Get job_seeker_id from current_user
     # For now using placeholder
-    application = await application_service.submit_application(
-        db=db,
-        job_id=apply_in.job_id,
-        job_seeker_id=1,  # Get from current_user.job_seeker.id
-        user_email=current_user.email
-    )
-    
-    return application
+    try:
+        if buffered:
+            queued = await application_intake.enqueue(
+                db,
+                user_id=current_user.id,
+                job_id=apply_in.job_id,
+                job_seeker_id=1,  # Get from current_user.job_seeker.id
+                user_email=current_user.email
+            )
+        else:
+            application = await application_service.submit_application(
+                db=db,
+                job_id=apply_in.job_id,
+                job_seeker_id=1,  # Get from current_user.job_seeker.id
+                user_email=current_user.email
+            )
+    except Exception:
+        if idempotency_key:
+            await idempotency_cache.release(scope, idempotency_key)
+        raise
+
+    if buffered:
+        body = {
+            **queued,
+            "status_url": f"{settings.API_V1_STR}/applications/requests/{queued['request_id']}"
+        }
+        if idempotency_key:
+            await idempotency_cache.complete(scope, idempotency_key, request_body, body)
+        return body
+
+    body = ApplicationResponse.model_validate(application).model_dump(mode="json")
+    if idempotency_key:
+        await idempotency_cache.complete(scope, idempotency_key, request_body, body)
+    return body
+
+@router.get("/requests/{request_id}", response_model=ApplicationRequestStatus)
+async def get_application_request(
+    request_id: str,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Outcome of a queued (buffered) application submission (Protected - own requests)
+    """
+    result = await application_intake.get_request(request_id, current_user.id)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Application request not found")
+    return result
 
 @router.get("/", response_model=List[ApplicationResponse])
 async def read_applications(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
@@ -61,7 +145,7 @@ async def read_applications(
 
 @router.get("/my/applications", response_model=List[ApplicationResponse])
 async def get_my_applications(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     current_user: User = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = 100,
@@ -80,7 +164,7 @@ async def get_my_applications(
 @router.get("/job/{job_id}", response_model=List[ApplicationResponse])
 async def get_job_applications(
     job_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     current_user: User = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = 100,
@@ -101,8 +185,7 @@ async def get_job_applications(
 async def update_application_status(
     application_id: int,
     status_update: StatusUpdateRequest,
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
@@ -114,14 +197,28 @@ async def update_application_status(
         new_status=status_update.new_status,
         recruiter_id=1  # Get from current_user.recruiter.id
     )
-    
-    # Send status update notification in background
-    from app.services import notification_service
-    background_tasks.add_task(
-        notification_service.send_application_status_update,
-        user_email="applicant@example.com",  # Get from application
-        job_title="Job Title",  # Get from job
-        new_status=status_update.new_status.value
-    )
-    
     return application
+
+@router.put("/status", response_model=BulkStatusUpdateResponse)
+async def bulk_update_application_status(
+    status_update: BulkStatusUpdateRequest,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Update the status of many applications at once, e.g. reject everyone
+    left after a posting closes (Protected - Recruiter only)
+    """
+    if current_user.role != UserRole.RECRUITER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only recruiters can update application status"
+        )
+    recruiter = await profile_service.get_recruiter_by_user(db, current_user.id)
+    result = await application_service.bulk_update_application_status(
+        db=db,
+        application_ids=status_update.application_ids,
+        new_status=status_update.new_status,
+        recruiter_id=recruiter.id
+    )
+    return result
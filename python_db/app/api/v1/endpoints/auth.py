@@ -1,18 +1,19 @@
 from datetime import timedelta
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
+from app.core.security import get_current_user, oauth2_scheme, request_token_claims
+from app.models.models import User as UserModel, UserRole
 from app.schemas.user import User, UserCreate
-from app.services import auth_service, notification_service
-from app.core.rate_limit import strict_rate_limit
+from app.services import auth_service
 
 router = APIRouter()
 
-@router.post("/login/access-token", dependencies=[Depends(strict_rate_limit)])
+@router.post("/login/access-token")
 async def login_access_token(
-    db: AsyncSession = Depends(get_db), 
+    db: AsyncSession = Depends(get_db, scope="function"), 
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
@@ -31,26 +32,45 @@ async def login_access_token(
     await auth_service.validate_user_active(user)
     
     # Generate access token
-    return await auth_service.create_access_token(user.id)
+    return await auth_service.create_access_token(user.id, user.role)
 
-@router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED, dependencies=[Depends(strict_rate_limit)])
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+) -> None:
+    """
+    Revoke the access token used for this request
+    """
+    claims = request_token_claims(request, token)
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await auth_service.logout(claims)
+
+@router.post("/revoke/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_user_tokens(
+    user_id: int,
+    current_user: UserModel = Depends(get_current_user),
+) -> None:
+    """
+    Revoke all tokens issued to a user so far (Admin only)
+    """
+    await auth_service.check_permission(current_user, UserRole.ADMIN)
+    await auth_service.revoke_user_tokens(user_id)
+
+@router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
 async def register_user(
     *,
-    db: AsyncSession = Depends(get_db),
-    user_in: UserCreate,
-    background_tasks: BackgroundTasks
+    db: AsyncSession = Depends(get_db, scope="function"),
+    user_in: UserCreate
 ) -> Any:
     """
     Register a new user account
     """
-    # Register user using auth service
+    # Register user using auth service (queues the welcome email)
     user = await auth_service.register_user(db, user_in)
-    
-    # Send welcome email in background
-    background_tasks.add_task(
-        notification_service.send_welcome_email,
-        user_email=user.email,
-        user_name=user.email.split('@')[0]
-    )
-    
     return user
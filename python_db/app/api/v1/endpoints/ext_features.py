@@ -1,11 +1,12 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.repositories.profiles import skill_repo, interview_repo
 from app.schemas.profile import Skill, SkillCreate, Interview, InterviewCreate, InterviewUpdate
-from fastapi import BackgroundTasks
-from app.services.async_tasks import async_task_service
+from app.services.async_tasks import async_task_service, notification_batches
+from app.services.task_queue import QueuedTasks, get_queued_tasks
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -13,14 +14,14 @@ router = APIRouter()
 @router.post("/skills", response_model=Skill, status_code=status.HTTP_201_CREATED, tags=["skills"])
 async def create_skill(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     skill_in: SkillCreate
 ) -> Any:
     return await skill_repo.create(db, obj_in=skill_in)
 
 @router.get("/skills", response_model=List[Skill], tags=["skills"])
 async def read_skills(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     skip: int = 0,
     limit: int = 100
 ) -> Any:
@@ -30,14 +31,14 @@ async def read_skills(
 @router.post("/interviews", response_model=Interview, status_code=status.HTTP_201_CREATED, tags=["interviews"])
 async def schedule_interview(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     interview_in: InterviewCreate
 ) -> Any:
     return await interview_repo.create(db, obj_in=interview_in)
 
 @router.get("/interviews", response_model=List[Interview], tags=["interviews"])
 async def read_interviews(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     skip: int = 0,
     limit: int = 100
 ) -> Any:
@@ -46,18 +47,21 @@ async def read_interviews(
 # AsyncIO & Background Tasks Demo
 @router.post("/demo/background-batch", status_code=status.HTTP_202_ACCEPTED, tags=["async-demo"])
 async def trigger_background_batch(
-    background_tasks: BackgroundTasks,
-    emails: List[str]
+    emails: List[str],
+    background_tasks: QueuedTasks = Depends(get_queued_tasks, scope="function")
 ):
     """
     Triggers an asynchronous background batch process.
-    The API returns immediately (202 Accepted), while the server 
-    continues to process tasks in the background.
+    The API returns immediately (202 Accepted), while a task worker
+    (python -m app.worker) processes the batch. Progress is available
+    at the returned status URL.
     """
-    # Register the task in FastAPI BackgroundTasks
+    batch_id = await notification_batches.create(total=len(emails))
+    # Stage the recipients in Redis; the task entry carries only the batch id
+    await notification_batches.stage(batch_id, emails)
     background_tasks.add_task(
         async_task_service.process_batch_notifications, 
-        emails, 
+        batch_id,
         "Welcome to our Job Portal!"
     )
     
@@ -67,7 +71,19 @@ async def trigger_background_batch(
     return {
         "status": "Accepted",
         "message": f"Processing {len(emails)} notifications in the background. You don't have to wait!",
+        "batch_id": batch_id,
+        "status_url": f"{settings.API_V1_STR}/demo/background-batch/{batch_id}",
         "time_triggered": str(datetime.now())
     }
 
+@router.get("/demo/background-batch/{batch_id}", tags=["async-demo"])
+async def read_background_batch(batch_id: str):
+    """
+    Progress of a background batch: counts, throughput and recent failures.
+    """
+    batch = await notification_batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    return batch
+
 from datetime import datetime
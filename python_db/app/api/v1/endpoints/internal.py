@@ -0,0 +1,126 @@
+import os
+from typing import Any
+from fastapi import APIRouter, Depends, status
+from app.core.hashing import password_hasher
+from app.core.security import get_current_admin_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import engine, get_db, read_engine, replicas
+from app.db.slow_queries import slow_query_log
+from app.db.workload import workload_recorder
+from app.services.activity_log import activity_log_buffer
+from app.services.application_intake import application_intake
+from app.services.job_matching import job_match_digest
+from app.services.outbox import outbox_dispatcher
+from app.services.task_queue import task_queue
+
+router = APIRouter(dependencies=[Depends(get_current_admin_user)])
+
+@router.get("/db/pool")
+async def read_pool_stats() -> Any:
+    """
+    Connection pool usage for this worker process (Admin only)
+    """
+    return {
+        "pid": os.getpid(),
+        **engine.pool.stats(),
+        "reader": read_engine.pool.stats(),
+        "replicas": replicas.stats(),
+    }
+
+@router.get("/db/slow-queries")
+async def read_slow_queries() -> Any:
+    """
+    Slowest statement fingerprints on this worker, with sampled EXPLAIN plans (Admin only)
+    """
+    return {
+        "pid": os.getpid(),
+        "threshold_ms": slow_query_log.threshold_ms,
+        "window_seconds": slow_query_log.window,
+        "queries": slow_query_log.top(),
+    }
+
+@router.delete("/db/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_slow_queries() -> None:
+    """
+    Clear this worker's slow query table (Admin only)
+    """
+    slow_query_log.reset()
+
+@router.get("/db/workload")
+async def read_workload(limit: int = 50) -> Any:
+    """
+    Sampled statement workload of all workers, heaviest first (Admin only).
+    Replayed by `python -m app.db.index_advisor` to propose indexes.
+    """
+    workload = await workload_recorder.load()
+    return {
+        "sample_rate": workload_recorder.sample_rate,
+        "fingerprints": len(workload),
+        "queries": [
+            {key: entry[key] for key in ("fingerprint", "count", "total_ms")}
+            for entry in workload[:limit]
+        ],
+    }
+
+@router.delete("/db/workload", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_workload() -> None:
+    """
+    Start a fresh workload capture (Admin only)
+    """
+    await workload_recorder.reset()
+
+@router.get("/auth/hashing")
+async def read_password_hashing() -> Any:
+    """
+    Password hashing pool state and bcrypt cost for this worker (Admin only)
+    """
+    return {"pid": os.getpid(), **password_hasher.stats()}
+
+@router.get("/activity-log/buffer")
+async def read_activity_log_buffer() -> Any:
+    """
+    Activity log write-behind buffer state for this worker (Admin only)
+    """
+    return {"pid": os.getpid(), **activity_log_buffer.stats()}
+
+@router.get("/applications/intake")
+async def read_application_intake() -> Any:
+    """
+    Buffered application queue: backlog and this worker's consumer counters (Admin only)
+    """
+    return {"pid": os.getpid(), **await application_intake.stats()}
+
+@router.get("/notifications/outbox")
+async def read_notification_outbox(db: AsyncSession = Depends(get_db, scope="function")) -> Any:
+    """
+    Outbox rows by status and this worker's dispatcher counters (Admin only)
+    """
+    return {"pid": os.getpid(), **await outbox_dispatcher.stats(db)}
+
+@router.get("/notifications/job-matches")
+async def read_job_match_digest() -> Any:
+    """
+    Checkpoint and counters of the current job-match digest cycle (Admin only)
+    """
+    return await job_match_digest.state()
+
+@router.get("/tasks")
+async def read_task_queue() -> Any:
+    """
+    Background task queue: backlog and limits per task type, retries waiting, dead letters (Admin only)
+    """
+    return await task_queue.stats()
+
+@router.get("/tasks/dead")
+async def read_dead_tasks(limit: int = 20) -> Any:
+    """
+    Most recent dead-lettered tasks with their last error (Admin only)
+    """
+    return await task_queue.dead_letters(limit)
+
+@router.post("/tasks/dead/requeue")
+async def requeue_dead_tasks(limit: int = 100) -> Any:
+    """
+    Put the oldest dead-lettered tasks back on their queues (Admin only)
+    """
+    return {"requeued": await task_queue.requeue_dead(limit)}
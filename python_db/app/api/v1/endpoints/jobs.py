@@ -1,22 +1,23 @@
+from datetime import datetime
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.schemas.job import Job, JobCreate, JobUpdate
 from app.models.models import JobType, JobStatus, User
 from app.services import job_service
 from app.services.activity_log import log_activity
+from app.services.task_queue import QueuedTasks, get_queued_tasks
 from app.core.security import get_current_active_user
-from app.core.rate_limit import search_rate_limit
 
 router = APIRouter()
 
 @router.post("/", response_model=Job, status_code=status.HTTP_201_CREATED)
 async def create_job(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     job_in: JobCreate,
-    background_tasks: BackgroundTasks,
+    background_tasks: QueuedTasks = Depends(get_queued_tasks, scope="function"),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
@@ -36,7 +37,8 @@ async def create_job(
             current_user.id, 
             "JOB_POSTED", 
             "JOB", 
-            job.id
+            job.id,
+            occurred_at=datetime.now()
         )
         
         return job
@@ -48,7 +50,7 @@ async def create_job(
 
 @router.get("/", response_model=List[Job])
 async def read_jobs(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db, scope="function"),
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
@@ -59,9 +61,9 @@ async def read_jobs(
     jobs = await job_repo.get_multi(db, skip=skip, limit=limit)
     return jobs
 
-@router.get("/search", response_model=List[Job], dependencies=[Depends(search_rate_limit)])
+@router.get("/search", response_model=List[Job])
 async def search_jobs(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db, scope="function"),
     location: Optional[str] = Query(None, description="Filter by location"),
     job_type: Optional[JobType] = Query(None, description="Filter by job type"),
     min_salary: Optional[int] = Query(None, description="Minimum salary"),
@@ -84,7 +86,7 @@ async def search_jobs(
 @router.get("/{job_id}", response_model=Job)
 async def get_job(
     job_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db, scope="function"),
 ) -> Any:
     """
     Get job by ID (Public endpoint)
@@ -92,11 +94,11 @@ async def get_job(
     job = await job_service.get_job_by_id(db, job_id)
     return job
 
-@router.put("/{job_id}/status")
+@router.put("/{job_id}/status", response_model=Job)
 async def update_job_status(
     job_id: int,
     new_status: JobStatus,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
@@ -114,7 +116,7 @@ async def update_job_status(
 
 @router.get("/my/jobs", response_model=List[Job])
 async def get_my_jobs(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db, scope="function"),
     current_user: User = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = 100,
@@ -133,7 +135,7 @@ async def get_my_jobs(
 
 @router.get("/stats/active-count")
 async def get_active_jobs_count(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db, scope="function"),
 ) -> Any:
     """
     Get count of active job postings (Public endpoint)
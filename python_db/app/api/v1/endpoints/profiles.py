@@ -1,12 +1,12 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.schemas.profile import (
     Recruiter, RecruiterCreate, RecruiterUpdate,
     JobSeeker, JobSeekerCreate, JobSeekerUpdate
 )
-from app.services import profile_service, notification_service
+from app.services import profile_service
 
 router = APIRouter()
 
@@ -14,9 +14,8 @@ router = APIRouter()
 @router.post("/recruiters", response_model=Recruiter, status_code=status.HTTP_201_CREATED)
 async def create_recruiter_profile(
     *,
-    db: AsyncSession = Depends(get_db),
-    profile_in: RecruiterCreate,
-    background_tasks: BackgroundTasks
+    db: AsyncSession = Depends(get_db, scope="function"),
+    profile_in: RecruiterCreate
 ) -> Any:
     """
     Create recruiter profile
@@ -26,20 +25,12 @@ async def create_recruiter_profile(
         profile_data=profile_in,
         user_id=profile_in.user_id
     )
-    
-    # Send notification about profile creation
-    background_tasks.add_task(
-        notification_service.send_welcome_email,
-        user_email="recruiter@example.com",  # Get from user
-        user_name=profile.company_name
-    )
-    
     return profile
 
 @router.get("/recruiters/{id}", response_model=Recruiter)
 async def get_recruiter_profile(
     id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db, scope="function")
 ) -> Any:
     """
     Get recruiter profile by ID
@@ -53,7 +44,7 @@ async def get_recruiter_profile(
 @router.get("/recruiters/user/{user_id}", response_model=Recruiter)
 async def get_recruiter_by_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db, scope="function")
 ) -> Any:
     """
     Get recruiter profile by user ID
@@ -65,9 +56,8 @@ async def get_recruiter_by_user(
 @router.post("/job-seekers", response_model=JobSeeker, status_code=status.HTTP_201_CREATED)
 async def create_job_seeker_profile(
     *,
-    db: AsyncSession = Depends(get_db),
-    profile_in: JobSeekerCreate,
-    background_tasks: BackgroundTasks
+    db: AsyncSession = Depends(get_db, scope="function"),
+    profile_in: JobSeekerCreate
 ) -> Any:
     """
     Create job seeker profile
@@ -77,20 +67,12 @@ async def create_job_seeker_profile(
         profile_data=profile_in,
         user_id=profile_in.user_id
     )
-    
-    # Send welcome notification
-    background_tasks.add_task(
-        notification_service.send_welcome_email,
-        user_email="jobseeker@example.com",  # Get from user
-        user_name=profile.full_name
-    )
-    
     return profile
 
 @router.get("/job-seekers/{id}", response_model=JobSeeker)
 async def get_job_seeker_profile(
     id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db, scope="function")
 ) -> Any:
     """
     Get job seeker profile by ID
@@ -104,7 +86,7 @@ async def get_job_seeker_profile(
 @router.get("/job-seekers/user/{user_id}", response_model=JobSeeker)
 async def get_job_seeker_by_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db, scope="function")
 ) -> Any:
     """
     Get job seeker profile by user ID
@@ -116,7 +98,7 @@ async def get_job_seeker_by_user(
 async def update_job_seeker_profile(
     user_id: int,
     profile_in: JobSeekerUpdate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db, scope="function")
 ) -> Any:
     """
     Update job seeker profile
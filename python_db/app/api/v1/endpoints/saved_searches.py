@@ -0,0 +1,43 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db, get_read_db
+from app.schemas.saved_search import SavedSearch, SavedSearchCreate
+from app.models.models import User
+from app.services.saved_searches import saved_search_service
+from app.core.security import get_current_active_user
+
+router = APIRouter()
+
+@router.post("/", response_model=SavedSearch, status_code=status.HTTP_201_CREATED)
+async def create_saved_search(
+    *,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    search_in: SavedSearchCreate,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Save a job search; you are e-mailed when a matching job is posted (Protected)
+    """
+    return await saved_search_service.create_saved_search(db, current_user.id, search_in)
+
+@router.get("/", response_model=List[SavedSearch])
+async def read_saved_searches(
+    db: AsyncSession = Depends(get_read_db, scope="function"),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Your saved searches (Protected)
+    """
+    return await saved_search_service.get_saved_searches(db, current_user.id)
+
+@router.delete("/{search_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_saved_search(
+    search_id: int,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    current_user: User = Depends(get_current_active_user)
+) -> None:
+    """
+    Delete a saved search and stop its alerts (Protected)
+    """
+    await saved_search_service.delete_saved_search(db, current_user.id, search_id)
@@ -1,11 +1,15 @@
+from datetime import datetime
 from typing import Any, List
-from fastapi import APIRouter, Body, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Body, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.repositories.user import user_repo
 from app.schemas.user import User, UserCreate, UserUpdate
 from app.core.security import get_password_hash, get_current_active_user
 from app.services.activity_log import log_activity
+from app.services.task_queue import QueuedTasks, get_queued_tasks
+from app.core.user_cache import user_cache
+from app.core.token_cache import revoked_tokens
 from app.models.models import User as UserModel
 
 router = APIRouter()
@@ -13,9 +17,9 @@ router = APIRouter()
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
 async def create_user(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     user_in: UserCreate,
-    background_tasks: BackgroundTasks
+    background_tasks: QueuedTasks = Depends(get_queued_tasks, scope="function")
 ) -> Any:
     """
     Create new user (Public endpoint for registration)
@@ -28,12 +32,12 @@ async def create_user(
         )
     
     user = await user_repo.create(db, obj_in=user_in)
-    background_tasks.add_task(log_activity, user.id, "USER_CREATED", "USER", user.id)
+    background_tasks.add_task(log_activity, user.id, "USER_CREATED", "USER", user.id, occurred_at=datetime.now())
     return user
 
 @router.get("/", response_model=List[User])
 async def read_users(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
@@ -55,7 +59,7 @@ async def read_user_me(
 @router.get("/{user_id}", response_model=User)
 async def read_user_by_id(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
 ) -> Any:
     """
     Get a specific user by id (Public GET)
@@ -71,7 +75,7 @@ async def read_user_by_id(
 @router.put("/me", response_model=User)
 async def update_user_me(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     user_in: UserUpdate,
     current_user: UserModel = Depends(get_current_active_user),
 ) -> Any:
@@ -79,4 +83,11 @@ async def update_user_me(
     Update current user
     """
     user = await user_repo.update(db, db_obj=current_user, obj_in=user_in)
+    # Invalidate again once committed so a concurrent request cannot
+    # re-cache the pre-update row (e.g. a deactivated user as active)
+    await db.commit()
+    await user_cache.invalidate(user.id)
+    if user_in.is_active is False:
+        # Deactivation logs the user out everywhere
+        await revoked_tokens.revoke_user(user.id)
     return user
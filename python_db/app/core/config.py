@@ -10,6 +10,19 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "SUPER_SECRET_KEY_CHANGE_ME")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # Password hashing (bcrypt runs on a bounded thread pool, off the event loop)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # When > 0, pick the highest cost that hashes within this many ms at startup
+    BCRYPT_TARGET_MS: int = int(os.getenv("BCRYPT_TARGET_MS", "0"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+    # Authenticated users are cached in Redis for this long (0 disables the cache)
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    # Verified JWTs kept per worker, so repeat requests skip the signature check (0 disables)
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    # How often each worker checks Redis for new token revocations
+    TOKEN_REVOCATION_SYNC_SECONDS: float = float(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", "5"))
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("TOKEN_REVOCATION_BLOOM_CAPACITY", "100000"))
     
     # Database
     MYSQL_USER: str = os.getenv("MYSQL_USER", "root")
@@ -17,15 +30,154 @@ class Settings(BaseSettings):
     MYSQL_SERVER: str = os.getenv("MYSQL_SERVER", "localhost")
     MYSQL_PORT: str = os.getenv("MYSQL_PORT", "3306")
     MYSQL_DB: str = os.getenv("MYSQL_DB", "job_portal")
+    # Connection pool (per worker process: size + overflow is the most it will open)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, below MySQL wait_timeout
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+    # Separate autocommit pool for read-only endpoints served by the primary
+    DB_READ_POOL_SIZE: int = int(os.getenv("DB_READ_POOL_SIZE", "5"))
+    DB_READ_MAX_OVERFLOW: int = int(os.getenv("DB_READ_MAX_OVERFLOW", "10"))
+    # Log every SQL statement (development only)
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+    # Read replicas ("host" or "host:port", comma separated; same credentials and database)
+    DB_REPLICA_HOSTS: str = os.getenv("DB_REPLICA_HOSTS", "")
+    DB_REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+    DB_REPLICA_LAG_CHECK_SECONDS: float = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "5"))
+    # After a mutation, the caller's reads go to the primary for this long
+    DB_STICKY_PRIMARY_SECONDS: int = int(os.getenv("DB_STICKY_PRIMARY_SECONDS", "5"))
+    # Warn when one request runs the same statement shape more than this many times
+    QUERY_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "10"))
+    # Statements slower than this are logged with their parameters and route
+    SLOW_QUERY_MS: int = int(os.getenv("SLOW_QUERY_MS", "200"))
+    # Share of slow SELECTs EXPLAINed (at most once per fingerprint per window)
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+    SLOW_QUERY_TOP_N: int = int(os.getenv("SLOW_QUERY_TOP_N", "25"))
+    SLOW_QUERY_WINDOW_SECONDS: int = int(os.getenv("SLOW_QUERY_WINDOW_SECONDS", "3600"))
+    # Share of statements sampled into the workload replayed by the index advisor (0 disables)
+    WORKLOAD_SAMPLE_RATE: float = float(os.getenv("WORKLOAD_SAMPLE_RATE", "0.01"))
+    WORKLOAD_FLUSH_SECONDS: float = float(os.getenv("WORKLOAD_FLUSH_SECONDS", "30"))
+    # Activity log write-behind buffer: flush every N records or T ms, whichever comes first
+    ACTIVITY_LOG_BATCH_SIZE: int = int(os.getenv("ACTIVITY_LOG_BATCH_SIZE", "200"))
+    ACTIVITY_LOG_FLUSH_MS: int = int(os.getenv("ACTIVITY_LOG_FLUSH_MS", "500"))
+    ACTIVITY_LOG_MAX_QUEUE: int = int(os.getenv("ACTIVITY_LOG_MAX_QUEUE", "10000"))
+    # How long a producer waits for room in a full buffer before the record is dropped
+    ACTIVITY_LOG_ENQUEUE_TIMEOUT_MS: int = int(os.getenv("ACTIVITY_LOG_ENQUEUE_TIMEOUT_MS", "100"))
+    # Monthly activity_logs partitions: months kept online, months created ahead of time
+    ACTIVITY_LOG_RETENTION_MONTHS: int = int(os.getenv("ACTIVITY_LOG_RETENTION_MONTHS", "12"))
+    ACTIVITY_LOG_PARTITIONS_AHEAD: int = int(os.getenv("ACTIVITY_LOG_PARTITIONS_AHEAD", "3"))
+    # Expired partitions are exported here (gzipped JSON lines) before being dropped
+    ACTIVITY_LOG_ARCHIVE_DIR: str = os.getenv("ACTIVITY_LOG_ARCHIVE_DIR", "archive/activity_logs")
+    # How often each worker attempts partition maintenance (0 disables; run python -m app.db.partitions instead)
+    ACTIVITY_LOG_MAINTENANCE_HOURS: float = float(os.getenv("ACTIVITY_LOG_MAINTENANCE_HOURS", "24"))
+    # Longest created_at range one timeline request may scan
+    ACTIVITY_LOG_MAX_RANGE_DAYS: int = int(os.getenv("ACTIVITY_LOG_MAX_RANGE_DAYS", "366"))
+    
+    # Idempotency-Key responses are replayed for this long; a key is locked while its request runs
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "30"))
+    # Bulk application status changes: most IDs per request, IDs per statement
+    APPLICATION_BULK_MAX_IDS: int = int(os.getenv("APPLICATION_BULK_MAX_IDS", "5000"))
+    APPLICATION_BULK_CHUNK_SIZE: int = int(os.getenv("APPLICATION_BULK_CHUNK_SIZE", "1000"))
+    # "buffered": submissions are queued on a Redis Stream (202 + status URL) and inserted in batches
+    APPLICATION_INTAKE_MODE: str = os.getenv("APPLICATION_INTAKE_MODE", "direct")
+    APPLICATION_INTAKE_BATCH_SIZE: int = int(os.getenv("APPLICATION_INTAKE_BATCH_SIZE", "500"))
+    APPLICATION_INTAKE_BLOCK_MS: int = int(os.getenv("APPLICATION_INTAKE_BLOCK_MS", "200"))
+    # Above this many queued submissions, new ones get 503 + Retry-After
+    APPLICATION_INTAKE_MAX_BACKLOG: int = int(os.getenv("APPLICATION_INTAKE_MAX_BACKLOG", "100000"))
+    # Deliveries of a submission that keeps failing before it is rejected and dead-lettered
+    APPLICATION_INTAKE_MAX_DELIVERIES: int = int(os.getenv("APPLICATION_INTAKE_MAX_DELIVERIES", "5"))
+    # How long a queued submission's status stays available
+    APPLICATION_REQUEST_TTL_SECONDS: int = int(os.getenv("APPLICATION_REQUEST_TTL_SECONDS", "86400"))
+    # Notifications sent concurrently per batch
+    NOTIFICATION_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", "100"))
+    # Email delivery: "log" only logs, "smtp" sends through a pool of persistent SMTP sessions
+    EMAIL_BACKEND: str = os.getenv("EMAIL_BACKEND", "log")
+    EMAIL_FROM: str = os.getenv("EMAIL_FROM", "no-reply@jobportal.local")
+    SMTP_HOST: str = os.getenv("SMTP_HOST", "localhost")
+    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "25"))
+    SMTP_USERNAME: str = os.getenv("SMTP_USERNAME", "")
+    SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
+    SMTP_USE_TLS: bool = os.getenv("SMTP_USE_TLS", "false").lower() in ("1", "true", "yes")
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "false").lower() in ("1", "true", "yes")
+    SMTP_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+    # Sessions per worker; messages per session before reconnecting; idle seconds before a session is dropped
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "8"))
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "1000"))
+    SMTP_IDLE_SECONDS: float = float(os.getenv("SMTP_IDLE_SECONDS", "30"))
+    # Recipients per transaction when identical messages are sent together
+    SMTP_MAX_RECIPIENTS: int = int(os.getenv("SMTP_MAX_RECIPIENTS", "100"))
+    # Notification templates: locale used when none (or an unknown one) is given; memoized shared renders
+    NOTIFICATION_DEFAULT_LOCALE: str = os.getenv("NOTIFICATION_DEFAULT_LOCALE", "en")
+    NOTIFICATION_TEMPLATE_CACHE_SIZE: int = int(os.getenv("NOTIFICATION_TEMPLATE_CACHE_SIZE", "4096"))
+    # Nightly job-match digest: hour of day it starts (-1 disables; run python -m app.services.job_matching
+    # instead) and minutes it may run before pausing until the next night
+    JOB_MATCH_DIGEST_HOUR: int = int(os.getenv("JOB_MATCH_DIGEST_HOUR", "2"))
+    JOB_MATCH_WINDOW_MINUTES: float = float(os.getenv("JOB_MATCH_WINDOW_MINUTES", "240"))
+    # Seekers scored per chunk; jobs per digest; share of a job's skills a seeker must have
+    JOB_MATCH_CHUNK_SIZE: int = int(os.getenv("JOB_MATCH_CHUNK_SIZE", "1000"))
+    JOB_MATCH_MAX_JOBS: int = int(os.getenv("JOB_MATCH_MAX_JOBS", "5"))
+    JOB_MATCH_MIN_SCORE: float = float(os.getenv("JOB_MATCH_MIN_SCORE", "0.5"))
+    # Saved-search alerts: searches per user; search IDs / alerts per statement when a job matches many
+    SAVED_SEARCH_MAX_PER_USER: int = int(os.getenv("SAVED_SEARCH_MAX_PER_USER", "20"))
+    SAVED_SEARCH_ALERT_CHUNK_SIZE: int = int(os.getenv("SAVED_SEARCH_ALERT_CHUNK_SIZE", "1000"))
+    # Durable task queue run by python -m app.worker: stream key prefix, how long a read blocks
+    TASK_QUEUE_PREFIX: str = os.getenv("TASK_QUEUE_PREFIX", "tasks")
+    TASK_QUEUE_BLOCK_MS: int = int(os.getenv("TASK_QUEUE_BLOCK_MS", "1000"))
+    # Defaults for task types that don't set their own: concurrent runs per worker, retries, seconds per run
+    TASK_DEFAULT_CONCURRENCY: int = int(os.getenv("TASK_DEFAULT_CONCURRENCY", "10"))
+    TASK_DEFAULT_MAX_RETRIES: int = int(os.getenv("TASK_DEFAULT_MAX_RETRIES", "3"))
+    TASK_DEFAULT_TIMEOUT_SECONDS: float = float(os.getenv("TASK_DEFAULT_TIMEOUT_SECONDS", "300"))
+    # Per task type concurrency overrides, e.g. "log_activity=100,simulate_heavy_computation=1"
+    TASK_CONCURRENCY: str = os.getenv("TASK_CONCURRENCY", "")
+    # First retry delay (doubled per attempt); dead letters kept; seconds a stopping worker gives running tasks
+    TASK_RETRY_SECONDS: float = float(os.getenv("TASK_RETRY_SECONDS", "10"))
+    TASK_DEAD_LETTER_MAXLEN: int = int(os.getenv("TASK_DEAD_LETTER_MAXLEN", "10000"))
+    TASK_SHUTDOWN_GRACE_SECONDS: float = float(os.getenv("TASK_SHUTDOWN_GRACE_SECONDS", "30"))
+    # Bulk notification batches: concurrent sends, recipients read per chunk, retries per recipient
+    NOTIFICATION_BATCH_WIDTH: int = int(os.getenv("NOTIFICATION_BATCH_WIDTH", "50"))
+    NOTIFICATION_BATCH_CHUNK_SIZE: int = int(os.getenv("NOTIFICATION_BATCH_CHUNK_SIZE", "1000"))
+    NOTIFICATION_BATCH_MAX_RETRIES: int = int(os.getenv("NOTIFICATION_BATCH_MAX_RETRIES", "3"))
+    # First retry delay, doubled per attempt; how long batch progress records are kept
+    NOTIFICATION_BATCH_RETRY_SECONDS: float = float(os.getenv("NOTIFICATION_BATCH_RETRY_SECONDS", "1"))
+    NOTIFICATION_BATCH_TTL_SECONDS: int = int(os.getenv("NOTIFICATION_BATCH_TTL_SECONDS", "604800"))
+    # Notification outbox dispatcher: rows claimed per round, sends in flight, idle poll interval
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_CONCURRENCY: int = int(os.getenv("OUTBOX_CONCURRENCY", "20"))
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+    # Attempts before a notification is marked FAILED; seconds a claimed row stays reserved
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_LEASE_SECONDS: float = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+    # Sent rows are deleted after this many hours
+    OUTBOX_RETENTION_HOURS: float = float(os.getenv("OUTBOX_RETENTION_HOURS", "72"))
     
     # Redis
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
+
+    # Rate limiting
+    # "redis": every request is decided by one atomic Redis script.
+    # "hybrid": decided by per-worker token buckets, reconciled with Redis in the background.
+    RATE_LIMIT_MODE: str = os.getenv("RATE_LIMIT_MODE", "redis")
+    RATE_LIMIT_SYNC_INTERVAL_MS: int = int(os.getenv("RATE_LIMIT_SYNC_INTERVAL_MS", "250"))
+    # JSON policy file (see app/core/rate_limit_policy.py); built-in defaults when unset
+    RATE_LIMIT_POLICY_FILE: str = os.getenv("RATE_LIMIT_POLICY_FILE", "")
+    # Number of trusted proxies appending to X-Forwarded-For (0 = use the socket peer)
+    RATE_LIMIT_TRUSTED_PROXY_HOPS: int = int(os.getenv("RATE_LIMIT_TRUSTED_PROXY_HOPS", "0"))
     
     @property
     def ASYNC_DATABASE_URL(self) -> str:
         return f"mysql+aiomysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_SERVER}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
 
+    @property
+    def ASYNC_REPLICA_DATABASE_URLS(self) -> List[str]:
+        urls = []
+        for host in filter(None, (h.strip() for h in self.DB_REPLICA_HOSTS.split(","))):
+            if ":" not in host:
+                host = f"{host}:{self.MYSQL_PORT}"
+            urls.append(f"mysql+aiomysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{host}/{self.MYSQL_DB}")
+        return urls
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -9,6 +9,7 @@ async def custom_http_exception_handler(request: Request, exc: StarletteHTTPExce
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail, "error_code": "HTTP_ERROR"},
+        headers=getattr(exc, "headers", None),
     )
 
 async def generic_exception_handler(request: Request, exc: Exception):
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing/verification on a dedicated, bounded thread pool.
+
+    bcrypt spends ~100-300 ms of CPU per call; run inline it blocks the event
+    loop and every other request on the worker. The bcrypt C extension
+    releases the GIL, so threads give real parallelism here without the
+    pickling overhead of a process pool.
+
+    At most `workers` calls run at once and at most `max_queue` more wait
+    for a thread; beyond that callers get a 503 instead of piling up.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_queue: int):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Only touched from the event loop thread
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.workers + self.max_queue:
+            self._rejected += 1
+            logger.warning(f"Password hashing queue full ({self._pending} pending), rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            # Wall time, including time spent waiting for a thread
+            elapsed = time.perf_counter() - start
+            self._pending -= 1
+            self._completed += 1
+            self._total_seconds += elapsed
+            self._max_seconds = max(self._max_seconds, elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    def set_rounds(self, rounds: int):
+        """Change the cost used for new hashes (existing hashes keep theirs)."""
+        self.context.update(bcrypt__rounds=rounds)
+        self.rounds = rounds
+
+    def _measure(self, rounds: int) -> float:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        start = time.perf_counter()
+        context.hash("autotune-probe")
+        return (time.perf_counter() - start) * 1000
+
+    async def autotune(self, target_ms: float, min_rounds: int = 10, max_rounds: int = 15) -> int:
+        """
+        Pick the highest bcrypt cost whose hash time on this host stays
+        within `target_ms`. Each extra round doubles the work, so one probe
+        at `min_rounds` is enough to extrapolate.
+        """
+        probe_ms = await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), self._measure, min_rounds
+        )
+        rounds = min_rounds
+        while rounds < max_rounds and probe_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+            rounds += 1
+        self.set_rounds(rounds)
+        logger.info(
+            f"bcrypt cost tuned to {rounds} rounds "
+            f"(~{probe_ms * 2 ** (rounds - min_rounds):.0f}ms, target {target_ms:.0f}ms)"
+        )
+        return rounds
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.workers),
+            "queued": max(self._pending - self.workers, 0),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_ms": round(self._total_seconds / self._completed * 1000, 2) if self._completed else 0.0,
+            "max_ms": round(self._max_seconds * 1000, 2),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+from typing import Optional
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+_PENDING = "__pending__"
+
+class IdempotencyCache:
+    """
+    Responses of non-idempotent requests, keyed by the client's
+    `Idempotency-Key` within a scope (e.g. "apply:{user_id}").
+
+    `begin` claims the key with SET NX. A retry after success replays the
+    stored response; a retry while the first attempt is still running gets
+    409; reusing a key for a different request body gets 422. If Redis is
+    unavailable the request simply runs without replay protection.
+    """
+
+    def __init__(self, ttl: int, lock_seconds: int):
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+
+    def _key(self, scope: str, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return f"idempotency:{scope}:{digest}"
+
+    def _request_hash(self, request: dict) -> str:
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def begin(self, scope: str, key: str, request: dict) -> Optional[dict]:
+        """Claim `key`; returns the stored response if the request already succeeded"""
+        redis_key = self._key(scope, key)
+        request_hash = self._request_hash(request)
+        pending = json.dumps({"request": request_hash, "response": _PENDING})
+        try:
+            if await redis_client.set(redis_key, pending, nx=True, ex=self.lock_seconds):
+                return None
+            stored = await redis_client.get(redis_key)
+        except Exception as e:
+            logger.error(f"Idempotency cache error: {str(e)}")
+            return None
+        if stored is None:
+            # Expired between SET and GET: treat as a first attempt
+            return None
+        stored = json.loads(stored)
+        if stored["request"] != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        if stored["response"] == _PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed"
+            )
+        return stored["response"]
+
+    async def complete(self, scope: str, key: str, request: dict, response: dict):
+        try:
+            await redis_client.set(
+                self._key(scope, key),
+                json.dumps({"request": self._request_hash(request), "response": response}),
+                ex=self.ttl,
+            )
+        except Exception as e:
+            logger.error(f"Idempotency cache error: {str(e)}")
+
+    async def release(self, scope: str, key: str):
+        """Forget a failed attempt so the client can retry it"""
+        try:
+            await redis_client.delete(self._key(scope, key))
+        except Exception as e:
+            logger.error(f"Idempotency cache error: {str(e)}")
+
+idempotency_cache = IdempotencyCache(
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+)
@@ -2,23 +2,37 @@ import uuid
 import time
 from fastapi import Request
 from loguru import logger
+from app.core.config import settings
+from app.db.query_stats import start_request_stats
 
 async def request_log_middleware(request: Request, call_next):
     request_id = str(uuid.uuid4())
     request.state.request_id = request_id
     
     start_time = time.time()
+    query_stats = start_request_stats(f"{request.method} {request.url.path}")
     
     # Process the request
     response = await call_next(request)
     
     process_time = (time.time() - start_time) * 1000
     formatted_process_time = "{0:.2f}ms".format(process_time)
+    db_time = query_stats.total_seconds * 1000
     
     logger.info(
         f"rid={request_id} method={request.method} path={request.url.path} "
-        f"status={response.status_code} time={formatted_process_time}"
+        f"status={response.status_code} time={formatted_process_time} "
+        f"queries={query_stats.count} db_time={db_time:.2f}ms"
     )
     
+    for statement, count, seconds in query_stats.repeats(settings.QUERY_N_PLUS_ONE_THRESHOLD):
+        logger.warning(
+            f"rid={request_id} possible N+1 on {request.method} {request.url.path}: "
+            f"{count} queries ({seconds * 1000:.2f}ms) for: {statement[:300]}"
+        )
+    
     response.headers["X-Request-ID"] = request_id
+    response.headers["Server-Timing"] = (
+        f'db;dur={db_time:.2f};desc="{query_stats.count} queries", app;dur={process_time:.2f}'
+    )
     return response
@@ -1,59 +1,289 @@
-from fastapi import Request, HTTPException, status
+from fastapi import Request, Response, HTTPException, status
+from app.core.config import settings
 from app.core.redis import redis_client
+import asyncio
 import logging
-from typing import Optional
+import math
+import time
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Generic Cell Rate Algorithm (GCRA), evaluated atomically inside Redis.
+# The key stores the "theoretical arrival time" (TAT) in milliseconds; each
+# admitted request pushes it forward by one emission interval (window / limit).
+# A request is rejected when admitting it would push the TAT more than one
+# full window ahead of now. Decision and bookkeeping happen in one EVALSHA,
+# and the server clock is used so all workers agree on "now".
+#
+# Returns {allowed, remaining, retry_after_ms, reset_after_ms}.
+GCRA_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local emission = period / limit
+
+local tat = tonumber(redis.call('GET', key))
+if not tat or tat < now then
+    tat = now
+end
+
+local new_tat = tat + emission
+local allow_at = new_tat - period
+
+if allow_at > now then
+    return {0, 0, math.ceil(allow_at - now), math.ceil(tat - now)}
+end
+
+redis.call('SET', key, new_tat, 'PX', math.ceil(new_tat - now))
+return {1, math.floor((now - allow_at) / emission), 0, math.ceil(new_tat - now)}
+"""
+
+class RateLimitDecision:
+    """Outcome of a single rate limit check."""
+
+    __slots__ = ("allowed", "limit", "remaining", "retry_after", "reset_after")
+
+    def __init__(self, allowed: bool, limit: int, remaining: int, retry_after: float, reset_after: float):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.retry_after = retry_after  # seconds
+        self.reset_after = reset_after  # seconds
+
+    @property
+    def headers(self) -> dict:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(self.remaining, 0)),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after), 1))
+        return headers
+
+class _LocalBucket:
+    """Per-worker token bucket plus the last known global usage for one key."""
+
+    __slots__ = ("tokens", "updated", "pending", "window_id", "global_count", "blocked_until")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.pending = 0          # admitted locally, not yet reported to Redis
+        self.window_id = 0        # global window the counts below belong to
+        self.global_count = 0     # cluster-wide count as of the last sync
+        self.blocked_until = 0.0  # monotonic deadline set when the global limit is exhausted
+
+# Every limiter created in this process, so shutdown can flush hybrid counters.
+_limiters: List["RateLimiter"] = []
+
 class RateLimiter:
     """
-    Enhanced Redis-based Rate Limiter.
-    Supports dynamic limits and configurable windows.
+    Redis-based Rate Limiter with two modes.
+
+    - "redis": atomic GCRA. One round trip per request; limits are smooth rather
+      than fixed windows, so a client gets `requests` per `window` seconds with
+      bursts up to `requests`.
+    - "hybrid": each worker admits requests from local token buckets with no
+      network I/O and reports its consumed counts to per-window Redis counters
+      every `sync_interval` seconds. Once the cluster-wide count for a key
+      reaches the limit, every worker rejects that key locally until the window
+      ends. A key is also flushed inline once `max_pending` requests are waiting
+      to be reported, so the global overshoot is bounded by
+      `workers * max_pending` per window.
     """
-    
-    def __init__(self, requests: int = 60, window: int = 60):
+
+    def __init__(
+        self,
+        requests: int = 60,
+        window: int = 60,
+        name: str = "default",
+        mode: Optional[str] = None,
+        sync_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
         self.requests = requests
         self.window = window
+        # Separate namespaces so stacked limiters (e.g. default + search) keep
+        # independent state for the same client and path.
+        self.name = name
+        self.mode = mode or settings.RATE_LIMIT_MODE
+        self.sync_interval = sync_interval or settings.RATE_LIMIT_SYNC_INTERVAL_MS / 1000
+        self.max_pending = max_pending or max(1, math.ceil(requests * 0.1))
+        self._script = None
+        self._buckets: Dict[str, _LocalBucket] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+        _limiters.append(self)
+
+    def _get_script(self):
+        # redis-py Script objects use EVALSHA and transparently fall back to
+        # EVAL (loading the script) the first time it is missing on the server.
+        if self._script is None:
+            self._script = redis_client.register_script(GCRA_SCRIPT)
+        return self._script
+
+    async def hit(self, key: str) -> RateLimitDecision:
+        """Record one request against `key` and return the decision."""
+        if self.mode == "hybrid":
+            return await self._hit_local(key)
+        return await self._hit_redis(key)
+
+    async def _hit_redis(self, key: str) -> RateLimitDecision:
+        allowed, remaining, retry_after_ms, reset_after_ms = await self._get_script()(
+            keys=[key], args=[self.requests, self.window * 1000]
+        )
+        return RateLimitDecision(
+            allowed=bool(allowed),
+            limit=self.requests,
+            remaining=int(remaining),
+            retry_after=int(retry_after_ms) / 1000,
+            reset_after=int(reset_after_ms) / 1000,
+        )
+
+    async def _hit_local(self, key: str) -> RateLimitDecision:
+        self._ensure_sync_task()
+        now = time.monotonic()
+        rate = self.requests / self.window
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _LocalBucket(self.requests, now)
+
+        # Globally exhausted (learned from a previous sync): reject without I/O.
+        if bucket.blocked_until > now:
+            wait = bucket.blocked_until - now
+            return RateLimitDecision(False, self.requests, 0, wait, wait)
 
-    async def __call__(self, request: Request):
+        bucket.tokens = min(self.requests, bucket.tokens + (now - bucket.updated) * rate)
+        bucket.updated = now
+
+        # Over the limit on this worker alone: obviously abusive, reject without I/O.
+        if bucket.tokens < 1:
+            wait = (1 - bucket.tokens) / rate
+            return RateLimitDecision(False, self.requests, 0, wait, self.window)
+
+        bucket.tokens -= 1
+        bucket.pending += 1
+        if bucket.pending >= self.max_pending:
+            await self._flush([key])
+
+        global_count = bucket.global_count if bucket.window_id == int(time.time() // self.window) else 0
+        remaining = min(int(bucket.tokens), self.requests - global_count - bucket.pending)
+        reset_after = (self.requests - bucket.tokens) / rate
+        return RateLimitDecision(True, self.requests, remaining, 0, reset_after)
+
+    def _ensure_sync_task(self):
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.get_running_loop().create_task(self._sync_loop())
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self._flush([k for k, b in self._buckets.items() if b.pending])
+                self._prune()
+            except Exception as e:
+                logger.error(f"Rate limiter sync error: {str(e)}")
+
+    async def _flush(self, keys: List[str]):
+        """Report pending local counts to Redis and learn the global totals."""
+        if not keys:
+            return
+        window_id = int(time.time() // self.window)
+        window_end = (window_id + 1) * self.window
+        batch = []
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is None or not bucket.pending:
+                continue
+            batch.append((key, bucket, bucket.pending))
+            bucket.pending = 0
+
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key, _, count in batch:
+                    counter_key = f"{key}:{window_id}"
+                    pipe.incrby(counter_key, count)
+                    pipe.expire(counter_key, self.window * 2)
+                results = await pipe.execute()
+        except Exception as e:
+            # Keep the counts so the next sync retries them; admission stays local.
+            for _, bucket, count in batch:
+                bucket.pending += count
+            logger.error(f"Rate limiter sync error: {str(e)}")
+            return
+
+        now = time.monotonic()
+        for (_, bucket, _), total in zip(batch, results[::2]):
+            bucket.window_id = window_id
+            bucket.global_count = int(total)
+            if bucket.global_count >= self.requests:
+                bucket.blocked_until = now + max(window_end - time.time(), 0)
+
+    def _prune(self):
+        """Forget buckets that are full again and have nothing left to report."""
+        now = time.monotonic()
+        rate = self.requests / self.window
+        current_window = int(time.time() // self.window)
+        for key in [
+            k for k, b in self._buckets.items()
+            if not b.pending
+            and b.blocked_until <= now
+            and b.window_id != current_window
+            and b.tokens + (now - b.updated) * rate >= self.requests
+        ]:
+            del self._buckets[key]
+
+    async def close(self):
+        """Stop the background sync and report any counts still pending."""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+        await self._flush([k for k, b in self._buckets.items() if b.pending])
+
+    async def enforce(self, key: str, response: Response, client: str = ""):
+        """
+        Check `key`, raise 429 when it is over the limit and attach the
+        rate limit headers to the response otherwise.
+        """
         if not redis_client:
             return # Skip if redis is not available
-            
-        client_ip = request.client.host
-        # Use path in key to allow different limits for different routes
-        path = request.url.path
-        key = f"rate_limit:{client_ip}:{path}"
-        
+
         try:
-            current = await redis_client.get(key)
-            
-            if current and int(current) >= self.requests:
-                logger.warning(f"Rate limit exceeded for IP: {client_ip} on path: {path}")
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail={
-                        "error": "Rate limit exceeded",
-                        "limit": self.requests,
-                        "window_seconds": self.window,
-                        "message": "Please try again later."
-                    }
-                )
-            
-            # Use pipeline for atomic increment and expire
-            async with redis_client.pipeline(transaction=True) as pipe:
-                await pipe.incr(key)
-                await pipe.expire(key, self.window)
-                await pipe.execute()
-                
-        except HTTPException:
-            raise
+            decision = await self.hit(key)
         except Exception as e:
             logger.error(f"Rate limiter error: {str(e)}")
-            # In production, you might want to fail open or closed. 
+            # In production, you might want to fail open or closed.
             # We fail open here to not block users if Redis has a hiccup.
             return
 
-# Global rate limit instances for different scenarios
-default_rate_limit = RateLimiter(requests=60, window=60)      # 60 req/min
-strict_rate_limit = RateLimiter(requests=5, window=60)        # 5 req/min (e.g. for login)
-search_rate_limit = RateLimiter(requests=30, window=60)       # 30 req/min (for search)
+        if not decision.allowed:
+            logger.warning(f"Rate limit exceeded for {client or key} ({self.name})")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={
+                    "error": "Rate limit exceeded",
+                    "limit": self.requests,
+                    "window_seconds": self.window,
+                    "message": "Please try again later."
+                },
+                headers=decision.headers,
+            )
+
+        response.headers.update(decision.headers)
+
+    async def __call__(self, request: Request, response: Response):
+        # Ad-hoc per-route usage: keyed on client IP and path.
+        # Application-wide limits are applied by app.core.rate_limit_policy.
+        client_ip = request.client.host
+        key = f"rate_limit:{self.name}:{client_ip}:{request.url.path}"
+        await self.enforce(key, response, client=client_ip)
+
+async def close_rate_limiters():
+    """Flush hybrid-mode counters on shutdown."""
+    for limiter in _limiters:
+        await limiter.close()
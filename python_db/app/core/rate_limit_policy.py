@@ -0,0 +1,172 @@
+"""
+Declarative rate limit policies.
+
+Requests are limited per *identity* (JWT subject, a configured API key or the
+client IP behind trusted proxies), per *route group* and per *tier* (the
+caller's UserRole, or ANONYMOUS). Policies are loaded from the JSON file in
+RATE_LIMIT_POLICY_FILE, or DEFAULT_POLICY when unset:
+
+    {
+        "tiers": {"ANONYMOUS": {"requests": 60, "window": 60}, ...},
+        "groups": {
+            "auth": {
+                "routes": ["POST /api/v1/auth/login/access-token"],
+                "limits": {"*": {"requests": 5, "window": 60}}
+            }
+        },
+        "api_keys": {"<sha256 of key>": "RECRUITER"}
+    }
+
+"tiers" are the limits for any route not in a group. Routes are matched on
+their template (`/api/v1/jobs/{job_id}`), so a client cannot multiply its
+quota across path parameters. The policy is compiled into a single table
+keyed by (method, route template, tier); routes outside any group are
+added to it the first time they are seen, so each request costs one dict
+lookup to find its limiter.
+"""
+import hashlib
+import json
+import logging
+from typing import Dict, Optional, Tuple
+from fastapi import Request, Response
+from app.core.config import settings
+from app.core.rate_limit import RateLimiter
+from app.core.security import request_token_claims
+from app.models.models import UserRole
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS = "ANONYMOUS"
+ALL_TIERS = [ANONYMOUS] + [role.value for role in UserRole]
+
+DEFAULT_POLICY = {
+    "tiers": {
+        ANONYMOUS: {"requests": 60, "window": 60},
+        UserRole.JOB_SEEKER.value: {"requests": 120, "window": 60},
+        UserRole.RECRUITER.value: {"requests": 240, "window": 60},
+        UserRole.ADMIN.value: {"requests": 600, "window": 60},
+    },
+    "groups": {
+        "auth": {
+            "routes": [
+                "POST /api/v1/auth/login/access-token",
+                "POST /api/v1/auth/register",
+            ],
+            "limits": {"*": {"requests": 5, "window": 60}},
+        },
+        "search": {
+            "routes": ["GET /api/v1/jobs/search"],
+            "limits": {
+                ANONYMOUS: {"requests": 30, "window": 60},
+                "*": {"requests": 60, "window": 60},
+            },
+        },
+    },
+    "api_keys": {},
+}
+
+def load_policy() -> dict:
+    """Load the policy file named in settings, falling back to the defaults."""
+    if not settings.RATE_LIMIT_POLICY_FILE:
+        return DEFAULT_POLICY
+    with open(settings.RATE_LIMIT_POLICY_FILE) as f:
+        return json.load(f)
+
+class PolicyRateLimiter:
+    """FastAPI dependency applying the compiled policy to every request."""
+
+    def __init__(self, policy: dict, trusted_proxy_hops: int = 0):
+        self.policy = policy
+        self.trusted_proxy_hops = trusted_proxy_hops
+        self.api_keys: Dict[str, str] = policy.get("api_keys", {})
+        self._limiters: Dict[Tuple[str, int, int], RateLimiter] = {}
+        self._fallback: Dict[str, RateLimiter] = {}
+        self._table = self.compile()
+
+    def _limiter(self, group: str, tier: str, rule: dict) -> RateLimiter:
+        # One limiter (and key namespace) per group/tier/limit combination
+        requests, window = int(rule["requests"]), int(rule["window"])
+        cache_key = (f"{group}:{tier}", requests, window)
+        if cache_key not in self._limiters:
+            self._limiters[cache_key] = RateLimiter(requests=requests, window=window, name=cache_key[0])
+        return self._limiters[cache_key]
+
+    def _tier_rule(self, limits: dict, tier: str) -> dict:
+        return limits.get(tier) or limits.get("*") or limits[ANONYMOUS]
+
+    def compile(self) -> Dict[Tuple[str, str, str], RateLimiter]:
+        """Precompute the limiter for every grouped (method, route template, tier)."""
+        default_limits = self.policy["tiers"]
+        self._fallback = {
+            tier: self._limiter("default", tier, self._tier_rule(default_limits, tier))
+            for tier in ALL_TIERS
+        }
+
+        table = {}
+        for group, spec in self.policy.get("groups", {}).items():
+            for route in spec["routes"]:
+                method, path = route.split(" ", 1)
+                for tier in ALL_TIERS:
+                    table[(method.upper(), path, tier)] = self._limiter(group, tier, self._tier_rule(spec["limits"], tier))
+        return table
+
+    @staticmethod
+    def route_template(request: Request) -> Optional[str]:
+        """Full path template of the matched route, e.g. /api/v1/jobs/{job_id}."""
+        path = request.url.path
+        route = request.scope.get("route")
+        if route is None:
+            return None
+        template = getattr(route, "path_format", route.path)
+        try:
+            concrete = template.format(**request.path_params)
+        except (KeyError, IndexError, ValueError):
+            return template
+        # Routes of included routers may be relative to the router prefix
+        if concrete != path and path.endswith(concrete):
+            return path[: len(path) - len(concrete)] + template
+        return template
+
+    def client_ip(self, request: Request) -> str:
+        if self.trusted_proxy_hops:
+            forwarded = request.headers.get("x-forwarded-for")
+            if forwarded:
+                hops = [hop.strip() for hop in forwarded.split(",")]
+                # Each trusted proxy appends the address it received the request from
+                return hops[max(len(hops) - self.trusted_proxy_hops, 0)]
+        return request.client.host
+
+    def identify(self, request: Request) -> Tuple[str, str]:
+        """Return (identity, tier) for the caller."""
+        api_key = request.headers.get("x-api-key")
+        if api_key:
+            digest = hashlib.sha256(api_key.encode()).hexdigest()
+            tier = self.api_keys.get(digest)
+            # Unknown keys are ignored so they cannot be rotated to mint fresh quotas
+            if tier:
+                return f"key:{digest[:32]}", tier
+
+        authorization = request.headers.get("authorization", "")
+        if authorization[:7].lower() == "bearer ":
+            claims = request_token_claims(request, authorization[7:])
+            if claims:
+                tier = claims.get("role")
+                return f"user:{claims['sub']}", tier if tier in ALL_TIERS else ANONYMOUS
+
+        return f"ip:{self.client_ip(request)}", ANONYMOUS
+
+    async def __call__(self, request: Request, response: Response):
+        identity, tier = self.identify(request)
+        template = self.route_template(request)
+        key = (request.method, template, tier)
+        limiter = self._table.get(key)
+        if limiter is None:
+            limiter = self._fallback[tier]
+            if template is not None:
+                self._table[key] = limiter
+
+        await limiter.enforce(f"rate_limit:{limiter.name}:{identity}", response, client=identity)
+
+policy_rate_limit = PolicyRateLimiter(
+    load_policy(), trusted_proxy_hops=settings.RATE_LIMIT_TRUSTED_PROXY_HOPS
+)
@@ -1,74 +1,120 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any, Union, Optional
 from jose import jwt, JWTError
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.hashing import password_hasher
 from app.db.session import get_db
 from app.repositories.user import user_repo
-from app.models.models import User
+from app.core.user_cache import user_cache
+from app.core.token_cache import verified_tokens, revoked_tokens
+from app.models.models import User, UserRole
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = password_hasher.context
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login/access-token")
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any], expires_delta: timedelta = None, claims: Optional[dict] = None
 ) -> str:
-    """Create JWT access token"""
+    """Create JWT access token (optional extra claims, e.g. the user's role)"""
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(
+        expire = now + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    # jti identifies the token for revocation; iat_ms (iat is whole seconds) for per-user revocation cutoffs
+    to_encode = {
+        **(claims or {}), "exp": expire, "iat": now, "iat_ms": int(now.timestamp() * 1000),
+        "jti": uuid.uuid4().hex, "sub": str(subject)
+    }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
+    """Verify password against hash (blocking; use verify_password_async in handlers)"""
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Hash password"""
+    """Hash password (blocking; use get_password_hash_async in handlers)"""
     return pwd_context.hash(password)
 
-def decode_token(token: str) -> Optional[str]:
-    """Decode JWT token and return user ID"""
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash on the bcrypt thread pool"""
+    return await password_hasher.verify(plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash password on the bcrypt thread pool"""
+    return await password_hasher.hash(password)
+
+def decode_token_claims(token: str) -> Optional[dict]:
+    """Verify a JWT token and return its claims (recently verified tokens are cached)"""
+    payload = verified_tokens.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-        return user_id
     except JWTError:
         return None
+    if payload.get("sub") is None:
+        return None
+    verified_tokens.put(token, payload)
+    return payload
+
+def request_token_claims(request: Request, token: str) -> Optional[dict]:
+    """Verified claims for `token`, decoded at most once per request"""
+    memo = getattr(request.state, "token_claims", None)
+    if memo is not None and memo[0] == token:
+        return memo[1]
+    claims = decode_token_claims(token)
+    request.state.token_claims = (token, claims)
+    return claims
+
+def decode_token(token: str) -> Optional[str]:
+    """Decode JWT token and return user ID"""
+    payload = decode_token_claims(token)
+    if payload is None:
+        return None
+    return payload["sub"]
 
 async def get_current_user(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db, scope="function"),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     """
     Get current authenticated user from JWT token
+    (served from the user cache when possible, memoized for the request)
     """
+    current_user = getattr(request.state, "current_user", None)
+    if current_user is not None:
+        return current_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    user_id = decode_token(token)
-    if user_id is None:
+    claims = request_token_claims(request, token)
+    if claims is None or await revoked_tokens.is_revoked(claims):
         raise credentials_exception
+    user_id = int(claims["sub"])
     
-    user = await user_repo.get(db, id=int(user_id))
+    user = await user_cache.get(db, user_id)
     if user is None:
-        raise credentials_exception
+        user = await user_repo.get(db, id=user_id)
+        if user is None:
+            raise credentials_exception
+        await user_cache.set(user)
     
+    request.state.current_user = user
     return user
 
 async def get_current_active_user(
@@ -83,3 +129,16 @@ async def get_current_active_user(
             detail="Inactive user"
         )
     return current_user
+
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    """
+    Get current user, who must be an admin
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions"
+        )
+    return current_user
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def issued_at(claims: dict) -> float:
+    """
+    Issue time in seconds. `iat` is whole seconds, so tokens carry `iat_ms`
+    as well; without it a token issued during a revocation's second counts
+    as issued before it (revocation fails closed).
+    """
+    if "iat_ms" in claims:
+        return claims["iat_ms"] / 1000
+    return claims.get("iat", 0)
+
+class BloomFilter:
+    """Compact set membership test: no false negatives, tunable false positives."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of token digest -> verified claims.
+
+    Saves the signature check, JSON parse and claims validation for tokens
+    seen recently. Entries are dropped once the token's `exp` has passed.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, dict]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[dict]:
+        if self.maxsize <= 0:
+            return None
+        key = token_digest(token)
+        claims = self._entries.get(key)
+        if claims is None:
+            return None
+        if claims.get("exp", 0) <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def put(self, token: str, claims: dict):
+        if self.maxsize <= 0 or "exp" not in claims:
+            return
+        key = token_digest(token)
+        self._entries[key] = claims
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+class TokenRevocationList:
+    """
+    Revoked tokens (by `jti`) and per-user revocation cutoffs, stored in Redis.
+
+    Each worker keeps a Bloom filter of revoked token IDs and the user
+    cutoffs, and resyncs them when Redis reports a new version (checked at
+    most every `sync_interval` seconds). A request therefore only goes to
+    Redis on a Bloom filter hit, to rule out a false positive. Revocations
+    made on this worker apply immediately; on other workers, after at most
+    one sync interval.
+    """
+
+    TOKENS_KEY = "auth:revoked:tokens"    # zset: jti -> exp
+    USERS_KEY = "auth:revoked:users"      # hash: user_id -> revoke tokens issued before
+    VERSION_KEY = "auth:revoked:version"
+
+    def __init__(self, sync_interval: float, capacity: int):
+        self.sync_interval = sync_interval
+        self.capacity = capacity
+        self._bloom = BloomFilter(capacity)
+        self._user_cutoffs: Dict[str, float] = {}
+        self._version: Optional[str] = None
+        self._last_sync = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _maybe_sync(self):
+        if time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if time.monotonic() - self._last_sync < self.sync_interval:
+                return
+            self._last_sync = time.monotonic()
+            try:
+                version = await redis_client.get(self.VERSION_KEY)
+                if version == self._version:
+                    return
+                now = time.time()
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.zremrangebyscore(self.TOKENS_KEY, "-inf", now)
+                    pipe.zrange(self.TOKENS_KEY, 0, -1)
+                    pipe.hgetall(self.USERS_KEY)
+                    _, jtis, cutoffs = await pipe.execute()
+            except Exception as e:
+                # Keep serving from the last known state
+                logger.error(f"Token revocation sync error: {str(e)}")
+                return
+
+            bloom = BloomFilter(max(self.capacity, len(jtis) * 2))
+            for jti in jtis:
+                bloom.add(jti)
+            # A cutoff older than the token lifetime can no longer match any token
+            horizon = now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+            stale = [user_id for user_id, cutoff in cutoffs.items() if float(cutoff) < horizon]
+            if stale:
+                try:
+                    await redis_client.hdel(self.USERS_KEY, *stale)
+                except Exception as e:
+                    logger.error(f"Token revocation prune error: {str(e)}")
+            self._bloom = bloom
+            self._user_cutoffs = {
+                user_id: float(cutoff) for user_id, cutoff in cutoffs.items() if user_id not in stale
+            }
+            self._version = version
+
+    async def is_revoked(self, claims: dict) -> bool:
+        await self._maybe_sync()
+
+        cutoff = self._user_cutoffs.get(str(claims.get("sub")))
+        if cutoff is not None and issued_at(claims) <= cutoff:
+            return True
+
+        jti = claims.get("jti")
+        if jti is None or jti not in self._bloom:
+            return False
+        try:
+            return await redis_client.zscore(self.TOKENS_KEY, jti) is not None
+        except Exception as e:
+            logger.error(f"Token revocation lookup error: {str(e)}")
+            return True  # a Bloom filter hit is most likely a real revocation
+
+    async def revoke_token(self, claims: dict):
+        """Revoke a single token until it would have expired anyway (logout)."""
+        jti = claims.get("jti")
+        if jti is None:
+            # Tokens issued before jti existed can only be revoked per user
+            return await self.revoke_user(claims["sub"])
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.TOKENS_KEY, {jti: claims["exp"]})
+            pipe.incr(self.VERSION_KEY)
+            await pipe.execute()
+        self._bloom.add(jti)
+
+    async def revoke_user(self, user_id):
+        """Revoke every token issued to `user_id` so far (forced logout)."""
+        cutoff = time.time()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.USERS_KEY, str(user_id), cutoff)
+            pipe.incr(self.VERSION_KEY)
+            await pipe.execute()
+        self._user_cutoffs[str(user_id)] = cutoff
+
+verified_tokens = VerifiedTokenCache(maxsize=settings.TOKEN_CACHE_SIZE)
+revoked_tokens = TokenRevocationList(
+    sync_interval=settings.TOKEN_REVOCATION_SYNC_SECONDS,
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+)
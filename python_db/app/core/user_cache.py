@@ -0,0 +1,81 @@
+import enum
+import logging
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, Enum
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.core.config import settings
+from app.core.redis import redis_cache
+from app.models.models import User
+
+logger = logging.getLogger(__name__)
+
+class UserCache:
+    """
+    Short-TTL cache of authenticated users, keyed by user ID.
+
+    Stores a column snapshot in Redis so every worker sees invalidations.
+    Cached users are re-attached to the request's session with
+    `merge(load=False)`, which makes them persistent without a SELECT, so
+    handlers can update them as if they had been loaded from the database.
+    """
+
+    COLUMNS = ("id", "email", "role", "is_active", "created_at", "updated_at", "is_deleted")
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        # Only what authorization needs: password_hash never leaves the database
+        # and stays unloaded on cached users (authentication reads it via user_repo)
+        self.columns = [User.__table__.c[name] for name in self.COLUMNS]
+
+    def _key(self, user_id: int) -> str:
+        return f"user:principal:{user_id}"
+
+    def _dump(self, user: User) -> dict:
+        data = {}
+        for column in self.columns:
+            value = getattr(user, column.key)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, enum.Enum):
+                value = value.value
+            data[column.key] = value
+        return data
+
+    def _load(self, data: dict) -> User:
+        values = {}
+        for column in self.columns:
+            value = data.get(column.key)
+            if value is not None:
+                if isinstance(column.type, DateTime):
+                    value = datetime.fromisoformat(value)
+                elif isinstance(column.type, Enum):
+                    value = column.type.enum_class(value)
+            values[column.key] = value
+        return User(**values)
+
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """Return the cached user attached to `db`, or None on a miss"""
+        if self.ttl <= 0:
+            return None
+        data = await redis_cache.get(self._key(user_id), is_json=True)
+        if not data:
+            return None
+        try:
+            user = self._load(data)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cached user {user_id}: {e}")
+            await self.invalidate(user_id)
+            return None
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    async def set(self, user: User) -> None:
+        if self.ttl > 0:
+            await redis_cache.set(self._key(user.id), self._dump(user), expire=self.ttl)
+
+    async def invalidate(self, user_id: int) -> None:
+        await redis_cache.delete(self._key(user_id))
+
+user_cache = UserCache(ttl=settings.USER_CACHE_TTL_SECONDS)
@@ -0,0 +1,353 @@
+"""
+Index advisor: proposes missing and redundant indexes for the tables in
+app.models.models from a captured query workload.
+
+The workload comes from the statement sampler in app/db/workload.py (Redis)
+or from a JSON-lines file of {"statement", "parameters", "count"} records,
+e.g. one written earlier with --export.
+
+1. The model tables are copied into a scratch database (CREATE TABLE ... LIKE,
+   so indexes and partitioning match) with up to --sample-rows rows each.
+2. Each captured SELECT is EXPLAINed there for a baseline cost.
+3. Candidate indexes are derived from the columns each query filters on
+   (equalities first, then one range or ORDER BY column). Each candidate is
+   created, the affected queries are re-EXPLAINed and the index is dropped.
+   Benefit = sum over queries of count * (baseline cost - cost with index).
+4. Existing indexes that are a left prefix of another index, or that no
+   captured query used, are reported as redundant or unused.
+
+    python -m app.db.index_advisor [--file workload.jsonl] [--sample-rows 50000]
+
+Costs are MySQL optimizer estimates on the sampled copy: they rank
+proposals, they are not latency predictions.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from app.core.config import settings
+from app.db.base_class import Base
+from app.models import models  # noqa: F401 (populate Base.metadata)
+
+logger = logging.getLogger(__name__)
+
+_VALUE = r"(?:%s|%\(\w+\)s|\?|'[^']*'|-?\d+(?:\.\d+)?)"
+_EQUALITY = re.compile(rf"\b(\w+)\.(\w+)\s*(?:=\s*{_VALUE}|IS\s+NULL\b|IN\s*\()", re.IGNORECASE)
+_JOIN = re.compile(r"\b(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)\b")
+_RANGE = re.compile(rf"\b(\w+)\.(\w+)\s*(?:>=|<=|<|>|BETWEEN\b)\s*{_VALUE}", re.IGNORECASE)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+_COLUMN = re.compile(r"(\w+)\.(\w+)")
+_KEYWORDS = ("WHERE", "ON", "SET", "INNER", "LEFT", "RIGHT", "OUTER", "JOIN", "ORDER", "GROUP", "LIMIT", "FOR", "USING")
+_TABLE_REF = re.compile(
+    rf"\b(?:FROM|JOIN|UPDATE)\s+`?(\w+)`?(?:\s+(?:AS\s+)?(?!(?:{'|'.join(_KEYWORDS)})\b)`?(\w+)`?)?",
+    re.IGNORECASE,
+)
+
+Candidate = Tuple[str, Tuple[str, ...]]  # (table, columns)
+
+def model_tables() -> Dict[str, set]:
+    return {name: {c.name for c in table.columns} for name, table in Base.metadata.tables.items()}
+
+def _primary_key(table: Optional[str]) -> set:
+    if table not in Base.metadata.tables:
+        return set()
+    return {c.name for c in Base.metadata.tables[table].primary_key}
+
+def table_aliases(statement: str, tables: Dict[str, set]) -> Dict[str, str]:
+    """Alias (or table name) -> model table, for the tables a statement reads"""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(statement):
+        if table in tables:
+            aliases[table] = table
+            if alias:
+                aliases[alias] = table
+    return aliases
+
+def predicate_columns(statement: str, tables: Dict[str, set]) -> Dict[str, dict]:
+    """Per table: equality, range and ORDER BY columns, in order of appearance"""
+    aliases = table_aliases(statement, tables)
+    found: Dict[str, dict] = defaultdict(lambda: {"eq": [], "range": [], "order": []})
+
+    def add(kind: str, alias: str, column: str):
+        table = aliases.get(alias)
+        if table is not None and column in tables[table] and column not in found[table][kind]:
+            found[table][kind].append(column)
+
+    where = re.split(r"\bORDER\s+BY\b", statement, flags=re.IGNORECASE)[0]
+    for alias, column in _EQUALITY.findall(where):
+        add("eq", alias, column)
+    for left_alias, left, right_alias, right in _JOIN.findall(where):
+        # Either side can be the inner table of the join (primary keys are indexed already)
+        for alias, column in ((left_alias, left), (right_alias, right)):
+            if column not in _primary_key(aliases.get(alias)):
+                add("eq", alias, column)
+    for alias, column in _RANGE.findall(where):
+        add("range", alias, column)
+    order = _ORDER_BY.search(statement)
+    if order:
+        for alias, column in _COLUMN.findall(order.group(1)):
+            add("order", alias, column)
+    return dict(found)
+
+def candidates_for(statement: str, tables: Dict[str, set]) -> List[Candidate]:
+    candidates = []
+    for table, cols in predicate_columns(statement, tables).items():
+        eq = tuple(cols["eq"])
+        options = []
+        if eq:
+            options.append(eq)
+        if cols["range"]:
+            options.append(eq + (cols["range"][0],))
+        elif cols["order"]:
+            options.append(eq + tuple(c for c in cols["order"] if c not in eq))
+        for columns in options:
+            if columns and (table, columns) not in candidates:
+                candidates.append((table, columns))
+    return candidates
+
+def is_served(columns: Sequence[str], existing: Sequence[Sequence[str]]) -> bool:
+    """True if an existing index starts with exactly these columns"""
+    return any(tuple(index[:len(columns)]) == tuple(columns) for index in existing)
+
+def redundant_indexes(indexes: Dict[str, Dict[str, dict]]) -> List[dict]:
+    """
+    Non-unique indexes whose columns are a left prefix of (or equal to)
+    another index on the same table: the longer index serves every lookup
+    the shorter one does, including backing a foreign key.
+    """
+    findings = []
+    for table, by_name in indexes.items():
+        for name, index in by_name.items():
+            if index["unique"]:
+                continue
+            for other_name, other in by_name.items():
+                if other_name == name or len(other["columns"]) < len(index["columns"]):
+                    continue
+                if other["columns"][:len(index["columns"])] != index["columns"]:
+                    continue
+                if other["columns"] == index["columns"] and not other["unique"] and other_name > name:
+                    continue  # exact duplicates: report only one of the pair
+                findings.append({
+                    "table": table,
+                    "index": name,
+                    "columns": index["columns"],
+                    "covered_by": other_name,
+                    "ddl": f"DROP INDEX `{name}` ON `{table}`",
+                })
+                break
+    return findings
+
+def _plan_cost(plan: dict) -> float:
+    cost = plan.get("query_block", {}).get("cost_info", {}).get("query_cost")
+    return float(cost) if cost is not None else 0.0
+
+def _plan_keys(node, keys: set):
+    """Collect (table, index) pairs used anywhere in an EXPLAIN FORMAT=JSON plan"""
+    if isinstance(node, dict):
+        if "table_name" in node and node.get("key"):
+            keys.add((node["table_name"], node["key"]))
+        for value in node.values():
+            _plan_keys(value, keys)
+    elif isinstance(node, list):
+        for value in node:
+            _plan_keys(value, keys)
+
+def _params(parameters):
+    if parameters is None:
+        return ()
+    return tuple(parameters) if isinstance(parameters, list) else parameters
+
+class IndexAdvisor:
+    def __init__(self, source_db: str, scratch_db: str, sample_rows: int, min_gain: float):
+        self.source_db = source_db
+        self.scratch_db = scratch_db
+        self.sample_rows = sample_rows
+        self.min_gain = min_gain
+        self.tables = model_tables()
+        server_url = settings.ASYNC_DATABASE_URL.rsplit("/", 1)[0]
+        self.engine = create_async_engine(f"{server_url}/{scratch_db}", pool_size=1, max_overflow=0)
+        self.server = create_async_engine(server_url, pool_size=1, max_overflow=0)
+
+    async def _existing_indexes(self, conn: AsyncConnection, schema: str) -> Dict[str, Dict[str, dict]]:
+        result = await conn.execute(
+            text(
+                "SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME, NON_UNIQUE "
+                "FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = :schema "
+                "ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX"
+            ),
+            {"schema": schema},
+        )
+        indexes: Dict[str, Dict[str, dict]] = defaultdict(dict)
+        for table, name, column, non_unique in result:
+            if table not in self.tables:
+                continue
+            index = indexes[table].setdefault(name, {"columns": [], "unique": not non_unique})
+            index["columns"].append(column)
+        return indexes
+
+    async def _copy_schema(self):
+        async with self.server.begin() as conn:
+            await conn.execute(text(f"DROP DATABASE IF EXISTS `{self.scratch_db}`"))
+            await conn.execute(text(f"CREATE DATABASE `{self.scratch_db}`"))
+            for table in self.tables:
+                await conn.execute(text(f"CREATE TABLE `{self.scratch_db}`.`{table}` LIKE `{self.source_db}`.`{table}`"))
+                if self.sample_rows > 0:
+                    await conn.execute(text(
+                        f"INSERT INTO `{self.scratch_db}`.`{table}` "
+                        f"SELECT * FROM `{self.source_db}`.`{table}` LIMIT {int(self.sample_rows)}"
+                    ))
+                await conn.execute(text(f"ANALYZE TABLE `{self.scratch_db}`.`{table}`"))
+
+    async def _explain(self, conn: AsyncConnection, query: dict) -> Optional[dict]:
+        try:
+            result = await conn.exec_driver_sql(f"EXPLAIN FORMAT=JSON {query['statement']}", _params(query["parameters"]))
+            return json.loads(result.scalar())
+        except Exception as e:
+            logger.warning(f"Cannot EXPLAIN {query['fingerprint'][:120]}: {str(e)}")
+            return None
+
+    async def advise(self, workload: List[dict]) -> dict:
+        queries = [
+            q for q in workload
+            if q.get("statement") and q["statement"].lstrip()[:6].upper() == "SELECT"
+            and table_aliases(q["statement"], self.tables)
+        ]
+        await self._copy_schema()
+        try:
+            async with self.engine.connect() as conn:
+                existing = await self._existing_indexes(conn, self.scratch_db)
+                used_keys = set()
+                for query in queries:
+                    plan = await self._explain(conn, query)
+                    query["cost"] = _plan_cost(plan) if plan else None
+                    if plan:
+                        _plan_keys(plan, used_keys)
+                queries = [q for q in queries if q["cost"] is not None]
+
+                # Candidate -> the queries that might benefit from it
+                affected: Dict[Candidate, List[dict]] = defaultdict(list)
+                for query in queries:
+                    for table, columns in candidates_for(query["statement"], self.tables):
+                        if not is_served(columns, [i["columns"] for i in existing.get(table, {}).values()]):
+                            affected[(table, columns)].append(query)
+
+                proposals = []
+                for (table, columns), related in affected.items():
+                    proposals.append(await self._evaluate(conn, table, columns, related))
+        finally:
+            async with self.server.begin() as conn:
+                await conn.execute(text(f"DROP DATABASE IF EXISTS `{self.scratch_db}`"))
+            await self.engine.dispose()
+            await self.server.dispose()
+
+        proposals = sorted((p for p in proposals if p["gain"] >= self.min_gain), key=lambda p: p["benefit"], reverse=True)
+        touched = {t for q in queries for t in table_aliases(q["statement"], self.tables).values()}
+        unused = [
+            {"table": table, "index": name, "columns": index["columns"]}
+            for table, by_name in existing.items() if table in touched
+            for name, index in by_name.items()
+            if name != "PRIMARY" and not index["unique"] and (table, name) not in used_keys
+        ]
+        return {
+            "queries": len(queries),
+            "missing": proposals,
+            "redundant": redundant_indexes(existing),
+            "unused": unused,
+        }
+
+    async def _evaluate(self, conn: AsyncConnection, table: str, columns: Tuple[str, ...], related: List[dict]) -> dict:
+        name = f"ix_{table}_{'_'.join(columns)}"[:64]
+        cols = ", ".join(f"`{c}`" for c in columns)
+        await conn.execute(text(f"CREATE INDEX `{name}` ON `{table}` ({cols})"))
+        await conn.execute(text(f"ANALYZE TABLE `{table}`"))
+        try:
+            benefit = 0.0
+            baseline = 0.0
+            improved = []
+            for query in related:
+                plan = await self._explain(conn, query)
+                if plan is None:
+                    continue
+                saved = max(0.0, query["cost"] - _plan_cost(plan))
+                benefit += saved * query["count"]
+                baseline += query["cost"] * query["count"]
+                if saved > 0:
+                    improved.append({"fingerprint": query["fingerprint"], "count": query["count"],
+                                     "cost_before": query["cost"], "cost_after": round(query["cost"] - saved, 2)})
+        finally:
+            await conn.execute(text(f"DROP INDEX `{name}` ON `{table}`"))
+        return {
+            "table": table,
+            "columns": list(columns),
+            "benefit": round(benefit, 2),
+            "gain": round(benefit / baseline, 3) if baseline else 0.0,
+            "queries": improved,
+            "ddl": f"CREATE INDEX `{name}` ON `{table}` ({cols})",
+            "model": f'Index("{name}", {", ".join(repr(c) for c in columns)})',
+        }
+
+def load_file(path: str) -> List[dict]:
+    from app.db.query_stats import fingerprint
+    workload = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                record.setdefault("fingerprint", fingerprint(record["statement"]))
+                record.setdefault("count", 1)
+                workload.append(record)
+    return workload
+
+def _print_report(report: dict):
+    print(f"Replayed {report['queries']} captured SELECT fingerprints\n")
+    print("Missing indexes (estimated benefit = sum of count * optimizer cost saved):")
+    for p in report["missing"] or []:
+        print(f"  {p['ddl']}  benefit={p['benefit']} gain={p['gain']:.0%}")
+        print(f"    models.py: {p['model']}")
+        for q in p["queries"]:
+            print(f"    x{q['count']} {q['cost_before']} -> {q['cost_after']}: {q['fingerprint'][:140]}")
+    if not report["missing"]:
+        print("  none")
+    print("\nRedundant indexes (left prefix of another index):")
+    for r in report["redundant"] or []:
+        print(f"  {r['ddl']}  -- {r['columns']} covered by {r['covered_by']}")
+    if not report["redundant"]:
+        print("  none")
+    print("\nIndexes no captured query used (check before dropping; the workload may be partial):")
+    for u in report["unused"] or []:
+        print(f"  {u['table']}.{u['index']} {u['columns']}")
+    if not report["unused"]:
+        print("  none")
+
+async def main(args):
+    from app.db.workload import workload_recorder
+    # The advisor's own statements are not part of the workload
+    workload_recorder.sample_rate = 0
+    workload = load_file(args.file) if args.file else await workload_recorder.load()
+    if args.export:
+        with open(args.export, "w", encoding="utf-8") as f:
+            for record in workload:
+                f.write(json.dumps(record, default=str) + "\n")
+        print(f"Exported {len(workload)} fingerprints to {args.export}")
+        return
+    advisor = IndexAdvisor(settings.MYSQL_DB, args.scratch_db, args.sample_rows, args.min_gain)
+    report = await advisor.advise(workload)
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        _print_report(report)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="JSON-lines workload instead of the one captured in Redis")
+    parser.add_argument("--export", help="Write the captured workload to this JSON-lines file and exit")
+    parser.add_argument("--sample-rows", type=int, default=50000, help="Rows copied per table (0 = schema only)")
+    parser.add_argument("--min-gain", type=float, default=0.1, help="Smallest share of the affected cost to report")
+    parser.add_argument("--scratch-db", default=f"{settings.MYSQL_DB}_advisor")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    asyncio.run(main(parser.parse_args()))
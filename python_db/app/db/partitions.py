@@ -0,0 +1,190 @@
+"""
+Partition maintenance for activity_logs (monthly RANGE partitions on
+TO_DAYS(created_at), named pYYYYMM, plus a catch-all pmax).
+
+- ensure_future() splits pmax so that partitions exist for the next
+  `months_ahead` months, keeping new rows out of pmax.
+- archive_expired() exports every month older than `retention_months` to a
+  gzipped JSON-lines file in `archive_dir` and then drops the partition,
+  which is instant compared with a DELETE of the same rows.
+
+Runs periodically inside the API (ACTIVITY_LOG_MAINTENANCE_HOURS,
+one worker at a time via a Redis lock) or on demand:
+
+    python -m app.db.partitions
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+TABLE = "activity_logs"
+COLUMNS = ["id", "created_at", "updated_at", "is_deleted", "user_id", "action", "entity_type", "entity_id"]
+_MONTHLY = re.compile(r"^p(\d{4})(\d{2})$")
+
+def add_months(month: date, count: int) -> date:
+    years, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, index + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+def partition_month(name: str) -> Optional[date]:
+    match = _MONTHLY.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value)}")
+
+class ActivityLogPartitions:
+    LOCK_KEY = "activity_logs:maintenance:lock"
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        archive_dir: str,
+        retention_months: int,
+        months_ahead: int,
+        chunk_size: int = 5000,
+    ):
+        self.engine = engine
+        self.archive_dir = archive_dir
+        self.retention_months = retention_months
+        self.months_ahead = months_ahead
+        self.chunk_size = chunk_size
+
+    async def partitions(self) -> List[dict]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                text(
+                    "SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS upper_bound, "
+                    "TABLE_ROWS AS approx_rows "
+                    "FROM information_schema.PARTITIONS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+                    "AND PARTITION_NAME IS NOT NULL "
+                    "ORDER BY PARTITION_ORDINAL_POSITION"
+                ),
+                {"table": TABLE},
+            )
+            return [dict(row) for row in result.mappings()]
+
+    async def ensure_future(self, today: Optional[date] = None) -> List[str]:
+        """Create monthly partitions up to `months_ahead` months from now."""
+        current = (today or date.today()).replace(day=1)
+        months = [partition_month(p["name"]) for p in await self.partitions()]
+        months = [m for m in months if m is not None]
+        if not months:
+            logger.warning(f"{TABLE} is not partitioned; run the Alembic migrations first")
+            return []
+
+        wanted = []
+        month = add_months(max(months), 1)
+        while month <= add_months(current, self.months_ahead):
+            wanted.append(month)
+            month = add_months(month, 1)
+        if not wanted:
+            return []
+
+        clauses = [
+            f"PARTITION {partition_name(m)} VALUES LESS THAN (TO_DAYS('{add_months(m, 1):%Y-%m-%d}'))"
+            for m in wanted
+        ]
+        clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+        async with self.engine.begin() as conn:
+            await conn.execute(text(f"ALTER TABLE {TABLE} REORGANIZE PARTITION pmax INTO ({', '.join(clauses)})"))
+        created = [partition_name(m) for m in wanted]
+        logger.info(f"Created {TABLE} partitions: {', '.join(created)}")
+        return created
+
+    async def _export(self, name: str) -> int:
+        """Write one partition to <archive_dir>/<table>_<name>.jsonl.gz; returns the row count."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{TABLE}_{name}.jsonl.gz")
+        tmp_path = f"{path}.tmp"
+        exported = 0
+        last_id = 0
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as archive:
+            async with self.engine.connect() as conn:
+                while True:
+                    # PARTITION (...) reads only this month; keyset paging keeps each chunk cheap
+                    result = await conn.execute(
+                        text(
+                            f"SELECT {', '.join(COLUMNS)} FROM {TABLE} PARTITION ({name}) "
+                            "WHERE id > :last_id ORDER BY id LIMIT :limit"
+                        ),
+                        {"last_id": last_id, "limit": self.chunk_size},
+                    )
+                    rows = [dict(row) for row in result.mappings()]
+                    if not rows:
+                        break
+                    lines = "".join(json.dumps(row, default=_json_default) + "\n" for row in rows)
+                    await asyncio.to_thread(archive.write, lines)
+                    exported += len(rows)
+                    last_id = rows[-1]["id"]
+                expected = (
+                    await conn.execute(text(f"SELECT COUNT(*) FROM {TABLE} PARTITION ({name})"))
+                ).scalar()
+        if exported != expected:
+            os.remove(tmp_path)
+            raise RuntimeError(f"Archive of {name} incomplete ({exported} of {expected} rows)")
+        os.replace(tmp_path, path)
+        return exported
+
+    async def archive_expired(self, today: Optional[date] = None) -> List[str]:
+        """Archive and drop partitions older than the retention period."""
+        cutoff = add_months((today or date.today()).replace(day=1), -self.retention_months)
+        archived = []
+        for partition in await self.partitions():
+            month = partition_month(partition["name"])
+            if month is None or month >= cutoff:
+                continue
+            rows = await self._export(partition["name"])
+            async with self.engine.begin() as conn:
+                await conn.execute(text(f"ALTER TABLE {TABLE} DROP PARTITION {partition['name']}"))
+            logger.info(f"Archived {TABLE} partition {partition['name']} ({rows} rows) to {self.archive_dir}")
+            archived.append(partition["name"])
+        return archived
+
+    async def run(self) -> dict:
+        """One maintenance pass; skipped if another worker holds the lock."""
+        if not await redis_client.set(self.LOCK_KEY, os.getpid(), nx=True, ex=3600):
+            return {"skipped": True}
+        try:
+            return {
+                "created": await self.ensure_future(),
+                "archived": await self.archive_expired(),
+            }
+        finally:
+            await redis_client.delete(self.LOCK_KEY)
+
+    async def run_forever(self, interval: float):
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f"{TABLE} partition maintenance failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+def get_partition_manager() -> ActivityLogPartitions:
+    from app.db.session import engine
+    return ActivityLogPartitions(
+        engine,
+        archive_dir=settings.ACTIVITY_LOG_ARCHIVE_DIR,
+        retention_months=settings.ACTIVITY_LOG_RETENTION_MONTHS,
+        months_ahead=settings.ACTIVITY_LOG_PARTITIONS_AHEAD,
+    )
+
+if __name__ == "__main__":
+    print(asyncio.run(get_partition_manager().run()))
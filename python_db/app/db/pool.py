@@ -0,0 +1,82 @@
+import logging
+import time
+from collections import deque
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records how long checkouts wait for a
+    connection, how often it has to open overflow connections and how often
+    checkouts time out. Everything runs on the event loop thread, so plain
+    counters are enough.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=1000)
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            logger.warning(
+                f"Connection pool exhausted ({self.checkedout()} checked out), checkout timed out"
+            )
+            raise
+        wait = time.perf_counter() - start
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent_waits.append(wait)
+        return connection
+
+    def _inc_overflow(self) -> bool:
+        created = super()._inc_overflow()
+        # _overflow starts at -pool_size; above zero means beyond the core pool
+        if created and self._overflow > 0:
+            self.overflow_events += 1
+        return created
+
+    def recreate(self):
+        # Used when the engine is disposed; keep the counters across it
+        pool = super().recreate()
+        for attr in ("checkouts", "overflow_events", "timeouts", "total_wait", "max_wait", "recent_waits"):
+            setattr(pool, attr, getattr(self, attr))
+        return pool
+
+    def stats(self) -> dict:
+        waits = sorted(self.recent_waits)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(int(len(waits) * p), len(waits) - 1)] * 1000, 2)
+
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            "recycle": self._recycle,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": self.checkouts,
+            "overflow_events": self.overflow_events,
+            "timeouts": self.timeouts,
+            "wait_ms": {
+                "avg": round(self.total_wait / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(self.max_wait * 1000, 2),
+            },
+        }
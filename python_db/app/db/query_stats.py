@@ -0,0 +1,89 @@
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Statement with literals and parameters replaced by `?`, so that the same
+    query shape always maps to the same string, whatever its arguments or
+    IN-list length.
+    """
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    return _IN_LIST.sub("IN (...)", normalized)
+
+class QueryStats:
+    """Statements executed while handling one request, grouped by fingerprint."""
+
+    def __init__(self, route: Optional[str] = None):
+        self.route = route
+        self.count = 0
+        self.total_seconds = 0.0
+        # Keyed by raw statement; fingerprinting is deferred until reporting
+        self.by_statement: Dict[str, List] = {}  # statement -> [count, seconds]
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        entry = self.by_statement.get(statement)
+        if entry is None:
+            self.by_statement[statement] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def grouped(self) -> Dict[str, Tuple[int, float]]:
+        groups: Dict[str, List] = {}
+        for statement, (count, seconds) in self.by_statement.items():
+            group = groups.setdefault(fingerprint(statement), [0, 0.0])
+            group[0] += count
+            group[1] += seconds
+        return {fp: (count, seconds) for fp, (count, seconds) in groups.items()}
+
+    def repeats(self, threshold: int) -> List[Tuple[str, int, float]]:
+        """Fingerprints executed more than `threshold` times (likely N+1 loops)"""
+        return sorted(
+            ((fp, count, seconds) for fp, (count, seconds) in self.grouped().items() if count > threshold),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def start_request_stats(route: Optional[str] = None) -> QueryStats:
+    """Collect statements run in the current context (and tasks it spawns)"""
+    stats = QueryStats(route)
+    _current.set(stats)
+    return stats
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+def stop_stats():
+    """Stop collecting in the current context (e.g. for diagnostic side queries)"""
+    _current.set(None)
+
+# Registered on the Engine class, so the primary and every replica are covered
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"]
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+from sqlalchemy import Select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to `info["reader"]` (a replica or the
+    primary's autocommit reader engine) when one is set.
+
+    Flushes, DML, SELECT ... FOR UPDATE and raw connections always go to
+    the primary. The first write also pins the rest of the session to the
+    primary, so a request reads back what it just wrote; `info["wrote"]`
+    records that it happened.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        reader: Optional[AsyncEngine] = self.info.get("reader")
+        is_read = isinstance(clause, Select) and clause._for_update_arg is None
+        if is_read and not self._flushing:
+            if reader is not None:
+                return reader.sync_engine
+        elif self._flushing or clause is not None:
+            self.info["wrote"] = True
+            self.info["reader"] = None
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+class _ReplicaState:
+    def __init__(self):
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+class ReplicaSet:
+    """
+    Read replicas, picked round-robin among those whose replication lag is
+    within `max_lag` seconds. Lag is re-checked at most every
+    `check_interval` seconds per replica; when none qualifies, reads fall
+    back to the primary.
+
+    Also tracks a short per-identity "sticky" window after a mutation during
+    which that caller's reads go to the primary, so users see their own
+    writes even while replicas are catching up.
+    """
+
+    def __init__(
+        self,
+        engines: List[AsyncEngine],
+        max_lag: float,
+        check_interval: float,
+        sticky_seconds: int,
+    ):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        self._states = [_ReplicaState() for _ in engines]
+        self._next = 0
+
+    async def _measure_lag(self, engine: AsyncEngine) -> Optional[float]:
+        async with engine.connect() as conn:
+            try:
+                row = (await conn.execute(text("SHOW REPLICA STATUS"))).mappings().first()
+            except DBAPIError:
+                # MySQL before 8.0.22
+                row = (await conn.execute(text("SHOW SLAVE STATUS"))).mappings().first()
+        if row is None:
+            # Not replicating itself (e.g. a managed reader endpoint): treat as current
+            return 0.0
+        lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+        # NULL means replication is stopped or broken
+        return None if lag is None else float(lag)
+
+    async def _refresh(self, index: int) -> _ReplicaState:
+        state = self._states[index]
+        if state.checked_at is not None and time.monotonic() - state.checked_at < self.check_interval:
+            return state
+        async with state.lock:
+            if state.checked_at is not None and time.monotonic() - state.checked_at < self.check_interval:
+                return state
+            try:
+                state.lag = await self._measure_lag(self.engines[index])
+            except Exception as e:
+                logger.warning(f"Replica {self.engines[index].url.host} unavailable: {str(e)}")
+                state.lag = None
+            was_healthy = state.healthy
+            state.healthy = state.lag is not None and state.lag <= self.max_lag
+            state.checked_at = time.monotonic()
+            if was_healthy and not state.healthy:
+                logger.warning(
+                    f"Replica {self.engines[index].url.host} taken out of rotation (lag={state.lag})"
+                )
+        return state
+
+    async def pick(self) -> Optional[AsyncEngine]:
+        """A healthy replica, or None to read from the primary"""
+        count = len(self.engines)
+        for offset in range(count):
+            index = (self._next + offset) % count
+            if (await self._refresh(index)).healthy:
+                self._next = index + 1
+                return self.engines[index]
+        return None
+
+    def _sticky_key(self, identity: str) -> str:
+        return f"db:sticky:{identity}"
+
+    async def stick(self, identity: str):
+        """Route `identity`'s reads to the primary for the next few seconds"""
+        try:
+            await redis_client.set(self._sticky_key(identity), 1, ex=self.sticky_seconds)
+        except Exception as e:
+            logger.error(f"Read-your-writes marker error: {str(e)}")
+
+    async def is_sticky(self, identity: str) -> bool:
+        try:
+            return bool(await redis_client.exists(self._sticky_key(identity)))
+        except Exception as e:
+            # Without the marker we cannot rule out a stale read
+            logger.error(f"Read-your-writes lookup error: {str(e)}")
+            return True
+
+    def stats(self) -> list:
+        return [
+            {
+                "host": engine.url.host,
+                "healthy": state.healthy,
+                "lag_seconds": state.lag,
+                "pool": engine.pool.stats(),
+            }
+            for engine, state in zip(self.engines, self._states)
+        ]
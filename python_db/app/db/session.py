@@ -1,23 +1,109 @@
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from app.core.config import settings
+from app.db import query_stats, slow_queries, workload  # noqa: F401 (register the statement hooks)
+from app.db.pool import InstrumentedQueuePool
+from app.db.routing import ReplicaSet, RoutingSession
 
-engine = create_async_engine(
+def _create_engine(url: str, **kwargs):
+    options = dict(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        echo=settings.DB_ECHO,
+    )
+    options.update(kwargs)
+    return create_async_engine(url, **options)
+
+# Read-only engines run in autocommit mode, so there is no transaction to
+# COMMIT or ROLLBACK when their connections go back to the pool
+READER_OPTIONS = {"isolation_level": "AUTOCOMMIT", "skip_autocommit_rollback": True}
+
+engine = _create_engine(settings.ASYNC_DATABASE_URL)
+
+read_engine = _create_engine(
     settings.ASYNC_DATABASE_URL,
-    pool_pre_ping=True,
-    echo=True, # Set to False in production
+    pool_size=settings.DB_READ_POOL_SIZE,
+    max_overflow=settings.DB_READ_MAX_OVERFLOW,
+    **READER_OPTIONS,
+)
+
+replicas = ReplicaSet(
+    [_create_engine(url, **READER_OPTIONS) for url in settings.ASYNC_REPLICA_DATABASE_URLS],
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_LAG_CHECK_SECONDS,
+    sticky_seconds=settings.DB_STICKY_PRIMARY_SECONDS,
 )
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
 )
 
-async def get_db():
+def request_identity(request: Request) -> str:
+    """Who a read-your-writes window belongs to: the token subject, else the client IP"""
+    from app.core.security import request_token_claims
+    authorization = request.headers.get("authorization", "")
+    if authorization[:7].lower() == "bearer ":
+        claims = request_token_claims(request, authorization[7:])
+        if claims:
+            return f"user:{claims['sub']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def has_writes(session: AsyncSession) -> bool:
+    """Whether the session wrote (or still holds unflushed changes) and needs a COMMIT"""
+    return bool(session.info.get("wrote") or session.new or session.dirty or session.deleted)
+
+def after_commit(session: AsyncSession, callback):
+    """
+    Have get_db await `callback()` once the request's transaction is
+    committed (or, for a request that wrote nothing, once it ends). It is
+    not called when the request fails and is rolled back.
+    """
+    session.info.setdefault("after_commit", []).append(callback)
+
+# Endpoints declare these with Depends(..., scope="function"), so the session
+# is closed and its connection returned as soon as the endpoint returns,
+# before the response is serialized and sent. A connection is only checked
+# out when the first statement runs, so handlers that answer from Redis
+# never touch the pool.
+
+async def get_db(request: Request):
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()
+            # Pure reads end with the connection's return to the pool instead
+            if has_writes(session):
+                await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+        if replicas.engines and session.info.get("wrote"):
+            await replicas.stick(request_identity(request))
+        for callback in session.info.get("after_commit", ()):
+            await callback()
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only endpoints: SELECTs go to a replica that is within
+    the lag limit, unless the caller wrote something in the last few seconds,
+    and otherwise to the primary's autocommit reader.
+    """
+    reader = None
+    if replicas.engines and not await replicas.is_sticky(request_identity(request)):
+        reader = await replicas.pick()
+    async with AsyncSessionLocal(info={"reader": reader or read_engine}) as session:
+        try:
+            yield session
+            if has_writes(session):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from app.core.config import settings
+from app.db.query_stats import current_stats, fingerprint, stop_stats
+
+logger = logging.getLogger(__name__)
+
+class SlowQueryLog:
+    """
+    Logs statements slower than `threshold_ms` and aggregates them by
+    fingerprint into a rolling table (entries unseen for `window` seconds
+    are dropped, at most `capacity` are kept).
+
+    A sample of slow SELECTs (`explain_rate`) is EXPLAINed on a separate
+    one-connection engine, at most once per fingerprint per `window`, so
+    the capture never competes with request traffic for pool slots.
+
+    Parameters are logged and kept for SELECTs only: those of writes carry
+    user data (emails, password hashes).
+    """
+
+    def __init__(self, threshold_ms: int, explain_rate: float, top_n: int, window: int):
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self.top_n = top_n
+        self.window = window
+        self.capacity = top_n * 4
+        self._entries: Dict[str, dict] = {}
+        self._explain_engine: Optional[AsyncEngine] = None
+        self._explaining = False
+
+    def observe(self, conn, statement: str, parameters, seconds: float):
+        elapsed_ms = seconds * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+        if self._explain_engine is not None and conn.engine is self._explain_engine.sync_engine:
+            return
+
+        stats = current_stats()
+        route = stats.route if stats is not None else None
+        is_select = statement.lstrip()[:6].upper() == "SELECT"
+        params = repr(parameters)[:500] if is_select else "<redacted>"
+        logger.warning(
+            f"Slow query ({elapsed_ms:.1f}ms) route={route or '-'}: "
+            f"{' '.join(statement.split())[:1000]} params={params}"
+        )
+
+        fp = fingerprint(statement)
+        now = time.time()
+        entry = self._entries.get(fp)
+        if entry is None:
+            if len(self._entries) >= self.capacity:
+                self._evict(now)
+            entry = self._entries[fp] = {
+                "fingerprint": fp,
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "routes": {},
+                "explain": None,
+                "explained_at": None,
+            }
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry["last_seen"] = now
+        entry["last_params"] = params
+        if route:
+            entry["routes"][route] = entry["routes"].get(route, 0) + 1
+
+        if self._should_explain(statement, entry, now):
+            self._explaining = True
+            entry["explained_at"] = now
+            asyncio.get_running_loop().create_task(self._explain(entry, statement, parameters))
+
+    def _evict(self, now: float):
+        self._prune(now)
+        if len(self._entries) >= self.capacity:
+            cheapest = min(self._entries.values(), key=lambda e: e["total_ms"])
+            del self._entries[cheapest["fingerprint"]]
+
+    def _prune(self, now: float):
+        for fp in [fp for fp, e in self._entries.items() if now - e["last_seen"] > self.window]:
+            del self._entries[fp]
+
+    def _should_explain(self, statement: str, entry: dict, now: float) -> bool:
+        if self._explaining or not statement.lstrip()[:6].upper() == "SELECT":
+            return False
+        if entry["explained_at"] is not None and now - entry["explained_at"] < self.window:
+            return False
+        return random.random() < self.explain_rate
+
+    async def _explain(self, entry: dict, statement: str, parameters):
+        stop_stats()
+        try:
+            if self._explain_engine is None:
+                self._explain_engine = create_async_engine(
+                    settings.ASYNC_DATABASE_URL, pool_size=1, max_overflow=0, pool_pre_ping=True
+                )
+            async with self._explain_engine.connect() as conn:
+                result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                entry["explain"] = [dict(row) for row in result.mappings()]
+        except Exception as e:
+            logger.error(f"EXPLAIN capture failed: {str(e)}")
+        finally:
+            self._explaining = False
+
+    def top(self) -> list:
+        """The slowest fingerprints by total time in the current window"""
+        self._prune(time.time())
+        entries = sorted(self._entries.values(), key=lambda e: e["total_ms"], reverse=True)[: self.top_n]
+        return [
+            {
+                **entry,
+                "total_ms": round(entry["total_ms"], 2),
+                "max_ms": round(entry["max_ms"], 2),
+                "avg_ms": round(entry["total_ms"] / entry["count"], 2),
+            }
+            for entry in entries
+        ]
+
+    def reset(self):
+        self._entries.clear()
+
+    async def close(self):
+        if self._explain_engine is not None:
+            await self._explain_engine.dispose()
+            self._explain_engine = None
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_MS,
+    explain_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    top_n=settings.SLOW_QUERY_TOP_N,
+    window=settings.SLOW_QUERY_WINDOW_SECONDS,
+)
+
+# Registered after the query_stats hooks, which set conn.info["query_start"]
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    slow_query_log.observe(conn, statement, parameters, time.perf_counter() - conn.info["query_start"])
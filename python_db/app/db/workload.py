@@ -0,0 +1,111 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Dict, List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.db.query_stats import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Diagnostic statements, never worth indexing for
+_SKIP_PREFIXES = ("EXPLAIN", "SHOW", "ANALYZE", "SET", "SAVEPOINT", "RELEASE", "ROLLBACK", "COMMIT", "XA")
+
+class WorkloadRecorder:
+    """
+    Samples executed statements (`sample_rate`) into a per-worker table keyed
+    by fingerprint and merges it into Redis every `flush_interval` seconds,
+    so the workload of all workers can be replayed by the index advisor
+    (app/db/index_advisor.py). Each SELECT fingerprint keeps its latest
+    statement and parameters as the replay sample; writes are only counted,
+    since their parameters carry user data (emails, password hashes) and the
+    advisor replays SELECTs only.
+    """
+
+    COUNTS = "db:workload:count"
+    TIMES = "db:workload:ms"
+    SAMPLES = "db:workload:sample"
+
+    def __init__(self, sample_rate: float, flush_interval: float, max_pending: int = 1000):
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[str, dict] = {}
+        self._last_flush = time.monotonic()
+        self._flushing = False
+
+    def observe(self, statement: str, parameters, seconds: float, executemany: bool = False):
+        if self.sample_rate <= 0 or executemany or random.random() >= self.sample_rate:
+            return
+        if statement.lstrip()[:9].upper().startswith(_SKIP_PREFIXES):
+            return
+        fp = fingerprint(statement)
+        entry = self._pending.get(fp)
+        if entry is None:
+            if len(self._pending) >= self.max_pending:
+                return
+            entry = self._pending[fp] = {"count": 0, "ms": 0.0}
+        entry["count"] += 1
+        entry["ms"] += seconds * 1000
+        if statement.lstrip()[:6].upper() == "SELECT":
+            entry["statement"] = statement
+            entry["parameters"] = parameters
+
+        if not self._flushing and time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flushing = True
+            asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self):
+        pending, self._pending = self._pending, {}
+        self._last_flush = time.monotonic()
+        try:
+            if pending:
+                pipe = redis_client.pipeline(transaction=False)
+                for fp, entry in pending.items():
+                    pipe.hincrby(self.COUNTS, fp, entry["count"])
+                    pipe.hincrbyfloat(self.TIMES, fp, round(entry["ms"], 3))
+                    if "statement" in entry:
+                        sample = {"statement": entry["statement"], "parameters": entry["parameters"]}
+                        pipe.hset(self.SAMPLES, fp, json.dumps(sample, default=str))
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Workload flush failed ({len(pending)} fingerprints lost): {str(e)}")
+        finally:
+            self._flushing = False
+
+    async def load(self) -> List[dict]:
+        """Captured fingerprints across all workers, heaviest (by sampled time) first"""
+        counts = await redis_client.hgetall(self.COUNTS)
+        times = await redis_client.hgetall(self.TIMES)
+        samples = await redis_client.hgetall(self.SAMPLES)
+        workload = []
+        for fp, count in counts.items():
+            sample = json.loads(samples[fp]) if fp in samples else {}
+            workload.append({
+                "fingerprint": fp,
+                "count": int(count),
+                "total_ms": round(float(times.get(fp, 0)), 2),
+                "statement": sample.get("statement"),
+                "parameters": sample.get("parameters"),
+            })
+        return sorted(workload, key=lambda w: w["total_ms"], reverse=True)
+
+    async def reset(self):
+        self._pending.clear()
+        await redis_client.delete(self.COUNTS, self.TIMES, self.SAMPLES)
+
+workload_recorder = WorkloadRecorder(
+    sample_rate=settings.WORKLOAD_SAMPLE_RATE,
+    flush_interval=settings.WORKLOAD_FLUSH_SECONDS,
+)
+
+# Registered after the query_stats hooks, which set conn.info["query_start"]
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    workload_recorder.observe(
+        statement, parameters, time.perf_counter() - conn.info["query_start"], executemany
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, Boolean, BigInteger, ForeignKey, Text, DateTime, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, String, Enum, Boolean, BigInteger, ForeignKey, Text, DateTime, JSON, UniqueConstraint, Index, func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 import enum
@@ -39,6 +39,11 @@ class InterviewResult(enum.Enum):
     PASS = "PASS"
     FAIL = "FAIL"
 
+class OutboxStatus(enum.Enum):
+    PENDING = "PENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
 class User(Base):
     __tablename__ = "users"
     id = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -90,6 +95,13 @@ class Job(Base):
     skills = relationship("JobSkill", back_populates="job")
     applications = relationship("Application", back_populates="job")
 
+    # Shaped after the queries in app/repositories/job.py: equality columns
+    # first, then the salary range; is_deleted is the soft-delete filter
+    __table_args__ = (
+        Index("ix_jobs_search", "status", "is_deleted", "job_type", "salary_min"),
+        Index("ix_jobs_recruiter", "recruiter_id", "is_deleted"),
+    )
+
 class Application(Base):
     __tablename__ = "applications"
     id = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -103,6 +115,8 @@ class Application(Base):
 
     __table_args__ = (
         UniqueConstraint("job_id", "job_seeker_id", name="uix_job_seeker_app"),
+        # uix_job_seeker_app only serves lookups by job_id
+        Index("ix_applications_seeker", "job_seeker_id", "is_deleted"),
     )
 
 class Skill(Base):
@@ -138,13 +152,74 @@ class Interview(Base):
     application = relationship("Application", back_populates="interviews")
 
 class ActivityLog(Base):
+    """
+    Partitioned by month on created_at (RANGE on TO_DAYS(created_at)); see
+    app/db/partitions.py for partition maintenance and archival.
+    """
     __tablename__ = "activity_logs"
     id = Column(BigInteger, primary_key=True, autoincrement=True)
-    user_id = Column(BigInteger, index=True)
+    # MySQL requires the partitioning column in every unique key, including the primary key
+    created_at = Column(DateTime, primary_key=True, default=func.now(), nullable=False)
+    user_id = Column(BigInteger)
     action = Column(String(100))
     entity_type = Column(String(50))
     entity_id = Column(BigInteger)
     
+    # Timeline lookups filter on the owner and a created_at range
+    __table_args__ = (
+        Index("ix_activity_user_time", "user_id", "created_at"),
+        Index("ix_activity_entity_time", "entity_type", "entity_id", "created_at"),
+    )
+
+class NotificationOutbox(Base):
+    """
+    Notifications written in the same transaction as the change that
+    triggers them and delivered by app/services/outbox.py.
+    """
+    __tablename__ = "notification_outbox"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # NotificationService method and its keyword arguments
+    notification = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    # Next delivery attempt; pushed forward while a dispatcher holds the row and after failures
+    available_at = Column(DateTime, default=func.now(), nullable=False)
+    sent_at = Column(DateTime)
+    last_error = Column(Text)
+
+    # The dispatcher claims PENDING rows in available_at order
     __table_args__ = (
-        Index("ix_entity", "entity_type", "entity_id"),
+        Index("ix_outbox_due", "status", "available_at"),
     )
+
+class JobMatchNotification(Base):
+    """Jobs already sent to a seeker in a job-match digest (see app/services/job_matching.py)"""
+    __tablename__ = "job_match_notifications"
+    job_seeker_id = Column(BigInteger, ForeignKey("job_seekers.id"), primary_key=True)
+    job_id = Column(BigInteger, ForeignKey("jobs.id"), primary_key=True)
+
+class SavedSearch(Base):
+    """
+    A job search a user is alerted about; every criterion is optional.
+    Indexed for reverse matching against new jobs by app/services/saved_searches.py.
+    """
+    __tablename__ = "saved_searches"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
+    location = Column(String(150))
+    job_type = Column(Enum(JobType))
+    min_salary = Column(Integer)
+
+    skills = relationship("SavedSearchSkill", back_populates="saved_search")
+
+    __table_args__ = (
+        Index("ix_saved_searches_user", "user_id", "is_deleted"),
+    )
+
+class SavedSearchSkill(Base):
+    __tablename__ = "saved_search_skills"
+    saved_search_id = Column(BigInteger, ForeignKey("saved_searches.id"), primary_key=True)
+    skill_id = Column(BigInteger, ForeignKey("skills.id"), primary_key=True)
+
+    saved_search = relationship("SavedSearch", back_populates="skills")
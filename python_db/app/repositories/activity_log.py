@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import ActivityLog
+
+class ActivityLogRepository:
+    """
+    Read side of activity_logs. Not a CRUDBase: rows are append-only and the
+    primary key is (id, created_at).
+
+    Every query is bounded by a created_at range so MySQL prunes to the
+    monthly partitions it covers, and pages by (created_at, id) keyset
+    instead of OFFSET so deep pages cost the same as the first.
+    """
+
+    async def timeline(
+        self,
+        db: AsyncSession,
+        *,
+        start: datetime,
+        end: datetime,
+        user_id: Optional[int] = None,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50,
+    ) -> List[ActivityLog]:
+        query = select(ActivityLog).where(
+            ActivityLog.created_at >= start,
+            ActivityLog.created_at < end,
+        )
+        if user_id is not None:
+            query = query.where(ActivityLog.user_id == user_id)
+        if entity_type is not None:
+            query = query.where(ActivityLog.entity_type == entity_type)
+        if entity_id is not None:
+            query = query.where(ActivityLog.entity_id == entity_id)
+        if before is not None:
+            query = query.where(tuple_(ActivityLog.created_at, ActivityLog.id) < before)
+        query = query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(limit)
+        result = await db.execute(query)
+        return result.scalars().all()
+
+activity_log_repo = ActivityLogRepository()
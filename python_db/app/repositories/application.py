@@ -1,3 +1,4 @@
+from sqlalchemy import Select
 from app.repositories.base import CRUDBase
 from app.models.models import Application
 from pydantic import BaseModel
@@ -11,6 +12,12 @@ class ApplicationUpdate(BaseModel):
     status: str
 
 class CRUDApplication(CRUDBase[Application, ApplicationCreate, ApplicationUpdate]):
-    pass
+    def by_job_query(self, job_id: int) -> Select:
+        # uix_job_seeker_app is led by job_id
+        return self.active().where(Application.job_id == job_id)
+
+    def by_job_seeker_query(self, job_seeker_id: int) -> Select:
+        # ix_applications_seeker
+        return self.active().where(Application.job_seeker_id == job_seeker_id)
 
 application_repo = CRUDApplication(Application)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from pydantic import BaseModel
-from sqlalchemy import select, update, delete
+from sqlalchemy import Select, select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.base_class import Base
 
@@ -14,14 +14,22 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         self.model = model
 
     async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
-        query = select(self.model).where(self.model.id == id, self.model.is_deleted == None)
-        result = await db.execute(query)
-        return result.scalar_one_or_none()
+        # Session.get checks the identity map first, so re-reading an object
+        # already loaded in this session (e.g. the current user) costs no query
+        db_obj = await db.get(self.model, id)
+        if db_obj is None or db_obj.is_deleted is not None:
+            return None
+        return db_obj
+
+    def active(self) -> Select:
+        """SELECT of rows that are not soft-deleted; the starting point for list queries"""
+        return select(self.model).where(self.model.is_deleted == None)
 
     async def get_multi(
         self, db: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        query = select(self.model).where(self.model.is_deleted == None).offset(skip).limit(limit)
+        # Ordered by primary key so pages are stable and read in index order
+        query = self.active().order_by(self.model.id).offset(skip).limit(limit)
         result = await db.execute(query)
         return result.scalars().all()
 
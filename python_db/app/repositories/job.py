@@ -1,8 +1,35 @@
+from typing import Optional
+from sqlalchemy import Select, func, select
 from app.repositories.base import CRUDBase
-from app.models.models import Job
+from app.models.models import Job, JobStatus, JobType
 from app.schemas.job import JobCreate, JobUpdate
 
 class CRUDJob(CRUDBase[Job, JobCreate, JobUpdate]):
-    pass
+    # Each query below matches the leading columns of an index on Job
+    # (ix_jobs_search, ix_jobs_recruiter); keep them in step.
+
+    def search_query(
+        self,
+        *,
+        location: Optional[str] = None,
+        job_type: Optional[JobType] = None,
+        min_salary: Optional[int] = None,
+    ) -> Select:
+        query = self.active().where(Job.status == JobStatus.OPEN)
+        if job_type:
+            query = query.where(Job.job_type == job_type)
+        if min_salary:
+            query = query.where(Job.salary_min >= min_salary)
+        if location:
+            # Leading wildcard: evaluated on the rows the index narrowed down
+            query = query.where(Job.location.ilike(f"%{location}%"))
+        return query
+
+    def by_recruiter_query(self, recruiter_id: int) -> Select:
+        return self.active().where(Job.recruiter_id == recruiter_id)
+
+    def open_count_query(self) -> Select:
+        # Answered from ix_jobs_search alone (the primary key is part of every secondary index)
+        return select(func.count(Job.id)).where(Job.status == JobStatus.OPEN, Job.is_deleted == None)
 
 job_repo = CRUDJob(Job)
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from sqlalchemy import Select
+from app.repositories.base import CRUDBase
+from app.models.models import SavedSearch
+
+class CRUDSavedSearch(CRUDBase[SavedSearch, BaseModel, BaseModel]):
+    def by_user_query(self, user_id: int) -> Select:
+        # Matches ix_saved_searches_user
+        return self.active().where(SavedSearch.user_id == user_id).order_by(SavedSearch.id)
+
+saved_search_repo = CRUDSavedSearch(SavedSearch)
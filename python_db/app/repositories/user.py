@@ -1,9 +1,10 @@
-from typing import Optional
+from typing import Any, Dict, Optional, Union
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.repositories.base import CRUDBase
 from app.models.models import User
 from app.schemas.user import UserCreate, UserUpdate
+from app.core.user_cache import user_cache
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
@@ -12,10 +13,10 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         return result.scalar_one_or_none()
 
     async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
-        from app.core.security import get_password_hash
+        from app.core.security import get_password_hash_async
         db_obj = User(
             email=obj_in.email,
-            password_hash=get_password_hash(obj_in.password),
+            password_hash=await get_password_hash_async(obj_in.password),
             role=obj_in.role,
             is_active=obj_in.is_active,
         )
@@ -24,4 +25,20 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         await db.refresh(db_obj)
         return db_obj
 
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        user = await super().update(db, db_obj=db_obj, obj_in=obj_in)
+        await user_cache.invalidate(user.id)
+        return user
+
+    async def remove(self, db: AsyncSession, *, id: int) -> User:
+        user = await super().remove(db, id=id)
+        await user_cache.invalidate(id)
+        return user
+
 user_repo = CRUDUser(User)
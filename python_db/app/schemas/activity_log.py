@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import List, Optional
+from app.schemas.common import CoreBase
+
+class ActivityLogEntry(CoreBase):
+    id: int
+    created_at: datetime
+    user_id: Optional[int] = None
+    action: Optional[str] = None
+    entity_type: Optional[str] = None
+    entity_id: Optional[int] = None
+
+class ActivityTimeline(CoreBase):
+    items: List[ActivityLogEntry]
+    # Pass back as `cursor` to fetch the next (older) page; None on the last page
+    next_cursor: Optional[str] = None
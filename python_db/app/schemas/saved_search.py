@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import List, Optional
+from app.schemas.common import CoreBase
+from app.models.models import JobType
+
+class SavedSearchBase(CoreBase):
+    location: Optional[str] = None
+    job_type: Optional[JobType] = None
+    min_salary: Optional[int] = None
+
+class SavedSearchCreate(SavedSearchBase):
+    skill_ids: List[int] = []
+
+class SavedSearch(SavedSearchBase):
+    id: int
+    user_id: int
+    skill_ids: List[int] = []
+    created_at: datetime
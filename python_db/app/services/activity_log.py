@@ -1,30 +1,216 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import insert
+from app.core.config import settings
 from app.models.models import ActivityLog
-from app.db.session import AsyncSessionLocal
+from app.db.session import engine
+from app.services.task_queue import task_queue
 import logging
 
 logger = logging.getLogger(__name__)
 
+class ActivityLogBuffer:
+    """
+    Write-behind buffer for ActivityLog rows.
+
+    Events are queued in memory and written by a single background task as
+    one multi-row INSERT per batch: as soon as `batch_size` records are
+    waiting, or `flush_interval` seconds after the first record of a batch
+    arrived. The queue holds at most `max_queue` records; when it is full,
+    producers wait up to `enqueue_timeout` seconds for room (backpressure)
+    and the record is dropped after that, so a slow database can never make
+    the API hang or grow memory without bound.
+
+    write() adds a record and waits until its batch is committed, for
+    callers that must not lose it (the log_activity task is only acked
+    once its row is in the database).
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        max_queue: int,
+        enqueue_timeout: float,
+        max_retries: int = 3,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.flushes = 0
+        self.overflows = 0   # producers that found the queue full and had to wait
+        self.dropped = 0     # records discarded because the queue stayed full
+        self.failed = 0      # records discarded after the INSERT kept failing
+        self.max_batch = 0
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def add(
+        self,
+        user_id: int,
+        action: str,
+        entity_type: str,
+        entity_id: int,
+        created_at: Optional[datetime] = None,
+        written: Optional[asyncio.Future] = None,
+    ):
+        """Queue a record; `written`, if given, is resolved once it is committed (or failed)"""
+        if self._closed:
+            self.dropped += 1
+            logger.warning(f"Activity log buffer closed, dropping {action} by user {user_id}")
+            if written is not None:
+                written.set_exception(RuntimeError("Activity log buffer closed"))
+            return
+        self._ensure_started()
+        record = {
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            # Event time, not flush time: it decides the partition and timeline order
+            "created_at": created_at or datetime.now(),
+        }
+        try:
+            self._queue.put_nowait((record, written))
+        except asyncio.QueueFull:
+            self.overflows += 1
+            try:
+                await asyncio.wait_for(self._queue.put((record, written)), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                logger.warning(f"Activity log buffer full, dropping {action} by user {user_id}")
+                if written is not None:
+                    written.set_exception(RuntimeError("Activity log buffer full"))
+                return
+        self.enqueued += 1
+
+    async def write(self, user_id: int, action: str, entity_type: str, entity_id: int, created_at: datetime):
+        """Add a record and wait until it is committed; raises if it was dropped or its INSERT failed"""
+        written = asyncio.get_running_loop().create_future()
+        await self.add(user_id, action, entity_type, entity_id, created_at, written)
+        await written
+
+    async def _next_batch(self) -> Tuple[List[Tuple[dict, Optional[asyncio.Future]]], bool]:
+        """Collect the next batch; also report whether close() asked to stop."""
+        item = await self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _write(self, batch: List[dict]) -> bool:
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(insert(ActivityLog), batch)
+                self.written += len(batch)
+                self.flushes += 1
+                self.max_batch = max(self.max_batch, len(batch))
+                logger.info(f"Activity logged: {len(batch)} records")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to log activity (attempt {attempt}/{self.max_retries}): {e}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(0.1 * 2 ** attempt)
+        self.failed += len(batch)
+        return False
+
+    async def _flush(self, batch: List[Tuple[dict, Optional[asyncio.Future]]]):
+        ok = await self._write([record for record, _ in batch])
+        for _, written in batch:
+            if written is None or written.done():
+                continue
+            if ok:
+                written.set_result(None)
+            else:
+                written.set_exception(RuntimeError("Activity log INSERT failed"))
+
+    async def _run(self):
+        while True:
+            batch, stop = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+            if stop:
+                return
+
+    async def close(self):
+        """Stop accepting records and write out everything still queued."""
+        self._closed = True
+        if self._task is not None and not self._task.done():
+            # Queued after every pending record, so the writer drains them first
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+        # Records from producers that were still waiting for room
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                pending.append(item)
+        for start in range(0, len(pending), self.batch_size):
+            await self._flush(pending[start:start + self.batch_size])
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "flushes": self.flushes,
+            "max_batch": self.max_batch,
+            "overflows": self.overflows,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+activity_log_buffer = ActivityLogBuffer(
+    batch_size=settings.ACTIVITY_LOG_BATCH_SIZE,
+    flush_interval=settings.ACTIVITY_LOG_FLUSH_MS / 1000,
+    max_queue=settings.ACTIVITY_LOG_MAX_QUEUE,
+    enqueue_timeout=settings.ACTIVITY_LOG_ENQUEUE_TIMEOUT_MS / 1000,
+)
+
+@task_queue.task(concurrency=100)
 async def log_activity(
-    user_id: int, 
-    action: str, 
-    entity_type: str, 
-    entity_id: int
+    user_id: int,
+    action: str,
+    entity_type: str,
+    entity_id: int,
+    occurred_at: Optional[str] = None
 ):
     """
-    Background task to log user activity.
+    Background task to log user activity. Concurrent tasks share batched
+    INSERTs in the worker's buffer; each returns (and is acked) only once
+    its row is committed, and is retried otherwise. `occurred_at` is the
+    event time captured by the API (queued as a string).
     """
-    async with AsyncSessionLocal() as db:
-        try:
-            log = ActivityLog(
-                user_id=user_id,
-                action=action,
-                entity_type=entity_type,
-                entity_id=entity_id
-            )
-            db.add(log)
-            await db.commit()
-            logger.info(f"Activity logged: {action} by user {user_id}")
-        except Exception as e:
-            logger.error(f"Failed to log activity: {e}")
-            await db.rollback()
+    created_at = datetime.fromisoformat(occurred_at) if occurred_at else datetime.now()
+    await activity_log_buffer.write(user_id, action, entity_type, entity_id, created_at)
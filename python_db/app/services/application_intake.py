@@ -0,0 +1,343 @@
+"""
+Application Intake
+Buffered application submission: requests are validated, appended to a
+Redis Stream and answered with 202; consumers insert them in batches.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Dict, List, Optional
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.dialects import mysql
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.models.models import Application, ApplicationStatus, Job, JobStatus, NotificationOutbox
+from app.repositories.job import job_repo
+from app.services.outbox import outbox_row
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+class ApplicationIntake:
+    """
+    Absorbs apply bursts (a popular job going live) without one write
+    transaction per request.
+
+    `enqueue` checks the job is open (cached in Redis for `open_job_ttl`
+    seconds), XADDs the request to `stream` and records a status entry the
+    client can poll. Each worker runs a consumer in the `group` consumer
+    group that reads up to `batch_size` requests at a time and writes them
+    with a handful of statements: existing pairs and closed jobs are
+    filtered out with two SELECTs, the rest go in one multi-row INSERT ...
+    ON DUPLICATE KEY UPDATE id=id (uix_job_seeker_app still wins any race
+    with the direct path, while FK and data errors still fail the batch),
+    committed together with the confirmations' outbox rows. Entries are acknowledged and
+    deleted only after their outcome is recorded, so requests read by a
+    worker that died are re-claimed after `claim_idle` seconds.
+
+    A batch that fails is retried one entry at a time, so one bad entry
+    does not hold back the others. An entry still failing after
+    `max_deliveries` deliveries is answered "rejected" and moved to the
+    `{stream}:dead` stream.
+    """
+
+    def __init__(
+        self,
+        stream: str,
+        group: str,
+        batch_size: int,
+        block_ms: int,
+        max_backlog: int,
+        request_ttl: int,
+        open_job_ttl: int = 30,
+        claim_idle: float = 60,
+        max_deliveries: int = 5,
+        dead_letter_maxlen: int = 10000,
+    ):
+        self.stream = stream
+        self.group = group
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.max_backlog = max_backlog
+        self.request_ttl = request_ttl
+        self.open_job_ttl = open_job_ttl
+        self.claim_idle = claim_idle
+        self.max_deliveries = max_deliveries
+        self.dead_letter_maxlen = dead_letter_maxlen
+        self.dead_stream = f"{stream}:dead"
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+        self._last_claim = 0.0
+        # Metrics
+        self.processed = 0
+        self.inserted = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+
+    def _request_key(self, request_id: str) -> str:
+        return f"apply:request:{request_id}"
+
+    def _open_job_key(self, job_id: int) -> str:
+        # Also cleared by JobService.update_job_status
+        return f"jobs:open:{job_id}"
+
+    async def _job_is_open(self, db, job_id: int) -> Optional[bool]:
+        """True/False, or None if the job does not exist"""
+        cached = await redis_client.get(self._open_job_key(job_id))
+        if cached is not None:
+            return None if cached == "missing" else cached == "1"
+        job = await job_repo.get(db, id=job_id)
+        value = "missing" if job is None else ("1" if job.status == JobStatus.OPEN else "0")
+        await redis_client.set(self._open_job_key(job_id), value, ex=self.open_job_ttl)
+        return None if job is None else value == "1"
+
+    async def enqueue(self, db, user_id: int, job_id: int, job_seeker_id: int, user_email: str) -> dict:
+        is_open = await self._job_is_open(db, job_id)
+        if is_open is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        if not is_open:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="This job is not accepting applications"
+            )
+        if await redis_client.xlen(self.stream) >= self.max_backlog:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending applications, please retry shortly",
+                headers={"Retry-After": "5"}
+            )
+
+        request_id = uuid.uuid4().hex
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(self._request_key(request_id), mapping={"status": "queued", "user_id": user_id, "job_id": job_id})
+        pipe.expire(self._request_key(request_id), self.request_ttl)
+        pipe.xadd(self.stream, {
+            "request_id": request_id,
+            "job_id": job_id,
+            "job_seeker_id": job_seeker_id,
+            "email": user_email,
+        })
+        await pipe.execute()
+        return {"request_id": request_id, "status": "queued"}
+
+    async def get_request(self, request_id: str, user_id: int) -> Optional[dict]:
+        data = await redis_client.hgetall(self._request_key(request_id))
+        if not data or int(data["user_id"]) != user_id:
+            return None
+        result = {"request_id": request_id, "status": data["status"], "job_id": int(data["job_id"])}
+        if "application_id" in data:
+            result["application_id"] = int(data["application_id"])
+        if "detail" in data:
+            result["detail"] = data["detail"]
+        return result
+
+    async def _ensure_group(self):
+        try:
+            await redis_client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _claim(self) -> List[tuple]:
+        """Entries left pending (by a dead consumer or a failed batch) for `claim_idle` seconds"""
+        claimed = await redis_client.xautoclaim(
+            self.stream, self.group, self.consumer,
+            min_idle_time=int(self.claim_idle * 1000), start_id="0-0", count=self.batch_size
+        )
+        # Entries deleted while pending come back without fields
+        entries = [entry for entry in (claimed[1] if claimed else []) if entry[1]]
+        if not entries:
+            return []
+        pending = await redis_client.xpending_range(
+            self.stream, self.group, min=entries[0][0], max=entries[-1][0],
+            count=self.batch_size, consumername=self.consumer
+        )
+        deliveries = {item["message_id"]: item["times_delivered"] for item in pending}
+        exhausted = [entry for entry in entries if deliveries.get(entry[0], 0) > self.max_deliveries]
+        if exhausted:
+            await self._dead_letter(exhausted)
+        return [entry for entry in entries if deliveries.get(entry[0], 0) <= self.max_deliveries]
+
+    async def _dead_letter(self, entries: List[tuple]):
+        """Answer entries that kept failing as rejected and move them to the dead-letter stream"""
+        pipe = redis_client.pipeline(transaction=True)
+        for entry_id, fields in entries:
+            pipe.xadd(
+                self.dead_stream, {**fields, "failed_id": entry_id, "failed_at": time.time()},
+                maxlen=self.dead_letter_maxlen, approximate=True
+            )
+            if "request_id" in fields:
+                pipe.hset(self._request_key(fields["request_id"]), mapping={
+                    "status": "rejected", "detail": "The application could not be processed"
+                })
+        ids = [entry_id for entry_id, _ in entries]
+        pipe.xack(self.stream, self.group, *ids)
+        pipe.xdel(self.stream, *ids)
+        await pipe.execute()
+        self.dead_lettered += len(entries)
+        logger.error(f"Application intake: {len(entries)} requests dead-lettered after {self.max_deliveries} deliveries")
+
+    async def _read(self) -> List[tuple]:
+        # Abandoned entries first (checked every claim_idle seconds), then new ones
+        if time.monotonic() - self._last_claim >= self.claim_idle:
+            self._last_claim = time.monotonic()
+            entries = await self._claim()
+            if entries:
+                return entries
+        response = await redis_client.xreadgroup(
+            self.group, self.consumer, {self.stream: ">"}, count=self.batch_size, block=self.block_ms
+        )
+        return response[0][1] if response else []
+
+    async def process(self, entries: List[tuple]):
+        """Insert one batch of stream entries and record each request's outcome"""
+        from app.db.session import AsyncSessionLocal
+
+        requests = {}  # (job_id, job_seeker_id) -> first request for that pair
+        outcomes: Dict[str, dict] = {}
+        for _, fields in entries:
+            pair = (int(fields["job_id"]), int(fields["job_seeker_id"]))
+            if pair in requests:
+                outcomes[fields["request_id"]] = {"status": "duplicate", "detail": "You have already applied to this job"}
+            else:
+                requests[pair] = fields
+
+        async with AsyncSessionLocal() as db:
+            pairs = list(requests)
+            existing = await db.execute(
+                select(Application.id, Application.job_id, Application.job_seeker_id)
+                .where(tuple_(Application.job_id, Application.job_seeker_id).in_(pairs))
+            )
+            for app_id, job_id, job_seeker_id in existing:
+                fields = requests.pop((job_id, job_seeker_id))
+                outcomes[fields["request_id"]] = {
+                    "status": "duplicate", "application_id": app_id, "detail": "You have already applied to this job"
+                }
+
+            titles = {}
+            if requests:
+                open_jobs = await db.execute(
+                    select(Job.id, Job.title).where(
+                        Job.id.in_({job_id for job_id, _ in requests}),
+                        Job.status == JobStatus.OPEN,
+                        Job.is_deleted == None
+                    )
+                )
+                titles = dict(open_jobs.all())
+            for pair in [p for p in requests if p[0] not in titles]:
+                fields = requests.pop(pair)
+                outcomes[fields["request_id"]] = {"status": "rejected", "detail": "This job is not accepting applications"}
+
+            if requests:
+                await db.execute(
+                    # Absorbs unique-key conflicts only, unlike INSERT IGNORE
+                    mysql.insert(Application).on_duplicate_key_update(id=Application.id),
+                    [
+                        {"job_id": job_id, "job_seeker_id": job_seeker_id, "status": ApplicationStatus.APPLIED}
+                        for job_id, job_seeker_id in requests
+                    ],
+                )
+                created = await db.execute(
+                    select(Application.id, Application.job_id, Application.job_seeker_id)
+                    .where(tuple_(Application.job_id, Application.job_seeker_id).in_(list(requests)))
+                )
+                confirmations = []
+                for app_id, job_id, job_seeker_id in created:
+                    fields = requests.pop((job_id, job_seeker_id))
+                    outcomes[fields["request_id"]] = {"status": "applied", "application_id": app_id}
+                    confirmations.append(outbox_row(
+                        "send_application_confirmation",
+                        user_email=fields["email"],
+                        job_title=titles[job_id],
+                        application_id=app_id
+                    ))
+                # Pairs that hit the unique key: another consumer committed them after our snapshot
+                for fields in requests.values():
+                    outcomes[fields["request_id"]] = {"status": "duplicate", "detail": "You have already applied to this job"}
+                if confirmations:
+                    await db.execute(insert(NotificationOutbox), confirmations)
+                await db.commit()
+                self.inserted += len(confirmations)
+
+        pipe = redis_client.pipeline(transaction=False)
+        for request_id, outcome in outcomes.items():
+            pipe.hset(self._request_key(request_id), mapping=outcome)
+        ids = [entry_id for entry_id, _ in entries]
+        pipe.xack(self.stream, self.group, *ids)
+        pipe.xdel(self.stream, *ids)
+        await pipe.execute()
+        self.processed += len(entries)
+        self.batches += 1
+
+    async def run(self):
+        await self._ensure_group()
+        logger.info(f"Application intake consumer {self.consumer} started on {self.stream}")
+        while True:
+            try:
+                entries = await self._read()
+                if entries:
+                    started = time.perf_counter()
+                    try:
+                        await self.process(entries)
+                    except Exception as e:
+                        if len(entries) == 1:
+                            raise
+                        logger.error(f"Application intake batch of {len(entries)} failed, retrying one by one: {str(e)}")
+                        await self.process_each(entries)
+                    logger.info(
+                        f"Application intake: {len(entries)} requests in "
+                        f"{(time.perf_counter() - started) * 1000:.1f}ms"
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Application intake batch failed: {str(e)}")
+                await asyncio.sleep(1)
+
+    async def process_each(self, entries: List[tuple]):
+        """Retry a failed batch entry by entry; the entries that fail again are re-claimed after claim_idle"""
+        self.failed_batches += 1
+        for entry in entries:
+            try:
+                await self.process([entry])
+            except Exception as e:
+                logger.error(f"Application intake request {entry[0]} failed: {str(e)}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def stats(self) -> dict:
+        return {
+            "consumer": self.consumer,
+            "backlog": await redis_client.xlen(self.stream),
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "dead_lettered": self.dead_lettered,
+            "dead": await redis_client.xlen(self.dead_stream),
+        }
+
+application_intake = ApplicationIntake(
+    stream="applications:intake",
+    group="application-writers",
+    batch_size=settings.APPLICATION_INTAKE_BATCH_SIZE,
+    block_ms=settings.APPLICATION_INTAKE_BLOCK_MS,
+    max_backlog=settings.APPLICATION_INTAKE_MAX_BACKLOG,
+    request_ttl=settings.APPLICATION_REQUEST_TTL_SECONDS,
+    max_deliveries=settings.APPLICATION_INTAKE_MAX_DELIVERIES,
+)
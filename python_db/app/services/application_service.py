@@ -2,13 +2,23 @@
 Application Service
 Handles job application workflow and lifecycle management
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, insert, update, func, literal
+from sqlalchemy.exc import IntegrityError
 from app.repositories.application import application_repo
-from app.models.models import Application, ApplicationStatus, Job, JobSeeker
+from app.repositories.job import job_repo
+from app.models.models import Application, ApplicationStatus, Job, JobSeeker, JobStatus, NotificationOutbox, OutboxStatus, User
 from fastapi import HTTPException, status
-from app.services.notification_service.service import notification_service
+from app.services.outbox import add_notification, outbox_row
+from app.core.config import settings
+
+# MySQL ER_DUP_ENTRY
+DUPLICATE_KEY_ERROR = 1062
+
+def _is_duplicate_key(error: IntegrityError) -> bool:
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] == DUPLICATE_KEY_ERROR
 
 class ApplicationService:
     """Microservice for application management operations"""
@@ -20,47 +30,83 @@ class ApplicationService:
         job_seeker_id: int,
         user_email: str
     ) -> Application:
-        """Submit a job application"""
-        # Check if already applied
-        query = select(Application).where(
-            and_(
-                Application.job_id == job_id,
-                Application.job_seeker_id == job_seeker_id
-            )
+        """
+        Submit a job application in one INSERT ... SELECT that only inserts
+        when the job is open; uix_job_seeker_app rejects duplicates, so
+        there is no check-then-insert race. The confirmation is queued in
+        the notification outbox within the same transaction.
+        """
+        now = func.now()
+        open_job = select(
+            Job.id,
+            literal(job_seeker_id),
+            literal(ApplicationStatus.APPLIED.value),
+            now,
+            now,
+        ).where(
+            Job.id == job_id,
+            Job.status == JobStatus.OPEN,
+            Job.is_deleted == None
         )
-        result = await db.execute(query)
-        existing = result.scalar_one_or_none()
-        
-        if existing:
+        statement = insert(Application).from_select(
+            ["job_id", "job_seeker_id", "status", "created_at", "updated_at"],
+            open_job
+        )
+        try:
+            result = await db.execute(statement)
+            application_id = result.lastrowid
+            if result.rowcount:
+                await db.execute(self._confirmation_outbox_insert(job_id, application_id, user_email))
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if _is_duplicate_key(e):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="You have already applied to this job"
+                )
+            raise
+
+        if result.rowcount == 0:
+            # Slow path only: tell a missing job from one that is not accepting applications
+            job = await job_repo.get(db, id=job_id)
+            if not job:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Job not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="You have already applied to this job"
+                detail="This job is not accepting applications"
             )
-        
-        # Get job details for notification
-        job_query = select(Job).where(Job.id == job_id)
-        job_result = await db.execute(job_query)
-        job = job_result.scalar_one_or_none()
-        
-        if not job:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Job not found"
-            )
-        
-        # Create application
-        from app.repositories.application import ApplicationCreate
-        app_data = ApplicationCreate(job_id=job_id, job_seeker_id=job_seeker_id)
-        application = await application_repo.create(db, obj_in=app_data)
-        
-        # Send confirmation notification
-        await notification_service.send_application_confirmation(
-            user_email=user_email,
-            job_title=job.title,
-            application_id=application.id
+
+        return Application(
+            id=application_id,
+            job_id=job_id,
+            job_seeker_id=job_seeker_id,
+            status=ApplicationStatus.APPLIED
+        )
+
+    def _confirmation_outbox_insert(self, job_id: int, application_id: int, user_email: str):
+        """Outbox row for an application confirmation, taking the job title from the jobs row"""
+        now = func.now()
+        payload = func.json_object(
+            "user_email", user_email,
+            "job_title", Job.title,
+            "application_id", application_id,
+        )
+        return insert(NotificationOutbox).from_select(
+            ["notification", "payload", "status", "attempts", "available_at", "created_at", "updated_at"],
+            select(
+                literal("send_application_confirmation"),
+                payload,
+                literal(OutboxStatus.PENDING.value),
+                literal(0),
+                now,
+                now,
+                now,
+            ).where(Job.id == job_id)
         )
-        
-        return application
     
     async def update_application_status(
         self,
@@ -69,7 +115,7 @@ class ApplicationService:
         new_status: ApplicationStatus,
         recruiter_id: int
     ) -> Application:
-        """Update application status (recruiter only)"""
+        """Update application status (recruiter only); the applicant is notified through the outbox"""
         application = await application_repo.get(db, id=application_id)
         
         if not application:
@@ -89,13 +135,101 @@ class ApplicationService:
                 detail="Not authorized to modify this application"
             )
         
+        applicant_email = await db.scalar(
+            select(User.email)
+            .join(JobSeeker, JobSeeker.user_id == User.id)
+            .where(JobSeeker.id == application.job_seeker_id)
+        )
+        
         # Update status
         application.status = new_status
+        if applicant_email:
+            add_notification(
+                db,
+                "send_application_status_update",
+                user_email=applicant_email,
+                job_title=job.title,
+                new_status=new_status.value
+            )
         await db.commit()
         await db.refresh(application)
         
         return application
     
+    async def bulk_update_application_status(
+        self,
+        db: AsyncSession,
+        application_ids: List[int],
+        new_status: ApplicationStatus,
+        recruiter_id: int
+    ) -> Dict:
+        """
+        Move many applications to `new_status` (recruiter only).
+
+        One joined SELECT ... FOR UPDATE per chunk of IDs checks ownership,
+        collects the applicants to notify and locks the applications until
+        the commit, so none is deleted or changed before the UPDATE. One
+        set-based UPDATE per chunk, still guarded by the recruiter, the
+        soft delete and the current status, changes the rows and is followed
+        by one multi-row INSERT of their notifications into the outbox. IDs
+        that do not exist or belong to another recruiter's jobs are reported
+        in `not_found`, and those already in `new_status` in `unchanged`.
+        """
+        ids = list(dict.fromkeys(application_ids))
+        chunk_size = settings.APPLICATION_BULK_CHUNK_SIZE
+        owned = {}
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            result = await db.execute(
+                select(Application.id, Application.status, User.email, Job.title)
+                .join(Job, Job.id == Application.job_id)
+                .join(JobSeeker, JobSeeker.id == Application.job_seeker_id)
+                .join(User, User.id == JobSeeker.user_id)
+                .where(
+                    Application.id.in_(chunk),
+                    Application.is_deleted == None,
+                    Job.recruiter_id == recruiter_id
+                )
+                .with_for_update(of=Application)
+            )
+            for row in result:
+                owned[row.id] = row
+
+        changed = [app_id for app_id in ids if app_id in owned and owned[app_id].status != new_status]
+        updated = 0
+        for start in range(0, len(changed), chunk_size):
+            chunk = changed[start:start + chunk_size]
+            result = await db.execute(
+                update(Application)
+                .where(
+                    Application.id.in_(chunk),
+                    Application.is_deleted == None,
+                    Application.status != new_status,
+                    Application.job_id == Job.id,
+                    Job.recruiter_id == recruiter_id
+                )
+                .values(status=new_status, updated_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+            await db.execute(insert(NotificationOutbox), [
+                outbox_row(
+                    "send_application_status_update",
+                    user_email=owned[app_id].email,
+                    job_title=owned[app_id].title,
+                    new_status=new_status.value
+                )
+                for app_id in chunk
+            ])
+        if changed:
+            await db.commit()
+
+        return {
+            "updated": updated,
+            "unchanged": [app_id for app_id in ids if app_id in owned and owned[app_id].status == new_status],
+            "not_found": [app_id for app_id in ids if app_id not in owned],
+        }
+
     async def get_applications_by_job_seeker(
         self,
         db: AsyncSession,
@@ -104,9 +238,7 @@ class ApplicationService:
         limit: int = 100
     ) -> List[Application]:
         """Get all applications by a job seeker"""
-        query = select(Application).where(
-            Application.job_seeker_id == job_seeker_id
-        ).offset(skip).limit(limit)
+        query = application_repo.by_job_seeker_query(job_seeker_id).offset(skip).limit(limit)
         result = await db.execute(query)
         return result.scalars().all()
     
@@ -130,9 +262,7 @@ class ApplicationService:
                 detail="Not authorized to view these applications"
             )
         
-        query = select(Application).where(
-            Application.job_id == job_id
-        ).offset(skip).limit(limit)
+        query = application_repo.by_job_query(job_id).offset(skip).limit(limit)
         result = await db.execute(query)
         return result.scalars().all()
 
@@ -1,38 +1,285 @@
 import asyncio
 import logging
-from typing import List, Dict, Any
+import time
+import uuid
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Union
 from datetime import datetime
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.services.task_queue import task_queue
 
 logger = logging.getLogger(__name__)
 
+Recipients = Union[Iterable[str], AsyncIterable[str]]
+
+class NotificationBatchEngine:
+    """
+    Sends one notification per recipient with a fixed pool of `width`
+    workers fed through a bounded queue, so a batch of any size holds at
+    most `width` sends in flight and about `2 * width` recipients in memory.
+    The input (a list or an async iterator, e.g. rows streamed from the
+    database, or the recipients staged in Redis by `stage`) is consumed
+    `chunk_size` recipients at a time.
+
+    Each recipient is retried up to `max_retries` times with exponential
+    backoff from `retry_delay` seconds. Progress is kept in a Redis hash
+    (`batch:notifications:{id}`) updated every `progress_interval` seconds,
+    along with the last `max_failures_kept` failures, for `record_ttl`
+    seconds after the batch was created.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        chunk_size: int,
+        max_retries: int,
+        retry_delay: float,
+        record_ttl: int,
+        progress_interval: float = 1.0,
+        max_failures_kept: int = 100,
+    ):
+        self.width = width
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.record_ttl = record_ttl
+        self.progress_interval = progress_interval
+        self.max_failures_kept = max_failures_kept
+
+    def _key(self, batch_id: str) -> str:
+        return f"batch:notifications:{batch_id}"
+
+    def _failures_key(self, batch_id: str) -> str:
+        return f"batch:notifications:{batch_id}:failures"
+
+    def _recipients_key(self, batch_id: str) -> str:
+        return f"batch:notifications:{batch_id}:recipients"
+
+    async def create(self, total: Optional[int] = None) -> str:
+        batch_id = uuid.uuid4().hex
+        record = {
+            "status": "queued",
+            "width": self.width,
+            "sent": 0,
+            "failed": 0,
+            "retries": 0,
+            "created_at": datetime.now().isoformat(),
+        }
+        if total is not None:
+            record["total"] = total
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(self._key(batch_id), mapping=record)
+        pipe.expire(self._key(batch_id), self.record_ttl)
+        await pipe.execute()
+        return batch_id
+
+    async def stage(self, batch_id: str, recipients: Recipients) -> int:
+        """
+        Append the recipients to the batch's Redis list, `chunk_size` per
+        round trip, so the task entry only carries the batch id.
+        Returns how many were staged.
+        """
+        key = self._recipients_key(batch_id)
+        staged = 0
+        async for chunk in self._chunks(recipients):
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.rpush(key, *chunk)
+            pipe.expire(key, self.record_ttl)
+            await pipe.execute()
+            staged += len(chunk)
+        return staged
+
+    async def staged(self, batch_id: str):
+        """Stream the staged recipients back, reading `chunk_size` per round trip."""
+        key = self._recipients_key(batch_id)
+        start = 0
+        while True:
+            chunk = await redis_client.lrange(key, start, start + self.chunk_size - 1)
+            for recipient in chunk:
+                yield recipient
+            if len(chunk) < self.chunk_size:
+                return
+            start += len(chunk)
+
+    async def discard(self, batch_id: str):
+        await redis_client.delete(self._recipients_key(batch_id))
+
+    async def _chunks(self, recipients: Recipients):
+        chunk = []
+        if isinstance(recipients, AsyncIterable):
+            async for recipient in recipients:
+                chunk.append(recipient)
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+        else:
+            for recipient in recipients:
+                chunk.append(recipient)
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    async def run(self, batch_id: str, recipients: Recipients, send: Callable[[str], Awaitable[Any]]) -> dict:
+        """
+        Send to every recipient; `send` returns False or raises on failure.
+        Returns the final counters.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.width * 2)
+        counts = {"queued": 0, "sent": 0, "failed": 0, "retries": 0}
+        failures: List[str] = []
+        started = time.monotonic()
+        finished = asyncio.Event()
+
+        async def deliver(recipient: str):
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if await send(recipient) is not False:
+                        counts["sent"] += 1
+                        return
+                    error = "rejected"
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                if attempt < self.max_retries:
+                    counts["retries"] += 1
+                    await asyncio.sleep(self.retry_delay * 2 ** attempt)
+            counts["failed"] += 1
+            failures.append(f"{recipient}: {error}"[:500])
+
+        async def worker():
+            while True:
+                recipient = await queue.get()
+                if recipient is None:
+                    return
+                await deliver(recipient)
+
+        async def save(status: str):
+            elapsed = time.monotonic() - started
+            done = counts["sent"] + counts["failed"]
+            record = {
+                "status": status,
+                "queued": counts["queued"],
+                "sent": counts["sent"],
+                "failed": counts["failed"],
+                "retries": counts["retries"],
+                "elapsed_seconds": round(elapsed, 3),
+                "per_second": round(done / elapsed, 2) if elapsed > 0 else 0,
+                "updated_at": datetime.now().isoformat(),
+            }
+            pending, failures[:] = failures[:], []
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hset(self._key(batch_id), mapping=record)
+            pipe.expire(self._key(batch_id), self.record_ttl)
+            if pending:
+                pipe.lpush(self._failures_key(batch_id), *pending)
+                pipe.ltrim(self._failures_key(batch_id), 0, self.max_failures_kept - 1)
+                pipe.expire(self._failures_key(batch_id), self.record_ttl)
+            await pipe.execute()
+
+        async def report():
+            while True:
+                try:
+                    await asyncio.wait_for(finished.wait(), self.progress_interval)
+                    return
+                except asyncio.TimeoutError:
+                    pass
+                try:
+                    await save("running")
+                except Exception as e:
+                    logger.error(f"Batch {batch_id} progress update failed: {str(e)}")
+
+        logger.info(f"Notification batch {batch_id} started ({self.width} workers)")
+        await redis_client.hset(self._key(batch_id), mapping={"status": "running", "started_at": datetime.now().isoformat()})
+        workers = [asyncio.create_task(worker()) for _ in range(self.width)]
+        reporter = asyncio.create_task(report())
+        status = "completed"
+        try:
+            async for chunk in self._chunks(recipients):
+                for recipient in chunk:
+                    await queue.put(recipient)
+                    counts["queued"] += 1
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except BaseException:
+            status = "interrupted"
+            for task in workers:
+                task.cancel()
+            raise
+        finally:
+            # Let an in-progress update land before the final one
+            finished.set()
+            await asyncio.gather(reporter, return_exceptions=True)
+            await save(status)
+            logger.info(
+                f"Notification batch {batch_id} {status}: {counts['sent']} sent, "
+                f"{counts['failed']} failed in {time.monotonic() - started:.2f}s"
+            )
+        return counts
+
+    async def get(self, batch_id: str) -> Optional[dict]:
+        record = await redis_client.hgetall(self._key(batch_id))
+        if not record:
+            return None
+        result: Dict[str, Any] = {"batch_id": batch_id}
+        for field, value in record.items():
+            if field in ("width", "total", "queued", "sent", "failed", "retries"):
+                result[field] = int(value)
+            elif field in ("elapsed_seconds", "per_second"):
+                result[field] = float(value)
+            else:
+                result[field] = value
+        result["recent_failures"] = await redis_client.lrange(self._failures_key(batch_id), 0, -1)
+        return result
+
+notification_batches = NotificationBatchEngine(
+    width=settings.NOTIFICATION_BATCH_WIDTH,
+    chunk_size=settings.NOTIFICATION_BATCH_CHUNK_SIZE,
+    max_retries=settings.NOTIFICATION_BATCH_MAX_RETRIES,
+    retry_delay=settings.NOTIFICATION_BATCH_RETRY_SECONDS,
+    record_ttl=settings.NOTIFICATION_BATCH_TTL_SECONDS,
+)
+
 class AsyncTaskService:
     """
     Service to handle complex AsyncIO operations and background processing.
     """
 
     @staticmethod
-    async def process_batch_notifications(emails: List[str], message: str):
+    # Recipients are retried individually by the batch engine; rerunning the whole batch would resend
+    @task_queue.task(concurrency=2, max_retries=0, timeout=3600)
+    async def process_batch_notifications(batch_id: str, message: str):
         """
         Simulates an I/O bound background task (like sending bulk emails).
-        Uses asyncio.gather for concurrent execution.
+        Streams the recipients staged for the batch through the notification
+        batch engine, so memory and concurrency stay at NOTIFICATION_BATCH_WIDTH
+        however many there are.
         """
-        logger.info(f"🚀 Starting background batch process for {len(emails)} users...")
+        logger.info(f"🚀 Starting background batch process {batch_id}...")
         start_time = datetime.now()
-        
-        # Simulate individual tasks concurrently
-        tasks = [AsyncTaskService.send_individual_simulated_email(email, message) for email in emails]
-        await asyncio.gather(*tasks)
-        
+
+        try:
+            await notification_batches.run(
+                batch_id,
+                notification_batches.staged(batch_id),
+                lambda email: AsyncTaskService.send_individual_simulated_email(email, message)
+            )
+        finally:
+            await notification_batches.discard(batch_id)
+
         duration = (datetime.now() - start_time).total_seconds()
         logger.info(f"✅ Batch notifications completed in {duration:.2f} seconds.")
 
     @staticmethod
-    async def send_individual_simulated_email(email: str, message: str):
+    async def send_individual_simulated_email(email: str, message: str) -> bool:
         """Simulates sending one email with an artificial I/O delay."""
         await asyncio.sleep(2) # Artificial I/O delay (e.g., SMTP server response)
         logger.info(f"📧 [BACKGROUND] Notification sent to {email}")
+        return True
 
     @staticmethod
+    @task_queue.task(concurrency=1)
     async def simulate_heavy_computation():
         """
         Simulates a heavy non-blocking task using asyncio.sleep.
@@ -7,9 +7,11 @@ from datetime import timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import security
 from app.core.config import settings
+from app.core.token_cache import revoked_tokens
 from app.repositories.user import user_repo
 from app.models.models import User, UserRole
 from app.schemas.user import UserCreate
+from app.services.outbox import add_notification
 from fastapi import HTTPException, status
 
 class AuthService:
@@ -25,26 +27,36 @@ class AuthService:
         user = await user_repo.get_by_email(db, email=email)
         if not user:
             return None
-        if not security.verify_password(password, user.password_hash):
+        if not await security.verify_password_async(password, user.password_hash):
             return None
         return user
     
-    async def create_access_token(self, user_id: int) -> dict:
+    async def create_access_token(self, user_id: int, role: Optional[UserRole] = None) -> dict:
         """Generate JWT access token"""
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        # The role claim lets rate limiting pick a tier without a DB lookup
+        claims = {"role": role.value} if role else None
         return {
             "access_token": security.create_access_token(
-                user_id, expires_delta=access_token_expires
+                user_id, expires_delta=access_token_expires, claims=claims
             ),
             "token_type": "bearer",
         }
     
+    async def logout(self, claims: dict) -> None:
+        """Revoke the presented token (no database access needed)"""
+        await revoked_tokens.revoke_token(claims)
+    
+    async def revoke_user_tokens(self, user_id: int) -> None:
+        """Force-logout a user by revoking every token issued to them so far"""
+        await revoked_tokens.revoke_user(user_id)
+    
     async def register_user(
         self, 
         db: AsyncSession, 
         user_data: UserCreate
     ) -> User:
-        """Register a new user"""
+        """Register a new user; the welcome email is queued in the same transaction"""
         # Check if user exists
         existing_user = await user_repo.get_by_email(db, email=user_data.email)
         if existing_user:
@@ -55,6 +67,12 @@ class AuthService:
         
         # Create user
         user = await user_repo.create(db, obj_in=user_data)
+        add_notification(
+            db,
+            "send_welcome_email",
+            user_email=user.email,
+            user_name=user.email.split('@')[0]
+        )
         return user
     
     async def validate_user_active(self, user: User) -> bool:
@@ -0,0 +1,243 @@
+"""
+Job-match digest: nightly e-mail of open jobs that fit each seeker's skills.
+
+The run streams active job seekers in keyset-paginated chunks and scores
+every chunk against the open-job skill matrix, which is loaded once per run.
+Jobs the seeker applied to, or was already sent, are dropped. Digests are
+handed to NotificationService in batches and the jobs sent are recorded
+in job_match_notifications.
+
+The position (last seeker ID) is checkpointed in Redis after every chunk.
+A run stops when its window (JOB_MATCH_WINDOW_MINUTES) is used up, and the
+next run resumes the same cycle from the checkpoint. Only one worker runs
+at a time, through a Redis lock. Scheduled daily at JOB_MATCH_DIGEST_HOUR
+inside the API, or on demand:
+
+    python -m app.services.job_matching
+"""
+import asyncio
+import heapq
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.models.models import (
+    Application, Job, JobMatchNotification, JobSeeker, JobSeekerSkill, JobSkill, JobStatus, User
+)
+from app.services.notification_service.service import notification_service
+
+logger = logging.getLogger(__name__)
+
+class OpenJobMatrix:
+    """
+    Skill requirements of every open job, stored as an inverted index
+    (skill -> jobs). Scoring a chunk accumulates, for every seeker, how many
+    of each job's skills they have, i.e. a sparse seekers x jobs product that
+    only touches jobs sharing at least one skill with the seeker. A job's
+    score is the fraction of its skills the seeker has.
+    """
+
+    def __init__(self, job_skills: Dict[int, Set[int]], titles: Dict[int, str]):
+        self.titles = titles
+        self.required = {job_id: len(skills) for job_id, skills in job_skills.items() if skills}
+        self.postings: Dict[int, List[int]] = {}
+        for job_id, skills in job_skills.items():
+            for skill_id in skills:
+                self.postings.setdefault(skill_id, []).append(job_id)
+
+    def __len__(self) -> int:
+        return len(self.required)
+
+    def score_chunk(
+        self,
+        seeker_skills: Dict[int, Set[int]],
+        exclude: Dict[int, Set[int]],
+        min_score: float,
+        limit: int
+    ) -> Dict[int, List[int]]:
+        """Best `limit` job IDs per seeker scoring at least `min_score`, best first"""
+        matches = {}
+        for seeker_id, skills in seeker_skills.items():
+            overlap = Counter()
+            for skill_id in skills:
+                overlap.update(self.postings.get(skill_id, ()))
+            excluded = exclude.get(seeker_id, ())
+            scored = [
+                (count / self.required[job_id], job_id)
+                for job_id, count in overlap.items()
+                if job_id not in excluded and count / self.required[job_id] >= min_score
+            ]
+            best = heapq.nlargest(limit, scored)
+            if best:
+                matches[seeker_id] = [job_id for _, job_id in best]
+        return matches
+
+class JobMatchDigest:
+    STATE_KEY = "job_match:digest:state"
+    LOCK_KEY = "job_match:digest:lock"
+
+    def __init__(
+        self,
+        chunk_size: int,
+        min_score: float,
+        max_jobs: int,
+        window_seconds: float,
+        send_batch_size: int,
+    ):
+        self.chunk_size = chunk_size
+        self.min_score = min_score
+        self.max_jobs = max_jobs
+        self.window_seconds = window_seconds
+        self.send_batch_size = send_batch_size
+
+    async def load_matrix(self, db: AsyncSession) -> OpenJobMatrix:
+        result = await db.execute(
+            select(Job.id, Job.title, JobSkill.skill_id)
+            .join(JobSkill, JobSkill.job_id == Job.id)
+            .where(Job.status == JobStatus.OPEN, Job.is_deleted == None)
+        )
+        job_skills: Dict[int, Set[int]] = {}
+        titles = {}
+        for job_id, title, skill_id in result:
+            job_skills.setdefault(job_id, set()).add(skill_id)
+            titles[job_id] = title
+        return OpenJobMatrix(job_skills, titles)
+
+    async def _seekers(self, db: AsyncSession, after: int) -> List[Tuple[int, str]]:
+        result = await db.execute(
+            select(JobSeeker.id, User.email)
+            .join(User, User.id == JobSeeker.user_id)
+            .where(
+                JobSeeker.id > after,
+                User.is_active == True
+            )
+            .order_by(JobSeeker.id)
+            .limit(self.chunk_size)
+        )
+        return result.all()
+
+    async def process_chunk(self, db: AsyncSession, matrix: OpenJobMatrix, seekers: List[Tuple[int, str]]) -> Tuple[int, int]:
+        """Score and send one chunk; returns (digests sent, jobs sent)"""
+        ids = [seeker_id for seeker_id, _ in seekers]
+        seeker_skills: Dict[int, Set[int]] = {}
+        result = await db.execute(
+            select(JobSeekerSkill.job_seeker_id, JobSeekerSkill.skill_id)
+            .where(JobSeekerSkill.job_seeker_id.in_(ids))
+        )
+        for seeker_id, skill_id in result:
+            seeker_skills.setdefault(seeker_id, set()).add(skill_id)
+        if not seeker_skills:
+            return 0, 0
+
+        exclude: Dict[int, Set[int]] = {}
+        applied = await db.execute(
+            select(Application.job_seeker_id, Application.job_id)
+            .where(Application.job_seeker_id.in_(list(seeker_skills)))
+        )
+        sent = await db.execute(
+            select(JobMatchNotification.job_seeker_id, JobMatchNotification.job_id)
+            .where(JobMatchNotification.job_seeker_id.in_(list(seeker_skills)))
+        )
+        for seeker_id, job_id in [*applied, *sent]:
+            exclude.setdefault(seeker_id, set()).add(job_id)
+
+        matches = matrix.score_chunk(seeker_skills, exclude, self.min_score, self.max_jobs)
+        if not matches:
+            return 0, 0
+        emails = dict(seekers)
+        recipients = list(matches)
+        delivered = await notification_service.send_job_match_notifications(
+            [(emails[seeker_id], [matrix.titles[job_id] for job_id in matches[seeker_id]]) for seeker_id in recipients],
+            self.send_batch_size
+        )
+        rows = [
+            {"job_seeker_id": seeker_id, "job_id": job_id}
+            for seeker_id, ok in zip(recipients, delivered) if ok
+            for job_id in matches[seeker_id]
+        ]
+        if rows:
+            await db.execute(insert(JobMatchNotification).prefix_with("IGNORE", dialect="mysql"), rows)
+            await db.commit()
+        return sum(delivered), len(rows)
+
+    async def run(self) -> dict:
+        """Continue the current cycle (or start a new one) until it completes or the window runs out"""
+        from app.db.session import AsyncSessionLocal
+
+        if not await redis_client.set(self.LOCK_KEY, os.getpid(), nx=True, ex=int(self.window_seconds) + 600):
+            return {"skipped": True}
+        try:
+            state = await redis_client.hgetall(self.STATE_KEY)
+            if state.get("status") in ("running", "paused"):
+                after = int(state.get("last_seeker_id", 0))
+                logger.info(f"Job match digest resuming cycle {state.get('cycle_started')} after seeker {after}")
+            else:
+                after = 0
+                await redis_client.delete(self.STATE_KEY)
+                await redis_client.hset(self.STATE_KEY, mapping={
+                    "cycle_started": datetime.now().isoformat(), "last_seeker_id": 0,
+                    "seekers": 0, "digests": 0, "jobs": 0
+                })
+            await redis_client.hset(self.STATE_KEY, "status", "running")
+
+            deadline = time.monotonic() + self.window_seconds
+            async with AsyncSessionLocal() as db:
+                matrix = await self.load_matrix(db)
+            logger.info(f"Job match digest: {len(matrix)} open jobs with skills")
+            while True:
+                if time.monotonic() >= deadline:
+                    status = "paused"
+                    break
+                # A session per chunk: no transaction (or snapshot) stays open for the whole window
+                async with AsyncSessionLocal() as db:
+                    seekers = await self._seekers(db, after)
+                    if not seekers:
+                        status = "completed"
+                        break
+                    digests, jobs = await self.process_chunk(db, matrix, seekers) if len(matrix) else (0, 0)
+                after = seekers[-1][0]
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.hset(self.STATE_KEY, "last_seeker_id", after)
+                pipe.hincrby(self.STATE_KEY, "seekers", len(seekers))
+                pipe.hincrby(self.STATE_KEY, "digests", digests)
+                pipe.hincrby(self.STATE_KEY, "jobs", jobs)
+                await pipe.execute()
+            await redis_client.hset(self.STATE_KEY, mapping={"status": status, "updated_at": datetime.now().isoformat()})
+            state = await redis_client.hgetall(self.STATE_KEY)
+            logger.info(f"Job match digest {status}: {state}")
+            return state
+        finally:
+            await redis_client.delete(self.LOCK_KEY)
+
+    async def state(self) -> dict:
+        return await redis_client.hgetall(self.STATE_KEY)
+
+    async def run_forever(self, hour: int):
+        """Run once a day at `hour`:00 local time"""
+        while True:
+            now = datetime.now()
+            next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            await asyncio.sleep((next_run - now).total_seconds())
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f"Job match digest failed: {str(e)}")
+
+job_match_digest = JobMatchDigest(
+    chunk_size=settings.JOB_MATCH_CHUNK_SIZE,
+    min_score=settings.JOB_MATCH_MIN_SCORE,
+    max_jobs=settings.JOB_MATCH_MAX_JOBS,
+    window_seconds=settings.JOB_MATCH_WINDOW_MINUTES * 60,
+    send_batch_size=settings.NOTIFICATION_BATCH_SIZE,
+)
+
+if __name__ == "__main__":
+    print(asyncio.run(job_match_digest.run()))
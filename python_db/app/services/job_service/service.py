@@ -45,6 +45,9 @@ class JobService:
         for s_id in skill_ids:
             job_skill = JobSkill(job_id=job.id, skill_id=s_id)
             db.add(job_skill)
+        
+        if job.status == JobStatus.OPEN:
+            self._alert_saved_searches(db, job.id)
             
         await db.commit()
         await db.refresh(job)
@@ -56,6 +59,14 @@ class JobService:
         
         return job
     
+    def _alert_saved_searches(self, db: AsyncSession, job_id: int):
+        """Alert users whose saved searches match the job, once the request's transaction commits"""
+        from app.db.session import after_commit
+        from app.services.saved_searches import send_saved_search_alerts
+        from app.services.task_queue import task_queue
+
+        after_commit(db, lambda: task_queue.enqueue(send_saved_search_alerts, job_id))
+
     async def get_job_by_id(
         self,
         db: AsyncSession,
@@ -98,16 +109,11 @@ class JobService:
         # Try cache
         # Note: In production we'd serialize the list of job models
         
-        query = select(Job).where(Job.status == JobStatus.OPEN)
-        
-        if location:
-            query = query.where(Job.location.ilike(f"%{location}%"))
-        if job_type:
-            query = query.where(Job.job_type == job_type)
-        if min_salary:
-            query = query.where(Job.salary_min >= min_salary)
-        
-        query = query.offset(skip).limit(limit)
+        query = job_repo.search_query(
+            location=location,
+            job_type=job_type,
+            min_salary=min_salary
+        ).offset(skip).limit(limit)
         result = await db.execute(query)
         jobs = result.scalars().all()
         
@@ -132,12 +138,15 @@ class JobService:
                 detail="Not authorized to modify this job"
             )
         
+        if new_status == JobStatus.OPEN and job.status != JobStatus.OPEN:
+            self._alert_saved_searches(db, job_id)
         job.status = new_status
         await db.commit()
         await db.refresh(job)
         
         # Invalidate caches
         await redis_cache.delete(f"job:detail:{job_id}")
+        await redis_cache.delete(f"jobs:open:{job_id}")
         await redis_cache.clear_cache("jobs:search:*")
         await redis_cache.delete("jobs:count:active")
         
@@ -151,7 +160,7 @@ class JobService:
         limit: int = 100
     ) -> List[Job]:
         """Get all jobs posted by a recruiter"""
-        query = select(Job).where(Job.recruiter_id == recruiter_id).offset(skip).limit(limit)
+        query = job_repo.by_recruiter_query(recruiter_id).offset(skip).limit(limit)
         result = await db.execute(query)
         return result.scalars().all()
     
@@ -163,9 +172,7 @@ class JobService:
         if cached_count is not None:
             return int(cached_count)
             
-        from sqlalchemy import func
-        query = select(func.count(Job.id)).where(Job.status == JobStatus.OPEN)
-        result = await db.execute(query)
+        result = await db.execute(job_repo.open_count_query())
         count = result.scalar()
         
         await redis_cache.set(cache_key, count, expire=600) # Cache for 10 mins
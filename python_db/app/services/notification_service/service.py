@@ -2,27 +2,56 @@
 Notification Service
 Handles email notifications, alerts, and communication
 """
-from typing import List
+from typing import List, Optional, Tuple
 from datetime import datetime
 from loguru import logger
+from app.services.notification_service.smtp import Email, get_email_backend
+from app.services.notification_service.templates import TemplateCatalog, notification_templates
 
 class NotificationService:
     """Microservice for notification and communication operations"""
     
+    def __init__(self, backend=None, templates: TemplateCatalog = notification_templates):
+        # Created on first use, inside the event loop that will use it
+        self._backend = backend
+        self.templates = templates
+    
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = get_email_backend()
+        return self._backend
+    
+    def _email(self, template: str, user_email: str, locale: Optional[str], **fields) -> Email:
+        subject, body = self.templates.render(template, locale, **fields)
+        return Email(to=[user_email], subject=subject, body=body)
+    
+    async def _deliver(self, email: Email) -> bool:
+        return (await self.backend.send_many([email]))[0]
+    
+    async def close(self):
+        if self._backend is not None:
+            await self._backend.close()
+    
     async def send_application_confirmation(
         self,
         user_email: str,
         job_title: str,
-        application_id: int
+        application_id: int,
+        locale: Optional[str] = None
     ) -> bool:
         """Send application confirmation email"""
         try:
-            # In production, integrate with email service (SendGrid, AWS SES, etc.)
-            logger.info(
-                f"[NOTIFICATION] Application confirmation sent to {user_email} "
-                f"for job '{job_title}' (Application ID: {application_id})"
-            )
-            return True
+            delivered = await self._deliver(self._email(
+                "application_confirmation", user_email, locale,
+                job_title=job_title, application_id=application_id
+            ))
+            if delivered:
+                logger.info(
+                    f"[NOTIFICATION] Application confirmation sent to {user_email} "
+                    f"for job '{job_title}' (Application ID: {application_id})"
+                )
+            return delivered
         except Exception as e:
             logger.error(f"Failed to send application confirmation: {str(e)}")
             return False
@@ -32,15 +61,21 @@ class NotificationService:
         user_email: str,
         job_title: str,
         interview_date: datetime,
-        interview_mode: str
+        interview_mode: str,
+        locale: Optional[str] = None
     ) -> bool:
         """Send interview invitation"""
         try:
-            logger.info(
-                f"[NOTIFICATION] Interview invitation sent to {user_email} "
-                f"for job '{job_title}' on {interview_date} ({interview_mode})"
-            )
-            return True
+            delivered = await self._deliver(self._email(
+                "interview_invitation", user_email, locale,
+                job_title=job_title, interview_date=interview_date, interview_mode=interview_mode.lower()
+            ))
+            if delivered:
+                logger.info(
+                    f"[NOTIFICATION] Interview invitation sent to {user_email} "
+                    f"for job '{job_title}' on {interview_date} ({interview_mode})"
+                )
+            return delivered
         except Exception as e:
             logger.error(f"Failed to send interview invitation: {str(e)}")
             return False
@@ -49,32 +84,73 @@ class NotificationService:
         self,
         user_email: str,
         job_title: str,
-        new_status: str
+        new_status: str,
+        locale: Optional[str] = None
     ) -> bool:
         """Notify user of application status change"""
         try:
-            logger.info(
-                f"[NOTIFICATION] Status update sent to {user_email} "
-                f"for job '{job_title}': {new_status}"
-            )
-            return True
+            delivered = await self._deliver(self._email(
+                "application_status_update", user_email, locale, job_title=job_title, new_status=new_status
+            ))
+            if delivered:
+                logger.info(
+                    f"[NOTIFICATION] Status update sent to {user_email} "
+                    f"for job '{job_title}': {new_status}"
+                )
+            return delivered
         except Exception as e:
             logger.error(f"Failed to send status update: {str(e)}")
             return False
     
+    async def send_application_status_updates(
+        self,
+        recipients: List[Tuple[str, str]],
+        new_status: str,
+        batch_size: int = 100,
+        locale: Optional[str] = None
+    ) -> List[bool]:
+        """
+        Notify many applicants (email, job title) of a status change, one
+        batch at a time; returns per-recipient success. Each job's message is
+        rendered once (memoized by the template catalog), and applicants of
+        the same job get the same message, so the backend sends it as one
+        shared transaction.
+        """
+        results: List[bool] = []
+        for start in range(0, len(recipients), batch_size):
+            batch = recipients[start:start + batch_size]
+            try:
+                results += await self.backend.send_many(
+                    [
+                        self._email("application_status_update", email, locale, job_title=job_title, new_status=new_status)
+                        for email, job_title in batch
+                    ],
+                    share_identical=True
+                )
+            except Exception as e:
+                logger.error(f"Failed to send status updates: {str(e)}")
+                results += [False] * len(batch)
+        logger.info(f"[NOTIFICATION] Status updates sent: {sum(results)}/{len(recipients)} ({new_status})")
+        return results
+    
     async def send_new_application_alert(
         self,
         recruiter_email: str,
         job_title: str,
-        applicant_name: str
+        applicant_name: str,
+        locale: Optional[str] = None
     ) -> bool:
         """Alert recruiter of new application"""
         try:
-            logger.info(
-                f"[NOTIFICATION] New application alert sent to {recruiter_email} "
-                f"for job '{job_title}' from {applicant_name}"
-            )
-            return True
+            delivered = await self._deliver(self._email(
+                "new_application_alert", recruiter_email, locale, job_title=job_title, applicant_name=applicant_name
+            ))
+            if delivered:
+                logger.info(
+                    f"[NOTIFICATION] New application alert sent to {recruiter_email} "
+                    f"for job '{job_title}' from {applicant_name}"
+                )
+            return delivered
         except Exception as e:
             logger.error(f"Failed to send application alert: {str(e)}")
             return False
@@ -82,30 +158,81 @@ class NotificationService:
     async def send_job_match_notification(
         self,
         user_email: str,
-        matched_jobs: List[str]
+        matched_jobs: List[str],
+        locale: Optional[str] = None
     ) -> bool:
         """Send job match recommendations"""
         try:
-            logger.info(
-                f"[NOTIFICATION] Job matches sent to {user_email}: "
-                f"{len(matched_jobs)} jobs"
-            )
-            return True
+            delivered = await self._deliver(self._job_match_email(user_email, matched_jobs, locale))
+            if delivered:
+                logger.info(
+                    f"[NOTIFICATION] Job matches sent to {user_email}: "
+                    f"{len(matched_jobs)} jobs"
+                )
+            return delivered
         except Exception as e:
             logger.error(f"Failed to send job matches: {str(e)}")
             return False
     
+    def _job_match_email(self, user_email: str, matched_jobs: List[str], locale: Optional[str]) -> Email:
+        return self._email(
+            "job_matches", user_email, locale,
+            job_count=len(matched_jobs), job_list="\n".join(f"- {title}" for title in matched_jobs)
+        )
+    
+    async def send_job_match_notifications(
+        self,
+        digests: List[Tuple[str, List[str]]],
+        batch_size: int = 100,
+        locale: Optional[str] = None
+    ) -> List[bool]:
+        """Send many job match digests (email, matched job titles), one batch at a time; returns per-digest success"""
+        results: List[bool] = []
+        for start in range(0, len(digests), batch_size):
+            batch = digests[start:start + batch_size]
+            try:
+                results += await self.backend.send_many(
+                    [self._job_match_email(email, titles, locale) for email, titles in batch]
+                )
+            except Exception as e:
+                logger.error(f"Failed to send job match digests: {str(e)}")
+                results += [False] * len(batch)
+        logger.info(f"[NOTIFICATION] Job match digests sent: {sum(results)}/{len(digests)}")
+        return results
+    
+    async def send_saved_search_alert(
+        self,
+        user_email: str,
+        job_title: str,
+        location: str,
+        locale: Optional[str] = None
+    ) -> bool:
+        """Alert a user that a job matching one of their saved searches was posted"""
+        try:
+            delivered = await self._deliver(self._email(
+                "saved_search_alert", user_email, locale, job_title=job_title, location=location
+            ))
+            if delivered:
+                logger.info(f"[NOTIFICATION] Saved search alert sent to {user_email} for job '{job_title}'")
+            return delivered
+        except Exception as e:
+            logger.error(f"Failed to send saved search alert: {str(e)}")
+            return False
+    
     async def send_welcome_email(
         self,
         user_email: str,
-        user_name: str
+        user_name: str,
+        locale: Optional[str] = None
     ) -> bool:
         """Send welcome email to new user"""
         try:
-            logger.info(
-                f"[NOTIFICATION] Welcome email sent to {user_email} ({user_name})"
-            )
-            return True
+            delivered = await self._deliver(self._email("welcome", user_email, locale, user_name=user_name))
+            if delivered:
+                logger.info(
+                    f"[NOTIFICATION] Welcome email sent to {user_email} ({user_name})"
+                )
+            return delivered
         except Exception as e:
             logger.error(f"Failed to send welcome email: {str(e)}")
             return False
@@ -0,0 +1,346 @@
+"""
+Email Delivery
+Backends behind NotificationService: a pooled, pipelining SMTP client and a
+log-only backend for development
+"""
+import asyncio
+import base64
+import logging
+import ssl
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from email import policy
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Email:
+    to: List[str]
+    subject: str
+    body: str
+
+class SMTPError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.message = message
+
+def build_message(email: Email, sender: str) -> bytes:
+    message = EmailMessage()
+    message["From"] = sender
+    # Messages shared by several recipients must not disclose them to each other
+    message["To"] = email.to[0] if len(email.to) == 1 else "undisclosed-recipients:;"
+    message["Subject"] = email.subject
+    message["Date"] = formatdate(localtime=True)
+    message["Message-ID"] = make_msgid()
+    message.set_content(email.body)
+    return message.as_bytes(policy=policy.SMTP)
+
+def _dot_stuff(data: bytes) -> bytes:
+    if data.startswith(b"."):
+        data = b"." + data
+    data = data.replace(b"\r\n.", b"\r\n..")
+    if not data.endswith(b"\r\n"):
+        data += b"\r\n"
+    return data + b".\r\n"
+
+class SMTPConnection:
+    """
+    One SMTP session. With the server's PIPELINING extension (RFC 2920) the
+    envelope of a message (MAIL FROM, every RCPT TO and DATA) goes out in a
+    single write, so a message costs two round trips however many
+    recipients it has.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float, local_hostname: str = "localhost"):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.local_hostname = local_hostname
+        self.extensions: Dict[str, str] = {}
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+    async def connect(
+        self,
+        use_tls: bool = False,
+        starttls: bool = False,
+        username: str = "",
+        password: str = ""
+    ):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ssl.create_default_context() if use_tls else None),
+            self.timeout
+        )
+        await self._expect(220)
+        await self._ehlo()
+        if starttls:
+            await self._command("STARTTLS", 220)
+            await self.writer.start_tls(ssl.create_default_context(), server_hostname=self.host)
+            await self._ehlo()
+        if username:
+            token = base64.b64encode(f"\0{username}\0{password}".encode()).decode()
+            await self._command(f"AUTH PLAIN {token}", 235)
+
+    async def _read_reply(self) -> Tuple[int, str]:
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+            if not line:
+                raise ConnectionError("SMTP server closed the connection")
+            line = line.decode("utf-8", "replace").rstrip("\r\n")
+            lines.append(line[4:])
+            if len(line) < 4 or line[3] != "-":
+                return int(line[:3]), "\n".join(lines)
+
+    async def _expect(self, *codes: int) -> str:
+        code, text = await self._read_reply()
+        if code not in codes:
+            raise SMTPError(code, text)
+        return text
+
+    async def _write(self, data: bytes):
+        self.writer.write(data)
+        await asyncio.wait_for(self.writer.drain(), self.timeout)
+
+    async def _command(self, line: str, *codes: int) -> str:
+        await self._write(line.encode() + b"\r\n")
+        return await self._expect(*codes)
+
+    async def _ehlo(self):
+        text = await self._command(f"EHLO {self.local_hostname}", 250)
+        self.extensions = {}
+        for line in text.split("\n")[1:]:
+            keyword, _, params = line.partition(" ")
+            self.extensions[keyword.upper()] = params
+
+    async def send(self, sender: str, recipients: Sequence[str], data: bytes) -> List[str]:
+        """Run one mail transaction; returns the recipients the server refused"""
+        commands = [f"MAIL FROM:<{sender}>"] + [f"RCPT TO:<{r}>" for r in recipients] + ["DATA"]
+        if "PIPELINING" in self.extensions:
+            await self._write("".join(f"{command}\r\n" for command in commands).encode())
+            replies = [await self._read_reply() for _ in commands]
+        else:
+            replies = []
+            for command in commands:
+                await self._write(command.encode() + b"\r\n")
+                replies.append(await self._read_reply())
+        self.last_used = time.monotonic()
+
+        mail_code, mail_text = replies[0]
+        refused = [r for r, (code, _) in zip(recipients, replies[1:-1]) if code not in (250, 251)]
+        data_code, data_text = replies[-1]
+        if data_code == 354:
+            if mail_code != 250 or len(refused) == len(recipients):
+                # Nobody to deliver to: end the (empty) message and give up
+                await self._write(b".\r\n")
+                await self._read_reply()
+            else:
+                await self._write(_dot_stuff(data))
+                await self._expect(250)
+                self.messages += 1
+                return refused
+        else:
+            await self._command("RSET", 250)
+        if mail_code != 250:
+            raise SMTPError(mail_code, mail_text)
+        if len(refused) == len(recipients):
+            code, text = next(reply for reply in replies[1:-1] if reply[0] not in (250, 251))
+            raise SMTPError(code, text)
+        raise SMTPError(data_code, data_text)
+
+    async def close(self):
+        if self.writer is None:
+            return
+        try:
+            self.writer.write(b"QUIT\r\n")
+            await asyncio.wait_for(self.writer.drain(), 1)
+        except Exception:
+            pass
+        self.writer.close()
+        self.writer = None
+
+class SMTPPool:
+    """
+    Up to `size` persistent SMTP sessions. A session is reused until it has
+    carried `max_messages` messages or sat idle for `idle_timeout` seconds,
+    so the TCP/TLS handshake, EHLO and AUTH are paid once per session
+    rather than once per message.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int,
+        timeout: float,
+        max_messages: int,
+        idle_timeout: float,
+        use_tls: bool = False,
+        starttls: bool = False,
+        username: str = "",
+        password: str = "",
+    ):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.use_tls = use_tls
+        self.starttls = starttls
+        self.username = username
+        self.password = password
+        self._idle: List[SMTPConnection] = []
+        self._slots = asyncio.Semaphore(size)
+        # Metrics
+        self.opened = 0
+        self.reused = 0
+
+    async def _open(self) -> SMTPConnection:
+        connection = SMTPConnection(self.host, self.port, self.timeout)
+        try:
+            await connection.connect(self.use_tls, self.starttls, self.username, self.password)
+        except BaseException:
+            await connection.close()
+            raise
+        self.opened += 1
+        return connection
+
+    @asynccontextmanager
+    async def connection(self):
+        """A session for the caller's exclusive use; dropped instead of reused if the caller fails"""
+        async with self._slots:
+            connection = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if time.monotonic() - candidate.last_used < self.idle_timeout:
+                    connection = candidate
+                    self.reused += 1
+                    break
+                await candidate.close()
+            if connection is None:
+                connection = await self._open()
+            try:
+                yield connection
+            except BaseException:
+                await connection.close()
+                raise
+            if connection.messages >= self.max_messages:
+                await connection.close()
+            else:
+                self._idle.append(connection)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await connection.close()
+
+    def stats(self) -> dict:
+        return {"size": self.size, "idle": len(self._idle), "opened": self.opened, "reused": self.reused}
+
+class SMTPBackend:
+    """
+    Sends batches over an SMTPPool: one worker per pooled session, each
+    taking messages off the batch until it is empty. With `share_identical`,
+    messages whose subject and body match go out as one transaction with up
+    to `max_recipients` RCPT TOs.
+    """
+
+    def __init__(self, pool: SMTPPool, sender: str, max_recipients: int):
+        self.pool = pool
+        self.sender = sender
+        self.max_recipients = max_recipients
+
+    def _transactions(self, emails: Sequence[Email], share_identical: bool) -> List[Tuple[Email, List[int]]]:
+        """(message, indices of the emails it delivers) per mail transaction"""
+        if not share_identical:
+            return [(email, [index]) for index, email in enumerate(emails)]
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for index, email in enumerate(emails):
+            groups.setdefault((email.subject, email.body), []).append(index)
+        transactions = []
+        for (subject, body), indices in groups.items():
+            for start in range(0, len(indices), self.max_recipients):
+                chunk = indices[start:start + self.max_recipients]
+                recipients = [address for index in chunk for address in emails[index].to]
+                transactions.append((Email(to=recipients, subject=subject, body=body), chunk))
+        return transactions
+
+    async def _send(self, connection: SMTPConnection, email: Email) -> List[str]:
+        return await connection.send(self.sender, email.to, build_message(email, self.sender))
+
+    async def send_many(self, emails: Sequence[Email], share_identical: bool = False) -> List[bool]:
+        """Deliver `emails`; returns whether each was accepted for all of its recipients"""
+        results = [False] * len(emails)
+        transactions = self._transactions(emails, share_identical)
+        # (message, email indices, attempt), popped from the end
+        queue = [(email, indices, 0) for email, indices in reversed(transactions)]
+
+        async def worker():
+            while queue:
+                current = None
+                try:
+                    async with self.pool.connection() as connection:
+                        while queue and connection.messages < self.pool.max_messages:
+                            current = queue.pop()
+                            email, indices, _ = current
+                            try:
+                                refused = await self._send(connection, email)
+                            except SMTPError as e:
+                                logger.error(f"SMTP rejected '{email.subject}' to {len(email.to)} recipients: {str(e)}")
+                                current = None
+                                continue
+                            current = None
+                            for index in indices:
+                                results[index] = not any(address in refused for address in emails[index].to)
+                except (OSError, asyncio.TimeoutError, SMTPError) as e:
+                    logger.error(f"SMTP session failed: {str(e)}")
+                    if current is None:
+                        # Could not open a session: leave the rest to the other workers
+                        return
+                    email, indices, attempt = current
+                    if attempt == 0:
+                        # Pooled sessions may have been closed by the server: retry once on a new one
+                        queue.append((email, indices, 1))
+
+        await asyncio.gather(*(worker() for _ in range(min(self.pool.size, len(transactions)))))
+        return results
+
+    async def close(self):
+        await self.pool.close()
+
+class LogBackend:
+    """Development backend: nothing is sent, NotificationService's log lines are the output"""
+
+    async def send_many(self, emails: Sequence[Email], share_identical: bool = False) -> List[bool]:
+        for email in emails:
+            logger.debug(f"[EMAIL] To: {', '.join(email.to)} | Subject: {email.subject}")
+        return [True] * len(emails)
+
+    async def close(self):
+        pass
+
+def get_email_backend():
+    if settings.EMAIL_BACKEND == "smtp":
+        pool = SMTPPool(
+            host=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            size=settings.SMTP_POOL_SIZE,
+            timeout=settings.SMTP_TIMEOUT_SECONDS,
+            max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+            idle_timeout=settings.SMTP_IDLE_SECONDS,
+            use_tls=settings.SMTP_USE_TLS,
+            starttls=settings.SMTP_STARTTLS,
+            username=settings.SMTP_USERNAME,
+            password=settings.SMTP_PASSWORD,
+        )
+        return SMTPBackend(pool, sender=settings.EMAIL_FROM, max_recipients=settings.SMTP_MAX_RECIPIENTS)
+    return LogBackend()
@@ -0,0 +1,220 @@
+"""
+Notification Templates
+Compiled once at import (startup); rendered per locale with the shared
+part of bulk messages memoized
+"""
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from app.core.config import settings
+
+# name -> fields shared by every recipient of a bulk send, and the
+# (subject, body) of each locale. Every locale must use the same fields.
+TEMPLATES = {
+    "application_confirmation": {
+        "shared": ("job_title",),
+        "locales": {
+            "en": (
+                "Application received: {job_title}",
+                "Thank you for applying to '{job_title}'.\n\n"
+                "Your application ID is {application_id}. We will let you know when its status changes.",
+            ),
+            "es": (
+                "Solicitud recibida: {job_title}",
+                "Gracias por postularte a '{job_title}'.\n\n"
+                "El ID de tu solicitud es {application_id}. Te avisaremos cuando cambie su estado.",
+            ),
+        },
+    },
+    "interview_invitation": {
+        "shared": ("job_title", "interview_date", "interview_mode"),
+        "locales": {
+            "en": (
+                "Interview invitation: {job_title}",
+                "You are invited to an {interview_mode} interview for '{job_title}' on {interview_date:%Y-%m-%d %H:%M}.",
+            ),
+            "es": (
+                "Invitación a entrevista: {job_title}",
+                "Te invitamos a una entrevista ({interview_mode}) para '{job_title}' el {interview_date:%d/%m/%Y %H:%M}.",
+            ),
+        },
+    },
+    "application_status_update": {
+        "shared": ("job_title", "new_status"),
+        "locales": {
+            "en": (
+                "Application update: {job_title}",
+                "The status of your application for '{job_title}' is now {new_status}.",
+            ),
+            "es": (
+                "Actualización de tu solicitud: {job_title}",
+                "El estado de tu solicitud para '{job_title}' ahora es {new_status}.",
+            ),
+        },
+    },
+    "new_application_alert": {
+        "shared": ("job_title",),
+        "locales": {
+            "en": (
+                "New application: {job_title}",
+                "{applicant_name} has applied to '{job_title}'.",
+            ),
+            "es": (
+                "Nueva solicitud: {job_title}",
+                "{applicant_name} se ha postulado a '{job_title}'.",
+            ),
+        },
+    },
+    "job_matches": {
+        "shared": (),
+        "locales": {
+            "en": (
+                "{job_count} new jobs match your profile",
+                "Jobs matching your skills:\n\n{job_list}",
+            ),
+            "es": (
+                "{job_count} nuevas ofertas encajan con tu perfil",
+                "Ofertas que encajan con tus habilidades:\n\n{job_list}",
+            ),
+        },
+    },
+    "saved_search_alert": {
+        "shared": ("job_title", "location"),
+        "locales": {
+            "en": (
+                "New job for your saved search: {job_title}",
+                "A new job matching your saved search was posted: '{job_title}' in {location}.",
+            ),
+            "es": (
+                "Nueva oferta para tu búsqueda guardada: {job_title}",
+                "Se ha publicado una oferta que encaja con tu búsqueda guardada: '{job_title}' en {location}.",
+            ),
+        },
+    },
+    "welcome": {
+        "shared": (),
+        "locales": {
+            "en": (
+                "Welcome to the Job Portal",
+                "Hi {user_name},\n\nYour account is ready. Complete your profile to start applying.",
+            ),
+            "es": (
+                "Bienvenido al Portal de Empleo",
+                "Hola {user_name}:\n\nTu cuenta está lista. Completa tu perfil para empezar a postularte.",
+            ),
+        },
+    },
+}
+
+class CompiledTemplate:
+    """A format string split once into literal text and (field, format spec) slots"""
+
+    def __init__(self, parts: List[Tuple[str, Optional[str], str]]):
+        # (literal, field or None, format spec)
+        self.parts = parts
+        self.fields: FrozenSet[str] = frozenset(field for _, field, _ in parts if field is not None)
+
+    @classmethod
+    def compile(cls, source: str) -> "CompiledTemplate":
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if field is not None and (not field.isidentifier() or conversion):
+                raise ValueError(f"Unsupported template field {{{field}}} in {source!r}")
+            parts.append((literal, field, spec or ""))
+        return cls(parts)
+
+    def partial(self, values: dict) -> "CompiledTemplate":
+        """Substitute the fields present in `values`, keeping the others as slots"""
+        parts = []
+        pending = ""
+        for literal, field, spec in self.parts:
+            pending += literal
+            if field is None:
+                continue
+            if field in values:
+                pending += format(values[field], spec)
+            else:
+                parts.append((pending, field, spec))
+                pending = ""
+        if pending:
+            parts.append((pending, None, ""))
+        return CompiledTemplate(parts)
+
+    def render(self, values: dict) -> str:
+        return "".join(
+            literal if field is None else literal + format(values[field], spec)
+            for literal, field, spec in self.parts
+        )
+
+class BoundTemplate:
+    """A template with its shared fields rendered; only per-recipient fields are left"""
+
+    def __init__(self, subject: CompiledTemplate, body: CompiledTemplate):
+        self.subject = subject
+        self.body = body
+
+    def render(self, **fields) -> Tuple[str, str]:
+        return self.subject.render(fields), self.body.render(fields)
+
+class TemplateCatalog:
+    """
+    Compiles every template and locale variant up front, so a field that is
+    misspelt in one translation fails at startup rather than on a send.
+    Locales fall back from "es-MX" to "es" to `default_locale`.
+
+    `bind` renders the shared fields of a template (e.g. the job title of a
+    bulk status update) and memoizes the result in an LRU of `cache_size`
+    entries, so sending the same update to 10k applicants renders it once
+    and then only substitutes each recipient's fields.
+    """
+
+    def __init__(self, templates: dict, default_locale: str, cache_size: int):
+        self.default_locale = default_locale
+        self._templates: Dict[Tuple[str, str], Tuple[CompiledTemplate, CompiledTemplate]] = {}
+        self._shared: Dict[str, FrozenSet[str]] = {}
+        for name, definition in templates.items():
+            self._shared[name] = frozenset(definition["shared"])
+            fields = None
+            for locale, (subject, body) in definition["locales"].items():
+                compiled = (CompiledTemplate.compile(subject), CompiledTemplate.compile(body))
+                locale_fields = compiled[0].fields | compiled[1].fields
+                if fields is not None and locale_fields != fields:
+                    raise ValueError(f"Template {name} ({locale}) uses fields {sorted(locale_fields)}, expected {sorted(fields)}")
+                fields = locale_fields
+                self._templates[(name, locale)] = compiled
+            if (name, default_locale) not in self._templates:
+                raise ValueError(f"Template {name} has no {default_locale} variant")
+        self._bind = lru_cache(maxsize=cache_size)(self._bind_uncached)
+
+    def resolve_locale(self, name: str, locale: Optional[str]) -> str:
+        if locale:
+            candidate = locale.replace("_", "-").lower()
+            while candidate:
+                if (name, candidate) in self._templates:
+                    return candidate
+                candidate = candidate.rpartition("-")[0]
+        return self.default_locale
+
+    def _bind_uncached(self, name: str, locale: str, shared: FrozenSet[Tuple[str, object]]) -> BoundTemplate:
+        subject, body = self._templates[(name, locale)]
+        values = dict(shared)
+        return BoundTemplate(subject.partial(values), body.partial(values))
+
+    def bind(self, name: str, locale: Optional[str] = None, **shared) -> BoundTemplate:
+        return self._bind(name, self.resolve_locale(name, locale), frozenset(shared.items()))
+
+    def render(self, name: str, locale: Optional[str] = None, **fields) -> Tuple[str, str]:
+        """(subject, body); the template's shared fields go through the memoized bind"""
+        shared_names = self._shared[name]
+        shared = {field: value for field, value in fields.items() if field in shared_names}
+        own = {field: value for field, value in fields.items() if field not in shared_names}
+        return self.bind(name, locale, **shared).render(**own)
+
+    def cache_info(self):
+        return self._bind.cache_info()
+
+notification_templates = TemplateCatalog(
+    TEMPLATES,
+    default_locale=settings.NOTIFICATION_DEFAULT_LOCALE,
+    cache_size=settings.NOTIFICATION_TEMPLATE_CACHE_SIZE,
+)
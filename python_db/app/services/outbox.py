@@ -0,0 +1,341 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.models import NotificationOutbox, OutboxStatus
+from app.services.notification_service.service import NotificationService, notification_service
+
+logger = logging.getLogger(__name__)
+
+def outbox_row(notification: str, **payload) -> dict:
+    """Values for one outbox row: a NotificationService method and its keyword arguments"""
+    if not notification.startswith("send_") or not hasattr(NotificationService, notification):
+        raise ValueError(f"Unknown notification: {notification}")
+    return {"notification": notification, "payload": payload, "status": OutboxStatus.PENDING, "attempts": 0}
+
+def add_notification(db: AsyncSession, notification: str, **payload):
+    """Queue a notification; it is committed (or rolled back) with the caller's transaction"""
+    db.add(NotificationOutbox(**outbox_row(notification, **payload)))
+
+class OutboxLease:
+    """
+    The rows claimed by one dispatch round, and until when they are ours:
+    their `available_at` is `until` for as long as no other dispatcher
+    has re-claimed them.
+    """
+
+    def __init__(self, ids, until: datetime):
+        self.ids = set(ids)
+        self.until = until
+
+    def holds(self, row_id: int) -> bool:
+        return row_id in self.ids and datetime.now() < self.until
+
+class OutboxDispatcher:
+    """
+    Delivers notification_outbox rows.
+
+    Every worker runs a dispatcher. Each round claims up to `batch_size` due
+    rows with SELECT ... FOR UPDATE SKIP LOCKED, so dispatchers never wait
+    on each other, and pushes their `available_at` forward by `lease`
+    seconds before committing, so the row locks are held for milliseconds
+    rather than for the whole delivery. The claimed notifications are sent
+    with at most `concurrency` in flight and then marked SENT; failures are
+    retried with exponential backoff and marked FAILED after
+    `max_attempts`. Rows claimed by a worker that died become due again
+    when the lease runs out, so delivery is at-least-once. While a round
+    is sending, its lease is renewed every `lease / 3` seconds, so a slow
+    batch is not re-claimed (and sent twice) by another dispatcher; rows
+    whose lease was lost anyway are neither sent nor marked by this round.
+
+    Status updates claimed together (typically queued by one bulk status
+    change) are sent through NotificationService.send_application_status_updates,
+    one call per status, so applicants of the same job share one message.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        concurrency: int,
+        poll_interval: float,
+        max_attempts: int,
+        lease: float,
+        retention_hours: float,
+        service: NotificationService = notification_service,
+    ):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.retention_hours = retention_hours
+        self.service = service
+        self._task: Optional[asyncio.Task] = None
+        self._last_purge = time.monotonic()
+        # Metrics
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds before attempt `attempts + 1`: 30s, 1m, 2m, ... capped at an hour"""
+        return min(30 * 2 ** (attempts - 1), 3600)
+
+    def _lease_until(self) -> datetime:
+        # Whole seconds, as stored by DATETIME, so the lease can be compared with the column
+        return (datetime.now() + timedelta(seconds=self.lease)).replace(microsecond=0)
+
+    async def claim(self, db: AsyncSession) -> Tuple[List[NotificationOutbox], OutboxLease]:
+        now = datetime.now()
+        until = self._lease_until()
+        result = await db.execute(
+            select(NotificationOutbox)
+            .where(NotificationOutbox.status == OutboxStatus.PENDING, NotificationOutbox.available_at <= now)
+            .order_by(NotificationOutbox.available_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = result.scalars().all()
+        if rows:
+            await db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_([row.id for row in rows]))
+                .values(
+                    available_at=until,
+                    attempts=NotificationOutbox.attempts + 1,
+                    updated_at=func.now()
+                )
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        return rows, OutboxLease([row.id for row in rows], until)
+
+    async def renew(self, lease: OutboxLease, stop: asyncio.Event):
+        """Extend `lease` every lease / 3 seconds until `stop` is set, dropping rows re-claimed meanwhile"""
+        from app.db.session import AsyncSessionLocal
+
+        while True:
+            try:
+                await asyncio.wait_for(stop.wait(), self.lease / 3)
+                return
+            except asyncio.TimeoutError:
+                pass
+            until = self._lease_until()
+            try:
+                async with AsyncSessionLocal() as db:
+                    ids = list(lease.ids)
+                    await db.execute(
+                        update(NotificationOutbox)
+                        .where(NotificationOutbox.id.in_(ids), NotificationOutbox.available_at == lease.until)
+                        .values(available_at=until, updated_at=func.now())
+                        .execution_options(synchronize_session=False)
+                    )
+                    result = await db.execute(
+                        select(NotificationOutbox.id)
+                        .where(NotificationOutbox.id.in_(ids), NotificationOutbox.available_at == until)
+                    )
+                    owned = set(result.scalars().all())
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Notification outbox lease renewal failed: {str(e)}")
+                continue
+            if len(owned) < len(lease.ids):
+                logger.warning(f"Notification outbox: lease lost on {len(lease.ids) - len(owned)} rows")
+            lease.ids, lease.until = owned, until
+
+    async def deliver(
+        self, rows: List[NotificationOutbox], lease: Optional[OutboxLease] = None
+    ) -> Tuple[List[int], Dict[int, str]]:
+        """Send the claimed rows (those still held under `lease`); returns the sent IDs and an error per failed ID"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        sent: List[int] = []
+        errors: Dict[int, str] = {}
+
+        def held(row: NotificationOutbox) -> bool:
+            return lease is None or lease.holds(row.id)
+
+        async def send(row: NotificationOutbox):
+            async with semaphore:
+                if not held(row):
+                    return
+                try:
+                    if await getattr(self.service, row.notification)(**row.payload):
+                        sent.append(row.id)
+                    else:
+                        errors[row.id] = f"{row.notification} reported failure"
+                except Exception as e:
+                    errors[row.id] = str(e)
+
+        async def send_status_updates(group: List[NotificationOutbox]):
+            async with semaphore:
+                group = [row for row in group if held(row)]
+                if not group:
+                    return
+                payload = group[0].payload
+                try:
+                    results = await self.service.send_application_status_updates(
+                        [(row.payload["user_email"], row.payload["job_title"]) for row in group],
+                        payload["new_status"],
+                        batch_size=self.batch_size,
+                        locale=payload.get("locale")
+                    )
+                except Exception as e:
+                    errors.update((row.id, str(e)) for row in group)
+                    return
+                for row, delivered in zip(group, results):
+                    if delivered:
+                        sent.append(row.id)
+                    else:
+                        errors[row.id] = f"{row.notification} reported failure"
+
+        singles = []
+        status_updates: Dict[Tuple[str, Optional[str]], List[NotificationOutbox]] = {}
+        for row in rows:
+            if row.notification == "send_application_status_update":
+                status_updates.setdefault((row.payload["new_status"], row.payload.get("locale")), []).append(row)
+            else:
+                singles.append(row)
+        await asyncio.gather(
+            *(send(row) for row in singles),
+            *(send_status_updates(group) for group in status_updates.values())
+        )
+        return sent, errors
+
+    async def record(
+        self,
+        db: AsyncSession,
+        rows: List[NotificationOutbox],
+        sent: List[int],
+        errors: Dict[int, str],
+        lease: OutboxLease,
+    ):
+        """Mark the outcome of the rows still held under `lease`; re-claimed rows belong to their new dispatcher"""
+        now = datetime.now()
+        held = NotificationOutbox.available_at == lease.until
+        marked = 0
+        if sent:
+            result = await db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_(sent), held)
+                .values(status=OutboxStatus.SENT, sent_at=now, last_error=None, updated_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+            marked = result.rowcount
+        for row in rows:
+            if row.id not in errors:
+                continue
+            attempts = row.attempts + 1
+            if attempts >= self.max_attempts:
+                values = {"status": OutboxStatus.FAILED}
+                self.failed += 1
+                logger.error(f"Notification {row.id} ({row.notification}) failed {attempts} times: {errors[row.id]}")
+            else:
+                values = {"available_at": now + timedelta(seconds=self.retry_delay(attempts))}
+                self.retried += 1
+            await db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == row.id, held)
+                .values(last_error=errors[row.id][:1000], updated_at=func.now(), **values)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        self.sent += marked
+
+    async def dispatch_once(self) -> int:
+        """Claim, send and record one batch; returns the number of rows claimed"""
+        from app.db.session import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            rows, lease = await self.claim(db)
+            if not rows:
+                return 0
+            stop = asyncio.Event()
+            renewal = asyncio.create_task(self.renew(lease, stop))
+            try:
+                sent, errors = await self.deliver(rows, lease)
+            finally:
+                # Not cancelled: a renewal in progress must finish so lease.until matches the rows
+                stop.set()
+                await renewal
+            await self.record(db, rows, sent, errors, lease)
+        self.batches += 1
+        return len(rows)
+
+    async def purge(self) -> int:
+        """Delete rows sent more than `retention_hours` ago"""
+        from app.db.session import AsyncSessionLocal
+
+        cutoff = datetime.now() - timedelta(hours=self.retention_hours)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(NotificationOutbox)
+                .where(NotificationOutbox.status == OutboxStatus.SENT, NotificationOutbox.sent_at < cutoff)
+            )
+            await db.commit()
+        return result.rowcount
+
+    async def run(self):
+        logger.info("Notification outbox dispatcher started")
+        while True:
+            try:
+                claimed = await self.dispatch_once()
+                if time.monotonic() - self._last_purge >= 3600:
+                    self._last_purge = time.monotonic()
+                    purged = await self.purge()
+                    if purged:
+                        logger.info(f"Notification outbox: purged {purged} sent rows")
+                # A full batch means more are probably due: go again straight away
+                if claimed < self.batch_size:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification outbox dispatch failed: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def stats(self, db: AsyncSession) -> dict:
+        result = await db.execute(
+            select(NotificationOutbox.status, func.count(), func.min(NotificationOutbox.available_at))
+            .group_by(NotificationOutbox.status)
+        )
+        counts = {}
+        oldest_due = None
+        for row_status, count, first_due in result:
+            counts[row_status.value] = count
+            if row_status == OutboxStatus.PENDING:
+                oldest_due = first_due
+        return {
+            "rows": counts,
+            "oldest_pending_due": oldest_due,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+outbox_dispatcher = OutboxDispatcher(
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    concurrency=settings.OUTBOX_CONCURRENCY,
+    poll_interval=settings.OUTBOX_POLL_SECONDS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    lease=settings.OUTBOX_LEASE_SECONDS,
+    retention_hours=settings.OUTBOX_RETENTION_HOURS,
+)
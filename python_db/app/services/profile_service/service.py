@@ -9,6 +9,7 @@ from app.repositories.profiles import job_seeker_repo, recruiter_repo
 from app.models.models import JobSeeker, Recruiter, User, UserRole
 from app.schemas.profile import JobSeekerCreate, JobSeekerUpdate, RecruiterCreate, RecruiterUpdate
 from fastapi import HTTPException, status
+from app.services.outbox import add_notification
 
 class ProfileService:
     """Microservice for profile management operations"""
@@ -19,7 +20,7 @@ class ProfileService:
         profile_data: JobSeekerCreate,
         user_id: int
     ) -> JobSeeker:
-        """Create job seeker profile"""
+        """Create job seeker profile and queue a welcome email"""
         # Check if profile already exists
         query = select(JobSeeker).where(JobSeeker.user_id == user_id)
         result = await db.execute(query)
@@ -43,6 +44,7 @@ class ProfileService:
             )
         
         profile = await job_seeker_repo.create(db, obj_in=profile_data)
+        add_notification(db, "send_welcome_email", user_email=user_record.email, user_name=profile.full_name)
         return profile
     
     async def create_recruiter_profile(
@@ -51,7 +53,7 @@ class ProfileService:
         profile_data: RecruiterCreate,
         user_id: int
     ) -> Recruiter:
-        """Create recruiter profile"""
+        """Create recruiter profile and queue a welcome email"""
         # Check if profile already exists
         query = select(Recruiter).where(Recruiter.user_id == user_id)
         result = await db.execute(query)
@@ -75,6 +77,7 @@ class ProfileService:
             )
         
         profile = await recruiter_repo.create(db, obj_in=profile_data)
+        add_notification(db, "send_welcome_email", user_email=user_record.email, user_name=profile.company_name)
         return profile
     
     async def get_job_seeker_by_user(
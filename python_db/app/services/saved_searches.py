@@ -0,0 +1,315 @@
+"""
+Saved-search alerts: users save a search (location, job type, minimum
+salary, skills) and are e-mailed when a matching job is posted.
+
+Matching runs in reverse (a percolator): rather than evaluating every saved
+search against a new job, the searches are indexed in Redis and the job
+looks up the few buckets that can contain its matches. It runs in the
+send_saved_search_alerts task, queued whenever a job becomes OPEN, so a
+failed percolation is retried rather than losing the job's alerts.
+"""
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.models.models import Job, JobSkill, JobStatus, NotificationOutbox, SavedSearch, SavedSearchSkill, User
+from app.repositories.job import job_repo
+from app.repositories.saved_search import saved_search_repo
+from app.schemas.saved_search import SavedSearchCreate
+from app.services.outbox import outbox_row
+from app.services.task_queue import task_queue
+
+logger = logging.getLogger(__name__)
+
+def location_terms(location: Optional[str]) -> FrozenSet[str]:
+    """Lower-cased words of a location: "San Francisco, CA" -> {"san", "francisco", "ca"}"""
+    return frozenset(re.findall(r"\w+", location.lower())) if location else frozenset()
+
+@dataclass(frozen=True)
+class Criteria:
+    """
+    A saved search, or the same attributes of a job. A search matches a job
+    when each criterion it sets is met: same job type, every location word
+    and skill present in the job, and the job's salary_min at least
+    min_salary (as in GET /jobs/search).
+    """
+    job_type: Optional[str]
+    location: FrozenSet[str]
+    min_salary: int
+    skills: FrozenSet[int]
+
+    @classmethod
+    def of_search(cls, search: SavedSearch, skill_ids) -> "Criteria":
+        return cls(
+            job_type=search.job_type.value if search.job_type else None,
+            location=location_terms(search.location),
+            min_salary=search.min_salary or 0,
+            skills=frozenset(skill_ids),
+        )
+
+    @classmethod
+    def of_job(cls, job: Job, skill_ids) -> "Criteria":
+        return cls(
+            job_type=job.job_type.value if job.job_type else None,
+            location=location_terms(job.location),
+            min_salary=job.salary_min or 0,
+            skills=frozenset(skill_ids),
+        )
+
+    def anchor(self) -> str:
+        """
+        The one term a search is indexed under. Any job it matches has that
+        term, so the job finds it by looking up its own terms. Skills are
+        the most selective, then location words.
+        """
+        if self.skills:
+            return f"skill:{min(self.skills)}"
+        if self.location:
+            return f"loc:{max(sorted(self.location), key=len)}"
+        return "any"
+
+    def terms(self) -> List[str]:
+        """Every anchor a search matching this job can have"""
+        return [f"skill:{skill_id}" for skill_id in self.skills] + [f"loc:{word}" for word in self.location] + ["any"]
+
+    def matches(self, job: "Criteria") -> bool:
+        return (
+            (self.job_type is None or self.job_type == job.job_type)
+            and self.min_salary <= job.min_salary
+            and self.skills <= job.skills
+            and self.location <= job.location
+        )
+
+    def dumps(self) -> str:
+        return json.dumps([self.job_type, sorted(self.location), self.min_salary, sorted(self.skills)])
+
+    @classmethod
+    def loads(cls, raw: str) -> "Criteria":
+        job_type, location, min_salary, skills = json.loads(raw)
+        return cls(job_type, frozenset(location), min_salary, frozenset(skills))
+
+class SavedSearchIndex:
+    """
+    Percolator over saved searches, shared by all workers through Redis.
+
+    Each search sits in one bucket, a sorted set keyed by its job type (or
+    "*") and its anchor term, scored by its minimum salary. A new job reads
+    the buckets of its job type and "*" for each of its terms, only up to
+    its own salary (ZRANGEBYSCORE), in one pipeline. It then checks the
+    remaining criteria of those candidates, read in one HMGET. The work is
+    proportional to the candidates in the job's buckets, however many
+    searches are saved.
+
+    The index is rebuilt from the database when the BUILT_KEY marker is
+    missing (first start, Redis flushed).
+    """
+    CRITERIA_KEY = "saved_search:criteria"
+    BUILT_KEY = "saved_search:built"
+    LOCK_KEY = "saved_search:rebuild:lock"
+
+    def bucket(self, job_type: Optional[str], term: str) -> str:
+        return f"saved_search:bucket:{job_type or '*'}:{term}"
+
+    def _add(self, pipe, search_id: int, criteria: Criteria):
+        pipe.hset(self.CRITERIA_KEY, search_id, criteria.dumps())
+        pipe.zadd(self.bucket(criteria.job_type, criteria.anchor()), {search_id: criteria.min_salary})
+
+    async def add(self, search_id: int, criteria: Criteria):
+        pipe = redis_client.pipeline(transaction=False)
+        self._add(pipe, search_id, criteria)
+        await pipe.execute()
+
+    async def remove(self, search_id: int):
+        raw = await redis_client.hget(self.CRITERIA_KEY, search_id)
+        if raw is None:
+            return
+        criteria = Criteria.loads(raw)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zrem(self.bucket(criteria.job_type, criteria.anchor()), search_id)
+        pipe.hdel(self.CRITERIA_KEY, search_id)
+        await pipe.execute()
+
+    async def percolate(self, job: Criteria) -> List[int]:
+        """IDs of the saved searches matching `job`"""
+        pipe = redis_client.pipeline(transaction=False)
+        for job_type in {job.job_type, None}:
+            for term in job.terms():
+                pipe.zrangebyscore(self.bucket(job_type, term), "-inf", job.min_salary)
+        candidates = sorted({int(member) for members in await pipe.execute() for member in members})
+        if not candidates:
+            return []
+        criteria = await redis_client.hmget(self.CRITERIA_KEY, candidates)
+        return [
+            search_id for search_id, raw in zip(candidates, criteria)
+            if raw is not None and Criteria.loads(raw).matches(job)
+        ]
+
+    async def rebuild(self, db: AsyncSession, chunk_size: int = 1000) -> int:
+        """Replace the index with the saved searches in the database; returns how many were indexed"""
+        if not await redis_client.set(self.LOCK_KEY, 1, nx=True, ex=600):
+            return 0
+        try:
+            keys = [key async for key in redis_client.scan_iter(match="saved_search:bucket:*")]
+            for start in range(0, len(keys), chunk_size):
+                await redis_client.delete(*keys[start:start + chunk_size])
+            await redis_client.delete(self.CRITERIA_KEY)
+
+            indexed = 0
+            after = 0
+            while True:
+                result = await db.execute(
+                    saved_search_repo.active()
+                    .where(SavedSearch.id > after)
+                    .options(selectinload(SavedSearch.skills))
+                    .order_by(SavedSearch.id)
+                    .limit(chunk_size)
+                )
+                searches = result.scalars().all()
+                if not searches:
+                    break
+                pipe = redis_client.pipeline(transaction=False)
+                for search in searches:
+                    self._add(pipe, search.id, Criteria.of_search(search, [s.skill_id for s in search.skills]))
+                await pipe.execute()
+                indexed += len(searches)
+                after = searches[-1].id
+            await redis_client.set(self.BUILT_KEY, indexed)
+            logger.info(f"Saved search index rebuilt: {indexed} searches")
+            return indexed
+        finally:
+            await redis_client.delete(self.LOCK_KEY)
+
+    async def ensure(self):
+        """Rebuild the index if Redis does not have one"""
+        from app.db.session import AsyncSessionLocal
+
+        try:
+            if await redis_client.exists(self.BUILT_KEY):
+                return
+            async with AsyncSessionLocal() as db:
+                await self.rebuild(db)
+        except Exception as e:
+            logger.error(f"Saved search index rebuild failed: {str(e)}")
+
+class SavedSearchService:
+    """Saved searches and their alerts"""
+
+    def __init__(self, index: SavedSearchIndex):
+        self.index = index
+
+    def _to_schema(self, search: SavedSearch, skill_ids: List[int]) -> dict:
+        return {
+            "id": search.id,
+            "user_id": search.user_id,
+            "location": search.location,
+            "job_type": search.job_type,
+            "min_salary": search.min_salary,
+            "skill_ids": sorted(skill_ids),
+            "created_at": search.created_at,
+        }
+
+    async def create_saved_search(self, db: AsyncSession, user_id: int, search_in: SavedSearchCreate) -> dict:
+        result = await db.execute(
+            select(func.count(SavedSearch.id)).where(SavedSearch.user_id == user_id, SavedSearch.is_deleted == None)
+        )
+        if result.scalar() >= settings.SAVED_SEARCH_MAX_PER_USER:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {settings.SAVED_SEARCH_MAX_PER_USER} saved searches per user"
+            )
+        data = search_in.model_dump()
+        skill_ids = sorted(set(data.pop("skill_ids")))
+        search = SavedSearch(user_id=user_id, **data)
+        db.add(search)
+        await db.flush()
+        db.add_all([SavedSearchSkill(saved_search_id=search.id, skill_id=skill_id) for skill_id in skill_ids])
+        await db.commit()
+        await db.refresh(search)
+        await self.index.add(search.id, Criteria.of_search(search, skill_ids))
+        return self._to_schema(search, skill_ids)
+
+    async def get_saved_searches(self, db: AsyncSession, user_id: int) -> List[dict]:
+        result = await db.execute(
+            saved_search_repo.by_user_query(user_id).options(selectinload(SavedSearch.skills))
+        )
+        return [self._to_schema(search, [s.skill_id for s in search.skills]) for search in result.scalars().all()]
+
+    async def delete_saved_search(self, db: AsyncSession, user_id: int, search_id: int):
+        search = await saved_search_repo.get(db, id=search_id)
+        if not search or search.user_id != user_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saved search not found")
+        await saved_search_repo.remove(db, id=search_id)
+        await db.commit()
+        await self.index.remove(search_id)
+
+    async def queue_alerts(self, db: AsyncSession, job: Job, skill_ids: List[int]) -> int:
+        """
+        Add an alert for every user with a saved search matching `job` to the
+        notification outbox, in the caller's transaction. A user with several
+        matching searches gets one alert. Returns the number queued.
+        """
+        search_ids = await self.index.percolate(Criteria.of_job(job, skill_ids))
+        chunk_size = settings.SAVED_SEARCH_ALERT_CHUNK_SIZE
+        emails = set()
+        for start in range(0, len(search_ids), chunk_size):
+            result = await db.execute(
+                select(User.email)
+                .join(SavedSearch, SavedSearch.user_id == User.id)
+                .where(
+                    SavedSearch.id.in_(search_ids[start:start + chunk_size]),
+                    SavedSearch.is_deleted == None,
+                    User.is_active == True
+                )
+            )
+            emails.update(result.scalars().all())
+        recipients = sorted(emails)
+        for start in range(0, len(recipients), chunk_size):
+            await db.execute(insert(NotificationOutbox), [
+                outbox_row(
+                    "send_saved_search_alert",
+                    user_email=email,
+                    job_title=job.title,
+                    location=job.location
+                )
+                for email in recipients[start:start + chunk_size]
+            ])
+        if recipients:
+            logger.info(f"Job {job.id} matched {len(search_ids)} saved searches; {len(recipients)} alerts queued")
+        return len(recipients)
+
+saved_search_index = SavedSearchIndex()
+saved_search_service = SavedSearchService(saved_search_index)
+
+@task_queue.task()
+async def send_saved_search_alerts(job_id: int):
+    """
+    Background task queuing the saved-search alerts of a job that became
+    OPEN. A failure (Redis or the database) fails the task, which the task
+    queue retries.
+    """
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        job = await job_repo.get(db, id=job_id)
+        if job is None or job.status != JobStatus.OPEN or job.is_deleted is not None:
+            return
+        result = await db.execute(select(JobSkill.skill_id).where(JobSkill.job_id == job_id))
+        await saved_search_service.queue_alerts(db, job, result.scalars().all())
+        await db.commit()
+
+if __name__ == "__main__":
+    import asyncio
+    from app.db.session import AsyncSessionLocal
+
+    async def main():
+        async with AsyncSessionLocal() as db:
+            print(f"Indexed {await saved_search_index.rebuild(db)} saved searches")
+
+    asyncio.run(main())
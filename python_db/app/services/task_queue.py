@@ -0,0 +1,373 @@
+"""
+Task Queue
+Durable background tasks on Redis Streams, run by `python -m app.worker`
+instead of inside the API process
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.db.session import after_commit, get_db
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TaskType:
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    concurrency: int
+    max_retries: int
+    timeout: float
+    # Metrics (worker side)
+    running: Set[asyncio.Task] = field(default_factory=set)
+    completed: int = 0
+    retried: int = 0
+    dead: int = 0
+
+def parse_concurrency(value: str) -> Dict[str, int]:
+    """"log_activity=100,simulate_heavy_computation=1" -> {"log_activity": 100, ...}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, limit = item.partition("=")
+        limits[name.strip()] = int(limit)
+    return limits
+
+class TaskQueue:
+    """
+    Tasks are registered with the `task` decorator and enqueued with
+    `enqueue`, or through QueuedTasks (`add_task`) from an endpoint. Each
+    task type has its own stream (`{prefix}:{name}`), read by the `group`
+    consumer group.
+
+    A worker runs one consumer per task type and runs at most that type's
+    `concurrency` tasks at once, so a flood of one type cannot starve the
+    others. An entry is acknowledged and deleted only after its task
+    finishes, so delivery is at-least-once and tasks must be idempotent.
+    A failed task is retried after `retry_delay` seconds, doubled per
+    attempt: it waits in the `{prefix}:delayed` sorted set until due. After
+    `max_retries` retries it goes to the `{prefix}:dead` stream, which keeps
+    the last `dead_letter_maxlen` entries. Entries held by a worker that
+    died are re-claimed once they have been idle for longer than the task's
+    timeout; that counts as a failed attempt.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        group: str,
+        block_ms: int,
+        retry_delay: float,
+        dead_letter_maxlen: int,
+        default_concurrency: int,
+        default_max_retries: int,
+        default_timeout: float,
+        concurrency_overrides: Optional[Dict[str, int]] = None,
+        claim_interval: float = 30,
+        promote_interval: float = 1,
+    ):
+        self.prefix = prefix
+        self.group = group
+        self.block_ms = block_ms
+        self.retry_delay = retry_delay
+        self.dead_letter_maxlen = dead_letter_maxlen
+        self.default_concurrency = default_concurrency
+        self.default_max_retries = default_max_retries
+        self.default_timeout = default_timeout
+        self.concurrency_overrides = concurrency_overrides or {}
+        self.claim_interval = claim_interval
+        self.promote_interval = promote_interval
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.tasks: Dict[str, TaskType] = {}
+        self._loops: List[asyncio.Task] = []
+
+    @property
+    def delayed_key(self) -> str:
+        return f"{self.prefix}:delayed"
+
+    @property
+    def dead_key(self) -> str:
+        return f"{self.prefix}:dead"
+
+    def stream(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def task(
+        self,
+        name: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Register an async function as a task type; the function itself is unchanged"""
+        def register(func):
+            task_name = name or func.__name__
+            if task_name in self.tasks:
+                raise ValueError(f"Task {task_name} is already registered")
+            self.tasks[task_name] = TaskType(
+                name=task_name,
+                func=func,
+                concurrency=self.concurrency_overrides.get(task_name, concurrency or self.default_concurrency),
+                max_retries=self.default_max_retries if max_retries is None else max_retries,
+                timeout=timeout or self.default_timeout,
+            )
+            func.task_name = task_name
+            return func
+        return register
+
+    def task_name(self, func: Callable) -> str:
+        name = getattr(func, "task_name", None)
+        if name not in self.tasks:
+            raise ValueError(f"{getattr(func, '__name__', func)!r} is not a registered task")
+        return name
+
+    def _entry(self, name: str, args: tuple, kwargs: dict) -> dict:
+        return {
+            "task": name,
+            "args": json.dumps(list(args), default=str),
+            "kwargs": json.dumps(kwargs, default=str),
+            "attempts": 0,
+            "enqueued_at": time.time(),
+        }
+
+    async def enqueue(self, func: Callable, *args, **kwargs) -> str:
+        name = self.task_name(func)
+        return await redis_client.xadd(self.stream(name), self._entry(name, args, kwargs))
+
+    async def enqueue_many(self, calls: List[Tuple[Callable, tuple, dict]]) -> List[str]:
+        """Enqueue several (func, args, kwargs) calls in one round trip"""
+        pipe = redis_client.pipeline(transaction=False)
+        for func, args, kwargs in calls:
+            name = self.task_name(func)
+            pipe.xadd(self.stream(name), self._entry(name, args, kwargs))
+        return await pipe.execute()
+
+    # Worker side
+
+    async def _ensure_group(self, stream: str):
+        try:
+            await redis_client.xgroup_create(stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _fail(self, task_type: TaskType, entry_id: str, fields: dict, error: str):
+        """Schedule a retry or dead-letter the entry, and remove it from its stream, atomically"""
+        attempts = int(fields.get("attempts", 0)) + 1
+        failed = {**fields, "attempts": attempts, "error": error[:1000], "failed_id": entry_id}
+        pipe = redis_client.pipeline(transaction=True)
+        if attempts > task_type.max_retries:
+            pipe.xadd(self.dead_key, {**failed, "failed_at": time.time()}, maxlen=self.dead_letter_maxlen, approximate=True)
+            task_type.dead += 1
+            logger.error(f"Task {task_type.name} {entry_id} dead-lettered after {attempts} attempts: {error}")
+        else:
+            due = time.time() + self.retry_delay * 2 ** (attempts - 1)
+            pipe.zadd(self.delayed_key, {json.dumps(failed): due})
+            task_type.retried += 1
+            logger.warning(f"Task {task_type.name} {entry_id} failed (attempt {attempts}), retrying: {error}")
+        pipe.xack(self.stream(task_type.name), self.group, entry_id)
+        pipe.xdel(self.stream(task_type.name), entry_id)
+        await pipe.execute()
+
+    async def _execute(self, task_type: TaskType, entry_id: str, fields: dict):
+        try:
+            args = json.loads(fields["args"])
+            kwargs = json.loads(fields["kwargs"])
+            await asyncio.wait_for(task_type.func(*args, **kwargs), task_type.timeout)
+        except asyncio.CancelledError:
+            # Left pending: re-claimed once idle for longer than the timeout
+            raise
+        except Exception as e:
+            await self._fail(task_type, entry_id, fields, f"{type(e).__name__}: {e}")
+            return
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.xack(self.stream(task_type.name), self.group, entry_id)
+        pipe.xdel(self.stream(task_type.name), entry_id)
+        await pipe.execute()
+        task_type.completed += 1
+
+    async def _reclaim(self, task_type: TaskType):
+        """Entries held by consumers idle for longer than the task timeout count as failed attempts"""
+        claimed = await redis_client.xautoclaim(
+            self.stream(task_type.name), self.group, self.consumer,
+            min_idle_time=int((task_type.timeout + 30) * 1000), start_id="0-0", count=100
+        )
+        for entry_id, fields in (claimed[1] if claimed else []):
+            if fields:
+                await self._fail(task_type, entry_id, fields, "worker lost while running the task")
+            else:
+                # Deleted while pending
+                await redis_client.xack(self.stream(task_type.name), self.group, entry_id)
+
+    async def _consume(self, task_type: TaskType):
+        stream = self.stream(task_type.name)
+        await self._ensure_group(stream)
+        logger.info(f"Task consumer {self.consumer} started on {stream} (concurrency {task_type.concurrency})")
+        last_claim = 0.0
+        while True:
+            try:
+                if time.monotonic() - last_claim >= self.claim_interval:
+                    last_claim = time.monotonic()
+                    await self._reclaim(task_type)
+                free = task_type.concurrency - len(task_type.running)
+                if free <= 0:
+                    await asyncio.wait(task_type.running, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                response = await redis_client.xreadgroup(
+                    self.group, self.consumer, {stream: ">"}, count=free, block=self.block_ms
+                )
+                for entry_id, fields in (response[0][1] if response else []):
+                    running = asyncio.create_task(self._execute(task_type, entry_id, fields))
+                    task_type.running.add(running)
+                    running.add_done_callback(task_type.running.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Task consumer {stream} failed: {str(e)}")
+                await asyncio.sleep(1)
+
+    async def promote_due(self, limit: int = 100) -> int:
+        """Move retries that are due back onto their streams; returns how many were moved"""
+        due = await redis_client.zrangebyscore(self.delayed_key, "-inf", time.time(), start=0, num=limit)
+        moved = 0
+        for member in due:
+            # Whoever removes the member requeues it, so concurrent workers never requeue it twice
+            if await redis_client.zrem(self.delayed_key, member):
+                fields = json.loads(member)
+                fields.pop("error", None)
+                fields.pop("failed_id", None)
+                await redis_client.xadd(self.stream(fields["task"]), fields)
+                moved += 1
+        return moved
+
+    async def _promote(self):
+        while True:
+            try:
+                await self.promote_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Promoting delayed tasks failed: {str(e)}")
+            await asyncio.sleep(self.promote_interval)
+
+    def start(self, names: Optional[List[str]] = None):
+        """Start consuming the given task types (all registered ones by default)"""
+        for name in names or list(self.tasks):
+            if name not in self.tasks:
+                raise ValueError(f"Unknown task type: {name}")
+            self._loops.append(asyncio.create_task(self._consume(self.tasks[name])))
+        self._loops.append(asyncio.create_task(self._promote()))
+
+    async def stop(self, grace: float):
+        """Stop reading, then give running tasks `grace` seconds to finish; unfinished ones are re-claimed later"""
+        loops, self._loops = self._loops, []
+        for loop in loops:
+            loop.cancel()
+        await asyncio.gather(*loops, return_exceptions=True)
+        running = [task for task_type in self.tasks.values() for task in task_type.running]
+        if running:
+            logger.info(f"Waiting up to {grace}s for {len(running)} running tasks")
+            _, pending = await asyncio.wait(running, timeout=grace)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def worker_stats(self) -> dict:
+        return {
+            name: {
+                "running": len(task_type.running),
+                "completed": task_type.completed,
+                "retried": task_type.retried,
+                "dead": task_type.dead,
+            }
+            for name, task_type in self.tasks.items()
+        }
+
+    async def stats(self) -> dict:
+        """Backlog, in-progress and limits per task type, plus retry and dead-letter counts"""
+        pipe = redis_client.pipeline(transaction=False)
+        for name in self.tasks:
+            pipe.xlen(self.stream(name))
+        pipe.zcard(self.delayed_key)
+        pipe.xlen(self.dead_key)
+        counts = await pipe.execute()
+        return {
+            "tasks": {
+                name: {
+                    "queued": counts[i],
+                    "concurrency": task_type.concurrency,
+                    "max_retries": task_type.max_retries,
+                    "timeout": task_type.timeout,
+                }
+                for i, (name, task_type) in enumerate(self.tasks.items())
+            },
+            "delayed": counts[-2],
+            "dead": counts[-1],
+        }
+
+    async def dead_letters(self, count: int = 20) -> List[dict]:
+        entries = await redis_client.xrevrange(self.dead_key, count=count)
+        return [{"id": entry_id, **fields} for entry_id, fields in entries]
+
+    async def requeue_dead(self, count: int = 100) -> int:
+        """Put the oldest `count` dead letters back on their streams with a fresh retry budget"""
+        entries = await redis_client.xrange(self.dead_key, count=count)
+        for entry_id, fields in entries:
+            if fields.get("task") in self.tasks:
+                name = fields["task"]
+                await redis_client.xadd(self.stream(name), {
+                    "task": name, "args": fields["args"], "kwargs": fields["kwargs"],
+                    "attempts": 0, "enqueued_at": time.time(),
+                })
+            await redis_client.xdel(self.dead_key, entry_id)
+        return len(entries)
+
+class QueuedTasks:
+    """
+    Drop-in for FastAPI's BackgroundTasks in endpoints: `add_task` collects
+    the calls and they are enqueued in one pipeline once the request's
+    transaction has committed, before the response is sent. Nothing is
+    enqueued if the endpoint raises or the commit fails.
+    """
+
+    def __init__(self, queue: TaskQueue):
+        self.queue = queue
+        self.calls: List[Tuple[Callable, tuple, dict]] = []
+
+    def add_task(self, func: Callable, *args, **kwargs):
+        self.queue.task_name(func)
+        self.calls.append((func, args, kwargs))
+
+    async def flush(self):
+        calls, self.calls = self.calls, []
+        if calls:
+            await self.queue.enqueue_many(calls)
+
+task_queue = TaskQueue(
+    prefix=settings.TASK_QUEUE_PREFIX,
+    group="workers",
+    block_ms=settings.TASK_QUEUE_BLOCK_MS,
+    retry_delay=settings.TASK_RETRY_SECONDS,
+    dead_letter_maxlen=settings.TASK_DEAD_LETTER_MAXLEN,
+    default_concurrency=settings.TASK_DEFAULT_CONCURRENCY,
+    default_max_retries=settings.TASK_DEFAULT_MAX_RETRIES,
+    default_timeout=settings.TASK_DEFAULT_TIMEOUT_SECONDS,
+    concurrency_overrides=parse_concurrency(settings.TASK_CONCURRENCY),
+)
+
+def get_queued_tasks(db: AsyncSession = Depends(get_db, scope="function")) -> QueuedTasks:
+    """
+    Dependency for QueuedTasks, sharing the endpoint's db session. The tasks
+    are enqueued once get_db has committed, so a worker never picks up a
+    task whose rows are not visible yet (or were rolled back).
+    """
+    tasks = QueuedTasks(task_queue)
+    after_commit(db, tasks.flush)
+    return tasks
@@ -0,0 +1,88 @@
+"""In-memory stand-ins shared by the unit tests (monkeypatched over `redis_client`)"""
+
+class FakePipeline:
+    """Records commands and replays them against the fake on execute"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+class FakeRedis:
+    """Strings, hashes, lists, sorted sets and streams, with decoded responses"""
+
+    def __init__(self):
+        self.data = {}
+        self.hashes = {}
+        self.lists = {}
+        self.zsets = {}
+        self.streams = {}
+        self.acked = []
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            for values in (self.data, self.hashes, self.lists, self.zsets, self.streams):
+                values.pop(key, None)
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        values = self.hashes.setdefault(key, {})
+        values.update({k: str(v) for k, v in (mapping or {field: value}).items()})
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field] = str(int(values.get(field, 0)) + amount)
+
+    async def lpush(self, key, *values):
+        self.lists[key] = list(reversed(values)) + self.lists.get(key, [])
+
+    async def rpush(self, key, *values):
+        self.lists[key] = self.lists.get(key, []) + list(values)
+
+    async def ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start:end + 1]
+
+    async def lrange(self, key, start, end):
+        values = self.lists.get(key, [])
+        return values[start:] if end == -1 else values[start:end + 1]
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def xadd(self, stream, fields, maxlen=None, approximate=True):
+        entries = self.streams.setdefault(stream, [])
+        entries.append((f"{len(entries) + 1}-0", fields))
+        return entries[-1][0]
+
+    async def xlen(self, stream):
+        return len(self.streams.get(stream, []))
+
+    async def xack(self, stream, group, *ids):
+        self.acked += ids
+
+    async def xdel(self, stream, *ids):
+        self.streams[stream] = [entry for entry in self.streams.get(stream, []) if entry[0] not in ids]
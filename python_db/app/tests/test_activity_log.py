@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime
+import pytest
+import app.services.activity_log as activity_log_module
+from app.services.activity_log import ActivityLogBuffer, log_activity
+
+class RecordingBuffer(ActivityLogBuffer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+        self.rows = []
+        self.fail = False
+
+    async def _write(self, batch):
+        if self.fail:
+            return False
+        self.batches.append(len(batch))
+        self.rows += batch
+        self.written += len(batch)
+        return True
+
+@pytest.mark.asyncio
+async def test_flushes_full_batches_then_drains_on_close():
+    buffer = RecordingBuffer(batch_size=10, flush_interval=60, max_queue=100, enqueue_timeout=0.01)
+    for i in range(25):
+        await buffer.add(1, "JOB_POSTED", "JOB", i)
+    await asyncio.sleep(0)
+    await buffer.close()
+
+    assert sum(buffer.batches) == 25
+    assert max(buffer.batches) == 10
+    assert buffer.stats()["dropped"] == 0
+
+@pytest.mark.asyncio
+async def test_drops_records_when_queue_stays_full():
+    buffer = RecordingBuffer(batch_size=10, flush_interval=60, max_queue=2, enqueue_timeout=0.01)
+    buffer._run = lambda: asyncio.sleep(3600)  # stalled writer: the queue can only fill up
+    for i in range(5):
+        await buffer.add(1, "USER_CREATED", "USER", i)
+
+    stats = buffer.stats()
+    assert stats["queued"] == 2
+    assert stats["dropped"] == 3
+    assert stats["overflows"] == 3
+    buffer._task.cancel()
+
+@pytest.mark.asyncio
+async def test_log_activity_returns_once_its_row_is_written(monkeypatch):
+    buffer = RecordingBuffer(batch_size=10, flush_interval=0.01, max_queue=100, enqueue_timeout=0.01)
+    monkeypatch.setattr(activity_log_module, "activity_log_buffer", buffer)
+    occurred_at = datetime(2026, 1, 31, 23, 59, 59)
+
+    # Queued tasks carry the event time as a string
+    await asyncio.gather(*(log_activity(1, "JOB_POSTED", "JOB", i, occurred_at=str(occurred_at)) for i in range(3)))
+
+    assert buffer.batches == [3]
+    assert {row["created_at"] for row in buffer.rows} == {occurred_at}
+
+    buffer.fail = True
+    with pytest.raises(RuntimeError):
+        await log_activity(1, "JOB_POSTED", "JOB", 4)
+    await buffer.close()
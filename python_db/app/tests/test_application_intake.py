@@ -0,0 +1,92 @@
+import pytest
+from fastapi import HTTPException
+import app.services.application_intake as intake_module
+from app.services.application_intake import ApplicationIntake
+from app.tests.fakes import FakeRedis
+
+class StreamRedis(FakeRedis):
+    """Pending entries of one consumer, with their delivery counts"""
+
+    def __init__(self, entries, deliveries):
+        super().__init__()
+        self.entries = entries
+        self.deliveries = deliveries
+        self.claims = 0
+
+    async def xautoclaim(self, stream, group, consumer, min_idle_time, start_id, count):
+        self.claims += 1
+        for entry_id, _ in self.entries:
+            self.deliveries[entry_id] += 1
+        return ["0-0", list(self.entries), []]
+
+    async def xpending_range(self, stream, group, min, max, count, consumername=None):
+        return [{"message_id": entry_id, "times_delivered": n} for entry_id, n in self.deliveries.items()]
+
+    async def xreadgroup(self, group, consumer, streams, count, block):
+        return []
+
+@pytest.fixture
+def intake():
+    return ApplicationIntake(
+        stream="test:intake", group="test", batch_size=10, block_ms=10, max_backlog=5, request_ttl=60
+    )
+
+@pytest.mark.asyncio
+async def test_closed_and_missing_jobs_are_rejected_from_cache(monkeypatch, intake):
+    redis = FakeRedis()
+    redis.data = {"jobs:open:1": "0", "jobs:open:2": "missing"}
+    monkeypatch.setattr(intake_module, "redis_client", redis)
+
+    with pytest.raises(HTTPException) as closed:
+        await intake.enqueue(None, user_id=1, job_id=1, job_seeker_id=1, user_email="a@x")
+    assert closed.value.status_code == 400
+    with pytest.raises(HTTPException) as missing:
+        await intake.enqueue(None, user_id=1, job_id=2, job_seeker_id=1, user_email="a@x")
+    assert missing.value.status_code == 404
+
+@pytest.mark.asyncio
+async def test_full_backlog_asks_clients_to_retry(monkeypatch, intake):
+    redis = FakeRedis()
+    redis.data = {"jobs:open:1": "1"}
+    redis.streams["test:intake"] = [(f"{i}-0", {}) for i in range(5)]
+    monkeypatch.setattr(intake_module, "redis_client", redis)
+
+    with pytest.raises(HTTPException) as full:
+        await intake.enqueue(None, user_id=1, job_id=1, job_seeker_id=1, user_email="a@x")
+    assert full.value.status_code == 503
+    assert full.value.headers["Retry-After"]
+
+@pytest.mark.asyncio
+async def test_entries_failing_too_often_are_rejected_and_dead_lettered(monkeypatch, intake):
+    redis = StreamRedis(
+        [("1-0", {"request_id": "good", "job_id": "1", "job_seeker_id": "1"}),
+         ("2-0", {"request_id": "bad", "job_id": "x", "job_seeker_id": "1"})],
+        {"1-0": 1, "2-0": 5},
+    )
+    monkeypatch.setattr(intake_module, "redis_client", redis)
+    intake.max_deliveries = 5
+
+    entries = await intake._read()
+
+    assert [entry_id for entry_id, _ in entries] == ["1-0"]
+    assert redis.acked == ["2-0"]
+    (_, dead), = redis.streams["test:intake:dead"]
+    assert dead["failed_id"] == "2-0"
+    assert redis.hashes["apply:request:bad"]["status"] == "rejected"
+    # Pending entries are only re-claimed every claim_idle seconds
+    await intake._read()
+    assert redis.claims == 1
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_entry_by_entry(intake):
+    done = []
+
+    async def process(entries):
+        if len(entries) > 1 or entries[0][1]["job_id"] == "x":
+            raise ValueError("bad entry")
+        done.append(entries[0][0])
+
+    intake.process = process
+    await intake.process_each([("1-0", {"job_id": "1"}), ("2-0", {"job_id": "x"}), ("3-0", {"job_id": "3"})])
+
+    assert done == ["1-0", "3-0"]
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+import app.services.async_tasks as async_tasks
+from app.services.async_tasks import NotificationBatchEngine
+from app.tests.fakes import FakeRedis
+
+@pytest.mark.asyncio
+async def test_batch_streams_with_bounded_width_and_records_progress(monkeypatch):
+    monkeypatch.setattr(async_tasks, "redis_client", FakeRedis())
+    engine = NotificationBatchEngine(width=5, chunk_size=50, max_retries=2, retry_delay=0, record_ttl=60)
+    in_flight = 0
+    peak = 0
+    attempts = {}
+
+    async def send(email):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        attempts[email] = attempts.get(email, 0) + 1
+        if email == "down@example.com":
+            raise ConnectionError("SMTP unavailable")
+        # Flaky recipients succeed on their second attempt
+        return not (email.startswith("flaky") and attempts[email] == 1)
+
+    async def recipients():
+        for i in range(500):
+            yield f"flaky{i}@example.com" if i % 10 == 0 else f"user{i}@example.com"
+        yield "down@example.com"
+
+    batch_id = await engine.create()
+    counts = await engine.run(batch_id, recipients(), send)
+
+    assert peak == 5
+    assert counts == {"queued": 501, "sent": 500, "failed": 1, "retries": 52}
+    assert attempts["down@example.com"] == 3
+    record = await engine.get(batch_id)
+    assert record["status"] == "completed"
+    assert record["sent"] == 500 and record["failed"] == 1
+    assert record["recent_failures"] == ["down@example.com: SMTP unavailable"]
+
+@pytest.mark.asyncio
+async def test_staged_recipients_are_streamed_per_chunk_and_dropped(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(async_tasks, "redis_client", redis)
+    engine = NotificationBatchEngine(width=3, chunk_size=4, max_retries=0, retry_delay=0, record_ttl=60)
+    monkeypatch.setattr(async_tasks, "notification_batches", engine)
+    reads = []
+    lrange = redis.lrange
+
+    async def counting_lrange(key, start, end):
+        values = await lrange(key, start, end)
+        reads.append(len(values))
+        return values
+
+    monkeypatch.setattr(redis, "lrange", counting_lrange)
+    sent = []
+
+    async def send(email, message):
+        sent.append(email)
+        return True
+
+    monkeypatch.setattr(async_tasks.AsyncTaskService, "send_individual_simulated_email", staticmethod(send))
+    emails = [f"user{i}@example.com" for i in range(10)]
+    batch_id = await engine.create(total=len(emails))
+
+    assert await engine.stage(batch_id, emails) == 10
+    await async_tasks.AsyncTaskService.process_batch_notifications(batch_id, "hello")
+
+    assert sorted(sent) == sorted(emails)
+    assert reads == [4, 4, 2]
+    assert engine._recipients_key(batch_id) not in redis.lists
@@ -0,0 +1,42 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+import app.core.idempotency as idempotency
+from app.core.idempotency import IdempotencyCache
+from app.services.application_service import _is_duplicate_key
+from app.tests.fakes import FakeRedis
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(idempotency, "redis_client", FakeRedis())
+    return IdempotencyCache(ttl=60, lock_seconds=5)
+
+@pytest.mark.asyncio
+async def test_retry_replays_completed_response(cache):
+    request = {"job_id": 7}
+    assert await cache.begin("apply:1", "key", request) is None
+    await cache.complete("apply:1", "key", request, {"id": 42})
+
+    assert await cache.begin("apply:1", "key", request) == {"id": 42}
+    # Keys are scoped per user
+    assert await cache.begin("apply:2", "key", request) is None
+
+@pytest.mark.asyncio
+async def test_in_flight_and_mismatched_retries_are_rejected(cache):
+    assert await cache.begin("apply:1", "key", {"job_id": 7}) is None
+    with pytest.raises(HTTPException) as in_flight:
+        await cache.begin("apply:1", "key", {"job_id": 7})
+    with pytest.raises(HTTPException) as mismatch:
+        await cache.begin("apply:1", "key", {"job_id": 8})
+
+    assert in_flight.value.status_code == 409
+    assert mismatch.value.status_code == 422
+    await cache.release("apply:1", "key")
+    assert await cache.begin("apply:1", "key", {"job_id": 7}) is None
+
+def test_only_duplicate_entries_mean_already_applied():
+    duplicate = IntegrityError("INSERT", {}, Exception(1062, "Duplicate entry '1-1' for key 'uix_job_seeker_app'"))
+    missing_fk = IntegrityError("INSERT", {}, Exception(1452, "Cannot add or update a child row"))
+
+    assert _is_duplicate_key(duplicate)
+    assert not _is_duplicate_key(missing_fk)
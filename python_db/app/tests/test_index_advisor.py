@@ -0,0 +1,57 @@
+from app.db.index_advisor import candidates_for, is_served, model_tables, redundant_indexes
+from app.db.workload import WorkloadRecorder
+
+TABLES = model_tables()
+
+def test_candidates_put_equalities_before_range():
+    statement = (
+        "SELECT jobs.id, jobs.title FROM jobs WHERE jobs.is_deleted IS NULL "
+        "AND jobs.status = %s AND jobs.salary_min >= %s LIMIT %s"
+    )
+    assert candidates_for(statement, TABLES) == [
+        ("jobs", ("is_deleted", "status")),
+        ("jobs", ("is_deleted", "status", "salary_min")),
+    ]
+
+def test_candidates_follow_aliases_and_join_columns():
+    statement = (
+        "SELECT applications.id FROM applications JOIN jobs AS jobs_1 ON jobs_1.id = applications.job_id "
+        "WHERE jobs_1.recruiter_id = %s ORDER BY applications.created_at DESC"
+    )
+    candidates = candidates_for(statement, TABLES)
+    assert ("jobs", ("recruiter_id",)) in candidates
+    assert ("applications", ("job_id", "created_at")) in candidates
+
+def test_prefix_indexes_are_served_and_reported_redundant():
+    existing = {
+        "jobs": {
+            "ix_jobs_search": {"columns": ["status", "is_deleted", "job_type"], "unique": False},
+            "ix_status": {"columns": ["status"], "unique": False},
+            "PRIMARY": {"columns": ["id"], "unique": True},
+        }
+    }
+    assert is_served(("status", "is_deleted"), [i["columns"] for i in existing["jobs"].values()])
+    assert not is_served(("job_type",), [i["columns"] for i in existing["jobs"].values()])
+    [finding] = redundant_indexes(existing)
+    assert finding["index"] == "ix_status"
+    assert finding["covered_by"] == "ix_jobs_search"
+
+def test_workload_recorder_groups_sampled_statements():
+    recorder = WorkloadRecorder(sample_rate=1.0, flush_interval=3600)
+    recorder.observe("SELECT * FROM jobs WHERE jobs.id = %s", (1,), 0.002)
+    recorder.observe("SELECT * FROM jobs WHERE jobs.id = %s", (2,), 0.004)
+    recorder.observe("EXPLAIN SELECT * FROM jobs", None, 0.001)
+    recorder.observe("INSERT INTO jobs (title) VALUES (%s)", [("a",), ("b",)], 0.001, executemany=True)
+
+    [(fp, entry)] = recorder._pending.items()
+    assert fp == "SELECT * FROM jobs WHERE jobs.id = ?"
+    assert entry["count"] == 2
+    assert entry["parameters"] == (2,)
+
+def test_workload_recorder_keeps_no_parameters_of_writes():
+    recorder = WorkloadRecorder(sample_rate=1.0, flush_interval=3600)
+    recorder.observe("UPDATE users SET password_hash=%s WHERE users.id = %s", ("$2b$12$secret", 1), 0.003)
+
+    [entry] = recorder._pending.values()
+    assert entry["count"] == 1
+    assert "statement" not in entry and "parameters" not in entry
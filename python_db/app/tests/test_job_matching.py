@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+import pytest
+import app.db.session as session_module
+import app.services.job_matching as job_matching_module
+from app.services.job_matching import JobMatchDigest, OpenJobMatrix
+from app.tests.fakes import FakeRedis
+
+def matrix():
+    # job -> required skills
+    return OpenJobMatrix(
+        {1: {10, 11}, 2: {10, 12, 13, 14}, 3: {11}, 4: {15}},
+        {1: "Backend", 2: "Data", 3: "QA", 4: "Design"}
+    )
+
+def test_jobs_are_ranked_by_share_of_skills_covered():
+    matches = matrix().score_chunk({100: {10, 11, 12}}, {}, min_score=0.5, limit=5)
+
+    # Backend and QA fully covered, Data half covered, Design not at all
+    assert matches[100][2] == 2
+    assert set(matches[100][:2]) == {1, 3}
+
+def test_min_score_limit_and_exclusions():
+    jobs = matrix()
+    seekers = {100: {10, 11, 12}, 200: {12}, 300: {99}}
+
+    matches = jobs.score_chunk(seekers, {100: {1}}, min_score=0.5, limit=1)
+
+    assert matches == {100: [3]}
+    assert jobs.score_chunk(seekers, {}, min_score=0.25, limit=5)[200] == [2]
+
+class FakeSession:
+    opened = []
+
+    def __init__(self):
+        self.closed = False
+        FakeSession.opened.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+class ScriptedDigest(JobMatchDigest):
+    """Five seekers, one second of window per chunk"""
+
+    def __init__(self, clock):
+        super().__init__(chunk_size=2, min_score=0.5, max_jobs=5, window_seconds=2, send_batch_size=10)
+        self.clock = clock
+        self.chunks = []
+
+    async def load_matrix(self, db):
+        return matrix()
+
+    async def _seekers(self, db, after):
+        return [(seeker_id, f"s{seeker_id}@x") for seeker_id in range(after + 1, 6)][:self.chunk_size]
+
+    async def process_chunk(self, db, matrix, seekers):
+        assert not db.closed
+        self.chunks.append(([seeker_id for seeker_id, _ in seekers], db))
+        self.clock[0] += 1
+        return len(seekers), 0
+
+@pytest.mark.asyncio
+async def test_digest_pauses_at_window_end_and_resumes_from_checkpoint(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(job_matching_module, "redis_client", FakeRedis())
+    monkeypatch.setattr(job_matching_module, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    monkeypatch.setattr(session_module, "AsyncSessionLocal", FakeSession)
+    digest = ScriptedDigest(clock)
+
+    paused = await digest.run()
+    assert paused["status"] == "paused"
+    assert paused["last_seeker_id"] == "4"
+    assert [ids for ids, _ in digest.chunks] == [[1, 2], [3, 4]]
+    # Each chunk ran in its own session
+    assert digest.chunks[0][1] is not digest.chunks[1][1]
+    assert all(db.closed for db in FakeSession.opened)
+
+    completed = await digest.run()
+    assert completed["status"] == "completed"
+    assert completed["cycle_started"] == paused["cycle_started"]
+    assert completed["seekers"] == "5"
+    assert [ids for ids, _ in digest.chunks[2:]] == [[5]]
+
+    await digest.run()
+    assert [ids for ids, _ in digest.chunks[3:]] == [[1, 2], [3, 4]]
@@ -0,0 +1,21 @@
+import pytest
+from app.services.notification_service.service import NotificationService
+
+class RecordingBackend:
+    def __init__(self):
+        self.calls = []
+
+    async def send_many(self, emails, share_identical=False):
+        self.calls.append((len(emails), share_identical))
+        return [email.to != ["bounce@example.com"] for email in emails]
+
+@pytest.mark.asyncio
+async def test_status_updates_are_sent_in_bounded_batches():
+    backend = RecordingBackend()
+    service = NotificationService(backend=backend)
+    recipients = [(f"user{i}@example.com", "Engineer") for i in range(25)] + [("bounce@example.com", "Engineer")]
+
+    sent = await service.send_application_status_updates(recipients, "REJECTED", batch_size=10)
+
+    assert sent == [True] * 25 + [False]
+    assert backend.calls == [(10, True), (10, True), (6, True)]
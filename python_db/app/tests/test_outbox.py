@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.dialects import mysql
+from app.models.models import ApplicationStatus, NotificationOutbox
+from app.services.application_service import ApplicationService
+from app.services.notification_service.service import NotificationService
+from app.services.outbox import OutboxDispatcher, OutboxLease, outbox_row
+
+class FlakyService(NotificationService):
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def send_welcome_email(self, user_email, user_name):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        if user_email == "down@example.com":
+            raise ConnectionError("SMTP unavailable")
+        return user_email != "bounce@example.com"
+
+class BulkSession:
+    """Answers bulk_update_application_status's statements and keeps the outbox rows it inserts"""
+
+    def __init__(self, applications):
+        self.applications = applications
+        self.outbox = []
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        if statement.is_select:
+            return self.applications
+        if statement.is_insert:
+            self.outbox += params
+        return SimpleNamespace(rowcount=len(self.applications))
+
+    async def commit(self):
+        pass
+
+class RecordingBackend:
+    def __init__(self):
+        self.calls = []
+
+    async def send_many(self, emails, share_identical=False):
+        self.calls.append(([email.to[0] for email in emails], share_identical))
+        return [email.to != ["bounce@example.com"] for email in emails]
+
+def dispatcher(service):
+    return OutboxDispatcher(
+        batch_size=50, concurrency=4, poll_interval=1, max_attempts=3, lease=60, retention_hours=1, service=service
+    )
+
+@pytest.mark.asyncio
+async def test_deliver_bounds_concurrency_and_collects_failures():
+    service = FlakyService()
+    emails = [f"user{i}@example.com" for i in range(10)] + ["bounce@example.com", "down@example.com"]
+    rows = [
+        NotificationOutbox(id=i, **outbox_row("send_welcome_email", user_email=email, user_name="x"))
+        for i, email in enumerate(emails)
+    ]
+
+    sent, errors = await dispatcher(service).deliver(rows)
+
+    assert sorted(sent) == list(range(10))
+    assert set(errors) == {10, 11}
+    assert "SMTP unavailable" in errors[11]
+    assert service.peak == 4
+
+def test_unknown_notifications_are_rejected_when_queued():
+    with pytest.raises(ValueError):
+        outbox_row("delete_everything", user_email="a@example.com")
+
+def test_retry_delay_backs_off_and_is_capped():
+    outbox = dispatcher(NotificationService())
+    assert [outbox.retry_delay(n) for n in (1, 2, 3)] == [30, 60, 120]
+    assert outbox.retry_delay(20) == 3600
+
+@pytest.mark.asyncio
+async def test_bulk_status_change_is_delivered_as_shared_messages():
+    emails = [f"user{i}@example.com" for i in range(5)] + ["bounce@example.com"]
+    db = BulkSession([
+        SimpleNamespace(id=i, status=ApplicationStatus.APPLIED, email=email, title="Engineer")
+        for i, email in enumerate(emails)
+    ])
+    await ApplicationService().bulk_update_application_status(
+        db, list(range(len(emails))), ApplicationStatus.REJECTED, recruiter_id=1
+    )
+    rows = [NotificationOutbox(id=i, **row) for i, row in enumerate(db.outbox)]
+    welcome = NotificationOutbox(id=99, **outbox_row("send_welcome_email", user_email="new@example.com", user_name="x"))
+    backend = RecordingBackend()
+
+    sent, errors = await dispatcher(NotificationService(backend=backend)).deliver(rows + [welcome])
+
+    assert sorted(sent) == [0, 1, 2, 3, 4, 99]
+    assert list(errors) == [5]
+    assert (emails, True) in backend.calls
+
+@pytest.mark.asyncio
+async def test_bulk_status_change_locks_and_rechecks_the_applications():
+    db = BulkSession([SimpleNamespace(id=1, status=ApplicationStatus.APPLIED, email="a@example.com", title="Engineer")])
+    await ApplicationService().bulk_update_application_status(db, [1], ApplicationStatus.REJECTED, recruiter_id=1)
+
+    select_sql, update_sql, _ = [str(statement.compile(dialect=mysql.dialect())) for statement in db.statements]
+    assert select_sql.endswith("FOR UPDATE")
+    assert "applications.is_deleted IS NULL" in update_sql
+    assert "applications.status != " in update_sql
+
+@pytest.mark.asyncio
+async def test_rows_whose_lease_was_lost_are_not_sent():
+    service = FlakyService()
+    rows = [
+        NotificationOutbox(id=i, **outbox_row("send_welcome_email", user_email=f"user{i}@example.com", user_name="x"))
+        for i in range(3)
+    ]
+    outbox = dispatcher(service)
+
+    # Row 2 was re-claimed by another dispatcher
+    sent, errors = await outbox.deliver(rows, OutboxLease([0, 1], datetime.now() + timedelta(seconds=60)))
+    assert sorted(sent) == [0, 1] and not errors
+
+    # The lease ran out before the sends started
+    sent, errors = await outbox.deliver(rows, OutboxLease([0, 1, 2], datetime.now() - timedelta(seconds=1)))
+    assert sent == [] and not errors
@@ -0,0 +1,54 @@
+import pytest
+from contextlib import asynccontextmanager
+from datetime import date
+from app.db.partitions import ActivityLogPartitions, add_months, partition_month
+
+class FakeEngine:
+    def __init__(self):
+        self.statements = []
+
+    @asynccontextmanager
+    async def begin(self):
+        yield self
+
+    async def execute(self, statement):
+        self.statements.append(str(statement))
+
+class FakePartitions(ActivityLogPartitions):
+    def __init__(self, names, **kwargs):
+        super().__init__(FakeEngine(), archive_dir="unused", **kwargs)
+        self.names = names
+        self.exported = []
+
+    async def partitions(self):
+        return [{"name": name} for name in self.names]
+
+    async def _export(self, name):
+        self.exported.append(name)
+        return 0
+
+def test_month_helpers():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_month("p202602") == date(2026, 2, 1)
+    assert partition_month("pmax") is None
+
+@pytest.mark.asyncio
+async def test_ensure_future_splits_pmax():
+    manager = FakePartitions(["p202609", "p202610", "pmax"], retention_months=12, months_ahead=2)
+    created = await manager.ensure_future(today=date(2026, 10, 19))
+
+    assert created == ["p202611", "p202612"]
+    statement = manager.engine.statements[0]
+    assert "REORGANIZE PARTITION pmax" in statement
+    assert "PARTITION p202612 VALUES LESS THAN (TO_DAYS('2027-01-01'))" in statement
+    assert statement.endswith("PARTITION pmax VALUES LESS THAN MAXVALUE)")
+
+@pytest.mark.asyncio
+async def test_archive_expired_drops_only_old_months():
+    manager = FakePartitions(["p202508", "p202509", "p202510", "pmax"], retention_months=13, months_ahead=3)
+    archived = await manager.archive_expired(today=date(2026, 10, 19))
+
+    assert archived == ["p202508"]
+    assert manager.exported == ["p202508"]
+    assert manager.engine.statements == ["ALTER TABLE activity_logs DROP PARTITION p202508"]
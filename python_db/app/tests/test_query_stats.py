@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+from app.db.query_stats import QueryStats, fingerprint
+from app.db.slow_queries import SlowQueryLog
+
+def test_fingerprint_ignores_literals_and_in_list_length():
+    a = fingerprint("SELECT * FROM jobs WHERE id IN (%s, %s) AND title = 'x'")
+    b = fingerprint("SELECT *  FROM jobs\nWHERE id IN (%s, %s, %s) AND title = 'it''s'")
+
+    assert a == b == "SELECT * FROM jobs WHERE id IN (...) AND title = ?"
+
+def test_repeats_flags_statements_over_threshold():
+    stats = QueryStats()
+    for job_id in range(12):
+        stats.record(f"SELECT * FROM skills WHERE job_id = {job_id}", 0.001)
+    stats.record("SELECT * FROM jobs", 0.002)
+
+    assert stats.count == 13
+    assert [(fp, count) for fp, count, _ in stats.repeats(10)] == [
+        ("SELECT * FROM skills WHERE job_id = ?", 12)
+    ]
+
+def test_slow_query_log_aggregates_by_fingerprint():
+    log = SlowQueryLog(threshold_ms=100, explain_rate=0.0, top_n=5, window=3600)
+    conn = SimpleNamespace(engine=None)
+    log.observe(conn, "SELECT * FROM applications WHERE job_id = %s", (1,), 0.05)
+    log.observe(conn, "SELECT * FROM applications WHERE job_id = %s", (2,), 0.3)
+    log.observe(conn, "SELECT * FROM applications WHERE job_id = %s", (3,), 0.5)
+
+    [entry] = log.top()
+    assert entry["count"] == 2
+    assert entry["max_ms"] == 500.0
+    assert entry["last_params"] == "(3,)"
+
+def test_slow_query_log_redacts_write_parameters(caplog):
+    log = SlowQueryLog(threshold_ms=100, explain_rate=0.0, top_n=5, window=3600)
+    conn = SimpleNamespace(engine=None)
+    log.observe(conn, "INSERT INTO users (email, password_hash) VALUES (%s, %s)", ("a@x.com", "$2b$12$secret"), 0.3)
+
+    [entry] = log.top()
+    assert entry["last_params"] == "<redacted>"
+    assert "secret" not in caplog.text
@@ -0,0 +1,51 @@
+import pytest
+from starlette.requests import Request
+from app.core.rate_limit import RateLimiter
+from app.core.rate_limit_policy import DEFAULT_POLICY, PolicyRateLimiter
+from app.core.security import create_access_token
+
+def make_request(headers=None, client=("10.0.0.1", 1234)):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": client,
+    })
+
+@pytest.mark.asyncio
+async def test_hybrid_rejects_locally_once_bucket_is_empty():
+    limiter = RateLimiter(requests=5, window=60, name="test", mode="hybrid", sync_interval=60, max_pending=100)
+    decisions = [await limiter.hit("client") for _ in range(7)]
+
+    assert [d.allowed for d in decisions] == [True] * 5 + [False] * 2
+    assert decisions[0].headers["X-RateLimit-Remaining"] == "4"
+    assert "Retry-After" in decisions[-1].headers
+
+@pytest.mark.asyncio
+async def test_hybrid_keys_are_independent():
+    limiter = RateLimiter(requests=1, window=60, name="test", mode="hybrid", sync_interval=60, max_pending=100)
+
+    assert (await limiter.hit("a")).allowed
+    assert not (await limiter.hit("a")).allowed
+    assert (await limiter.hit("b")).allowed
+
+def test_policy_identifies_jwt_subject_and_role_tier():
+    policy = PolicyRateLimiter(DEFAULT_POLICY)
+    token = create_access_token(7, claims={"role": "RECRUITER"})
+
+    assert policy.identify(make_request({"Authorization": f"Bearer {token}"})) == ("user:7", "RECRUITER")
+    assert policy.identify(make_request({"Authorization": "Bearer forged"})) == ("ip:10.0.0.1", "ANONYMOUS")
+
+def test_policy_uses_trusted_forwarded_hop():
+    policy = PolicyRateLimiter(DEFAULT_POLICY, trusted_proxy_hops=1)
+    request = make_request({"X-Forwarded-For": "1.1.1.1, 203.0.113.9"})
+
+    assert policy.identify(request) == ("ip:203.0.113.9", "ANONYMOUS")
+
+def test_policy_groups_routes_per_tier():
+    policy = PolicyRateLimiter(DEFAULT_POLICY)
+
+    assert policy._table[("GET", "/api/v1/jobs/search", "ANONYMOUS")].requests == 30
+    assert policy._table[("GET", "/api/v1/jobs/search", "RECRUITER")].requests == 60
+    assert policy._table[("POST", "/api/v1/auth/register", "ADMIN")].requests == 5
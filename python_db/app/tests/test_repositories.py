@@ -0,0 +1,23 @@
+from sqlalchemy.dialects import mysql
+from app.models.models import JobType
+from app.repositories.application import application_repo
+from app.repositories.job import job_repo
+
+def _where(query) -> str:
+    return str(query.compile(dialect=mysql.dialect())).split("WHERE", 1)[1]
+
+def test_hot_queries_skip_soft_deleted_rows():
+    queries = [
+        job_repo.search_query(job_type=JobType.FULL_TIME, min_salary=50000),
+        job_repo.by_recruiter_query(1),
+        job_repo.open_count_query(),
+        application_repo.by_job_query(1),
+        application_repo.by_job_seeker_query(1),
+    ]
+    for query in queries:
+        assert "is_deleted IS NULL" in _where(query)
+
+def test_search_filters_match_index_columns():
+    where = _where(job_repo.search_query(job_type=JobType.FULL_TIME, min_salary=50000))
+    for column in ("jobs.status =", "jobs.job_type =", "jobs.salary_min >="):
+        assert column in where
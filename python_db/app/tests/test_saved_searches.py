@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+import pytest
+from app.services.job_service import service as job_service_module
+from app.models.models import JobStatus
+from app.services.job_service.service import JobService
+from app.services.saved_searches import Criteria, location_terms
+
+def search(job_type=None, location=None, min_salary=0, skills=()):
+    return Criteria(job_type, location_terms(location), min_salary, frozenset(skills))
+
+JOB = search("FULL_TIME", "San Francisco, CA", 90000, {1, 3})
+
+def test_every_criterion_set_must_hold():
+    assert search().matches(JOB)
+    assert search("FULL_TIME", "san francisco", 80000, {3}).matches(JOB)
+    assert not search("CONTRACT").matches(JOB)
+    assert not search(location="Los Angeles").matches(JOB)
+    assert not search(min_salary=100000).matches(JOB)
+    assert not search(skills={1, 2}).matches(JOB)
+
+def test_matching_searches_are_anchored_on_a_term_of_the_job():
+    terms = set(JOB.terms())
+    matching = [search(skills={3, 1}), search(location="Francisco CA"), search("FULL_TIME")]
+
+    assert [s.anchor() for s in matching] == ["skill:1", "loc:francisco", "any"]
+    assert all(s.matches(JOB) and s.anchor() in terms for s in matching)
+
+def test_criteria_round_trip():
+    criteria = search("PART_TIME", "Berlin", 40000, {2, 5})
+    assert Criteria.loads(criteria.dumps()) == criteria
+
+class FakeCache:
+    async def delete(self, key):
+        pass
+
+    async def clear_cache(self, pattern):
+        pass
+
+class FakeSession:
+    def __init__(self):
+        self.info = {}
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, instance):
+        pass
+
+@pytest.mark.asyncio
+async def test_alerts_are_queued_on_every_transition_to_open(monkeypatch):
+    job = SimpleNamespace(id=7, recruiter_id=1, status=JobStatus.CLOSED)
+
+    async def get(db, id):
+        return job
+
+    monkeypatch.setattr(job_service_module.job_repo, "get", get)
+    monkeypatch.setattr(job_service_module, "redis_cache", FakeCache())
+    service = JobService()
+
+    queued = []
+    for new_status in (JobStatus.OPEN, JobStatus.OPEN, JobStatus.CLOSED, JobStatus.OPEN):
+        db = FakeSession()
+        await service.update_job_status(db, job_id=7, new_status=new_status, recruiter_id=1)
+        queued.append(len(db.info.get("after_commit", [])))
+
+    assert queued == [1, 0, 0, 1]
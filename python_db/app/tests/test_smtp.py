@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from app.services.notification_service.smtp import Email, SMTPBackend, SMTPPool
+
+class StubSMTPServer:
+    """Minimal SMTP server; refuses recipients starting with "refused" and can drop sessions"""
+
+    def __init__(self, pipelining=True, close_after=None):
+        self.pipelining = pipelining
+        self.close_after = close_after
+        self.sessions = 0
+        self.messages = []  # (recipients, data)
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        sent = 0
+        recipients = []
+        writer.write(b"220 stub ready\r\n")
+        while line := await reader.readline():
+            command = line.decode().strip()
+            verb = command.split(":")[0].split(" ")[0].upper()
+            if verb == "EHLO":
+                writer.write(b"250-stub\r\n" + (b"250-PIPELINING\r\n" if self.pipelining else b"") + b"250 8BITMIME\r\n")
+            elif verb == "MAIL":
+                recipients = []
+                writer.write(b"250 ok\r\n")
+            elif verb == "RCPT":
+                address = command.split("<")[1].rstrip(">")
+                if address.startswith("refused"):
+                    writer.write(b"550 no such user\r\n")
+                else:
+                    recipients.append(address)
+                    writer.write(b"250 ok\r\n")
+            elif verb == "DATA":
+                if not recipients:
+                    writer.write(b"554 no valid recipients\r\n")
+                    continue
+                writer.write(b"354 go ahead\r\n")
+                data = b""
+                while (chunk := await reader.readline()) != b".\r\n":
+                    data += chunk[1:] if chunk.startswith(b"..") else chunk
+                self.messages.append((recipients, data))
+                writer.write(b"250 queued\r\n")
+                sent += 1
+                if self.close_after and sent >= self.close_after:
+                    await writer.drain()
+                    writer.close()
+                    return
+            elif verb == "RSET":
+                writer.write(b"250 ok\r\n")
+            elif verb == "QUIT":
+                writer.write(b"221 bye\r\n")
+                break
+            await writer.drain()
+        writer.close()
+
+def backend(port, size=3, max_recipients=100):
+    pool = SMTPPool("127.0.0.1", port, size=size, timeout=5, max_messages=1000, idle_timeout=30)
+    return SMTPBackend(pool, sender="no-reply@example.com", max_recipients=max_recipients)
+
+@pytest.mark.asyncio
+async def test_messages_share_pooled_sessions():
+    async with StubSMTPServer() as server:
+        smtp = backend(server.port)
+        emails = [Email(to=[f"user{i}@example.com"], subject="Hello", body=f"Hi user {i}") for i in range(50)]
+
+        assert await smtp.send_many(emails) == [True] * 50
+        assert await smtp.send_many(emails[:5]) == [True] * 5
+        await smtp.close()
+
+    assert len(server.messages) == 55
+    assert server.sessions == 3
+    assert smtp.pool.stats()["reused"] == 3
+
+@pytest.mark.asyncio
+async def test_identical_messages_go_out_as_one_transaction():
+    async with StubSMTPServer(pipelining=False) as server:
+        smtp = backend(server.port, max_recipients=4)
+        emails = [Email(to=[f"user{i}@example.com"], subject="Update", body="Now SHORTLISTED") for i in range(6)]
+        emails.append(Email(to=["refused@example.com"], subject="Update", body="Now SHORTLISTED"))
+        emails.append(Email(to=["other@example.com"], subject="Update", body=".Different\nbody"))
+
+        results = await smtp.send_many(emails, share_identical=True)
+        await smtp.close()
+
+    assert results == [True] * 6 + [False, True]
+    # 7 identical messages in transactions of 4 + 3; the stub keeps only accepted recipients
+    assert sorted(len(recipients) for recipients, _ in server.messages) == [1, 2, 4]
+    assert any(b"\r\n.Different\r\n" in data for _, data in server.messages)
+
+@pytest.mark.asyncio
+async def test_dropped_sessions_are_replaced():
+    async with StubSMTPServer(close_after=2) as server:
+        smtp = backend(server.port, size=1)
+        emails = [Email(to=[f"user{i}@example.com"], subject="Hello", body="Hi") for i in range(5)]
+
+        assert await smtp.send_many(emails) == [True] * 5
+        await smtp.close()
+
+    assert len(server.messages) == 5
+    assert server.sessions == 3
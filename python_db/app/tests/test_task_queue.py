@@ -0,0 +1,116 @@
+import json
+from types import SimpleNamespace
+import pytest
+import app.db.session as session_module
+import app.services.task_queue as task_queue_module
+from app.services.task_queue import QueuedTasks, TaskQueue, get_queued_tasks, parse_concurrency
+from app.tests.fakes import FakeRedis
+
+def make_queue():
+    queue = TaskQueue(
+        prefix="test", group="workers", block_ms=10, retry_delay=10, dead_letter_maxlen=100,
+        default_concurrency=4, default_max_retries=2, default_timeout=5,
+        concurrency_overrides=parse_concurrency("heavy=1, light = 50"),
+    )
+
+    @queue.task()
+    async def light(user_id: int, action: str):
+        pass
+
+    @queue.task(name="heavy", concurrency=8)
+    async def crunch():
+        pass
+
+    return queue, light, crunch
+
+@pytest.mark.asyncio
+async def test_add_task_enqueues_on_flush_in_one_round_trip(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(task_queue_module, "redis_client", redis)
+    queue, light, crunch = make_queue()
+    tasks = QueuedTasks(queue)
+
+    tasks.add_task(light, 7, action="JOB_POSTED")
+    tasks.add_task(crunch)
+    with pytest.raises(ValueError):
+        tasks.add_task(print)
+    assert redis.streams == {}
+
+    await tasks.flush()
+
+    assert redis.round_trips == 1
+    (_, fields), = redis.streams["test:light"]
+    assert (json.loads(fields["args"]), json.loads(fields["kwargs"])) == ([7], {"action": "JOB_POSTED"})
+    assert len(redis.streams["test:heavy"]) == 1
+    # Per task type limits: the environment override wins over the decorator
+    assert (queue.tasks["light"].concurrency, queue.tasks["heavy"].concurrency) == (50, 1)
+
+@pytest.mark.asyncio
+async def test_failures_are_retried_with_backoff_then_dead_lettered(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(task_queue_module, "redis_client", redis)
+    queue, light, _ = make_queue()
+    entry_id = await queue.enqueue(light, 1, "LOGIN")
+    fields = dict(redis.streams["test:light"][0][1])
+
+    await queue._fail(queue.tasks["light"], entry_id, fields, "boom")
+
+    (member, _), = redis.zsets["test:delayed"].items()
+    assert json.loads(member)["attempts"] == 1
+    assert redis.acked == [entry_id] and redis.streams["test:light"] == []
+
+    await queue._fail(queue.tasks["light"], "2-0", {**fields, "attempts": 2}, "boom again")
+
+    (_, dead), = redis.streams["test:dead"]
+    assert (dead["attempts"], dead["error"], dead["task"]) == (3, "boom again", "light")
+    assert queue.tasks["light"].retried == 1 and queue.tasks["light"].dead == 1
+
+class FakeSession:
+    def __init__(self, log, redis):
+        self.log = log
+        self.redis = redis
+        self.info = {"wrote": True}
+        self.new = self.dirty = self.deleted = ()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def commit(self):
+        self.log.append(("commit", len(self.redis.streams.get("test:light", []))))
+
+    async def rollback(self):
+        self.log.append("rollback")
+
+    async def close(self):
+        pass
+
+@pytest.mark.asyncio
+async def test_request_tasks_are_enqueued_after_commit_and_dropped_on_rollback(monkeypatch):
+    log = []
+    redis = FakeRedis()
+    monkeypatch.setattr(task_queue_module, "redis_client", redis)
+    monkeypatch.setattr(session_module, "AsyncSessionLocal", lambda: FakeSession(log, redis))
+    queue, light, _ = make_queue()
+    monkeypatch.setattr(task_queue_module, "task_queue", queue)
+
+    request = SimpleNamespace()
+    dependency = session_module.get_db(request)
+    db = await dependency.__anext__()
+    get_queued_tasks(db).add_task(light, 1, action="USER_CREATED")
+    with pytest.raises(StopAsyncIteration):
+        await dependency.__anext__()
+    # Nothing was queued when the transaction committed, the task is queued now
+    assert log == [("commit", 0)]
+    assert len(redis.streams["test:light"]) == 1
+
+    log.clear()
+    dependency = session_module.get_db(request)
+    db = await dependency.__anext__()
+    get_queued_tasks(db).add_task(light, 2, action="USER_CREATED")
+    with pytest.raises(RuntimeError):
+        await dependency.athrow(RuntimeError("handler failed"))
+    assert log == ["rollback"]
+    assert len(redis.streams["test:light"]) == 1
@@ -0,0 +1,42 @@
+from datetime import datetime
+import pytest
+from app.services.notification_service.templates import TEMPLATES, CompiledTemplate, TemplateCatalog
+
+def catalog():
+    return TemplateCatalog(TEMPLATES, default_locale="en", cache_size=16)
+
+def test_locales_fall_back_to_language_then_default():
+    templates = catalog()
+    assert templates.resolve_locale("welcome", "es-MX") == "es"
+    assert templates.resolve_locale("welcome", "de") == "en"
+    assert templates.resolve_locale("welcome", None) == "en"
+
+    subject, body = templates.render("welcome", "es_ES", user_name="Ana")
+    assert subject == "Bienvenido al Portal de Empleo"
+    assert body.startswith("Hola Ana:")
+
+def test_shared_part_is_rendered_once_per_job():
+    templates = catalog()
+    for i in range(1000):
+        subject, body = templates.render(
+            "application_confirmation", job_title="Data Engineer", application_id=i
+        )
+    assert subject == "Application received: Data Engineer"
+    assert body.endswith("Your application ID is 999. We will let you know when its status changes.")
+    info = templates.cache_info()
+    assert (info.misses, info.hits) == (1, 999)
+
+def test_partial_render_matches_full_render():
+    source = "Interview for '{job_title}' on {interview_date:%Y-%m-%d} with {applicant}"
+    compiled = CompiledTemplate.compile(source)
+    values = {"job_title": "QA", "interview_date": datetime(2026, 1, 2), "applicant": "Sam"}
+
+    partial = compiled.partial({"job_title": "QA", "interview_date": values["interview_date"]})
+
+    assert partial.fields == {"applicant"}
+    assert partial.render({"applicant": "Sam"}) == compiled.render(values) == source.format(**values)
+
+def test_translations_must_use_the_same_fields():
+    broken = {"welcome": {"shared": (), "locales": {"en": ("Hi", "Hi {user_name}"), "es": ("Hola", "Hola {username}")}}}
+    with pytest.raises(ValueError):
+        TemplateCatalog(broken, default_locale="en", cache_size=4)
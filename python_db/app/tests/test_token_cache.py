@@ -0,0 +1,56 @@
+import time
+import pytest
+from app.core.security import create_access_token, decode_token_claims
+from app.core.token_cache import BloomFilter, TokenRevocationList, VerifiedTokenCache, verified_tokens
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 50
+
+def test_verified_cache_evicts_least_recently_used():
+    cache = VerifiedTokenCache(maxsize=2)
+    exp = time.time() + 60
+    cache.put("a", {"sub": "1", "exp": exp})
+    cache.put("b", {"sub": "2", "exp": exp})
+    cache.get("a")
+    cache.put("c", {"sub": "3", "exp": exp})
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+def test_verified_cache_drops_expired_tokens():
+    cache = VerifiedTokenCache(maxsize=10)
+    cache.put("old", {"sub": "1", "exp": time.time() - 1})
+
+    assert cache.get("old") is None
+
+def test_decoded_claims_are_cached_with_token_id():
+    token = create_access_token(5)
+    claims = decode_token_claims(token)
+
+    assert claims["jti"] and claims["iat"]
+    assert verified_tokens.get(token) is claims
+    assert decode_token_claims(token) is claims
+
+@pytest.mark.asyncio
+async def test_user_cutoff_revokes_tokens_from_the_same_second():
+    revoked = TokenRevocationList(sync_interval=60, capacity=100)
+
+    async def synced():
+        pass
+
+    revoked._maybe_sync = synced
+    revoked._user_cutoffs["5"] = 1000.5
+
+    assert await revoked.is_revoked({"sub": "5", "iat": 1000, "iat_ms": 1000400})
+    assert not await revoked.is_revoked({"sub": "5", "iat": 1000, "iat_ms": 1000600})
+    # Without iat_ms the whole second counts as before the cutoff
+    assert await revoked.is_revoked({"sub": "5", "iat": 1000})
+    assert not await revoked.is_revoked({"sub": "5", "iat": 1001})
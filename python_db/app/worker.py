@@ -0,0 +1,61 @@
+"""
+Background task worker: runs the tasks queued on Redis Streams by the API
+(see app/services/task_queue.py), so they neither compete with request
+handling nor die with an API process.
+
+    python -m app.worker                                 # every task type
+    python -m app.worker --tasks process_batch_notifications simulate_heavy_computation
+
+Run as many workers as needed; they share the work through consumer
+groups. SIGTERM/SIGINT stop reading new tasks and give running ones
+TASK_SHUTDOWN_GRACE_SECONDS to finish.
+"""
+import argparse
+import asyncio
+import importlib
+import logging
+import signal
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.services.task_queue import task_queue
+
+logger = logging.getLogger(__name__)
+
+# Modules defining tasks; importing them registers the task types
+TASK_MODULES = (
+    "app.services.activity_log",
+    "app.services.async_tasks",
+    "app.services.saved_searches",
+)
+
+async def run(names, stats_interval: float = 60):
+    for module in TASK_MODULES:
+        importlib.import_module(module)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+
+    task_queue.start(names)
+    logger.info(f"Worker {task_queue.consumer} running {', '.join(names or task_queue.tasks)}")
+    while not stopping.is_set():
+        try:
+            await asyncio.wait_for(stopping.wait(), stats_interval)
+        except asyncio.TimeoutError:
+            logger.info(f"Worker {task_queue.consumer}: {task_queue.worker_stats()}")
+
+    logger.info(f"Worker {task_queue.consumer} stopping...")
+    await task_queue.stop(settings.TASK_SHUTDOWN_GRACE_SECONDS)
+    from app.services.activity_log import activity_log_buffer
+    await activity_log_buffer.close()
+    from app.services.notification_service.service import notification_service
+    await notification_service.close()
+    from app.db.session import engine
+    await engine.dispose()
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", nargs="*", help="task types to run (default: all)")
+    asyncio.run(run(parser.parse_args().tasks))
@@ -0,0 +1,164 @@
+"""
+Before/after query plans for the composite indexes on jobs and applications.
+
+Builds a scratch database (BENCH_DB, default "<MYSQL_DB>_bench") on the
+configured MySQL server, fills it with synthetic data, then runs the hot
+queries from app/repositories/job.py and app/repositories/application.py
+without and with the indexes, printing EXPLAIN FORMAT=TREE and the median
+latency of each.
+
+    python benchmark_indexes.py --jobs 200000 --seekers 50000 --applications 1000000
+
+The scratch database is dropped afterwards unless --keep is given.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from datetime import datetime
+from sqlalchemy import insert, text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+from app.db.base_class import Base
+from app.models.models import (
+    User, UserRole, JobSeeker, Recruiter, Job, JobType, JobStatus, Application, ApplicationStatus
+)
+from app.repositories.job import job_repo
+from app.repositories.application import application_repo
+
+# Indexes under test (added by the c47e2b9d5a10 migration)
+NEW_INDEXES = {"ix_jobs_search", "ix_jobs_recruiter", "ix_applications_seeker"}
+CHUNK = 5000
+RUNS = 7
+
+def hot_queries(recruiter_id: int, job_id: int, job_seeker_id: int) -> dict:
+    return {
+        "search (type + salary)": job_repo.search_query(job_type=JobType.FULL_TIME, min_salary=90000).limit(100),
+        "search (salary only)": job_repo.search_query(min_salary=120000).limit(100),
+        "search (location)": job_repo.search_query(location="Pune").limit(100),
+        "open jobs count": job_repo.open_count_query(),
+        "jobs by recruiter": job_repo.by_recruiter_query(recruiter_id).limit(100),
+        "job listing page": job_repo.active().order_by(Job.id).offset(5000).limit(100),
+        "applications by job": application_repo.by_job_query(job_id).limit(100),
+        "applications by seeker": application_repo.by_job_seeker_query(job_seeker_id).limit(100),
+    }
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+
+async def _insert(conn, model, rows):
+    for start in range(0, len(rows), CHUNK):
+        await conn.execute(insert(model), rows[start:start + CHUNK])
+
+async def load(engine, jobs: int, seekers: int, applications: int):
+    rng = random.Random(42)
+    now = datetime.now()
+    recruiters = max(1, jobs // 100)
+    async with engine.begin() as conn:
+        await _insert(conn, User, [
+            {"email": f"user{i}@bench.local", "password_hash": "x",
+             "role": UserRole.RECRUITER if i <= recruiters else UserRole.JOB_SEEKER}
+            for i in range(1, recruiters + seekers + 1)
+        ])
+        await _insert(conn, Recruiter, [
+            {"user_id": i, "company_name": f"Company {i}"} for i in range(1, recruiters + 1)
+        ])
+        await _insert(conn, JobSeeker, [
+            {"user_id": recruiters + i, "full_name": f"Seeker {i}"} for i in range(1, seekers + 1)
+        ])
+        locations = ["Pune", "Bangalore", "Hyderabad", "Chennai", "Remote", "Mumbai", "Delhi"]
+        statuses = [JobStatus.OPEN] * 3 + [JobStatus.CLOSED, JobStatus.PAUSED]
+        await _insert(conn, Job, [
+            {
+                "recruiter_id": rng.randint(1, recruiters),
+                "title": f"Engineer {i}",
+                "description": "Synthetic benchmark job",
+                "location": rng.choice(locations),
+                "salary_min": rng.randrange(20000, 150000, 1000),
+                "salary_max": 200000,
+                "job_type": rng.choice(list(JobType)),
+                "status": rng.choice(statuses),
+                # ~5% soft-deleted
+                "is_deleted": now if rng.random() < 0.05 else None,
+            }
+            for i in range(1, jobs + 1)
+        ])
+        pairs = set()
+        while len(pairs) < min(applications, jobs * seekers):
+            pairs.add((rng.randint(1, jobs), rng.randint(1, seekers)))
+        await _insert(conn, Application, [
+            {"job_id": job_id, "job_seeker_id": job_seeker_id, "status": rng.choice(list(ApplicationStatus))}
+            for job_id, job_seeker_id in pairs
+        ])
+        for table in ("users", "recruiters", "job_seekers", "jobs", "applications"):
+            await conn.execute(text(f"ANALYZE TABLE {table}"))
+
+async def measure(engine, queries: dict) -> dict:
+    results = {}
+    async with engine.connect() as conn:
+        for name, query in queries.items():
+            sql = _sql(query)
+            plan = (await conn.execute(text(f"EXPLAIN FORMAT=TREE {sql}"))).scalar()
+            timings = []
+            for _ in range(RUNS):
+                started = time.perf_counter()
+                (await conn.execute(text(sql))).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = {"plan": plan, "ms": statistics.median(timings)}
+    return results
+
+async def main(args):
+    server = create_async_engine(settings.ASYNC_DATABASE_URL.rsplit("/", 1)[0])
+    async with server.begin() as conn:
+        await conn.execute(text(f"DROP DATABASE IF EXISTS `{args.database}`"))
+        await conn.execute(text(f"CREATE DATABASE `{args.database}`"))
+    engine = create_async_engine(settings.ASYNC_DATABASE_URL.rsplit("/", 1)[0] + f"/{args.database}")
+
+    # "Before": the schema without the new indexes, as created by the earlier migrations
+    indexes = [ix for table in (Job.__table__, Application.__table__) for ix in table.indexes if ix.name in NEW_INDEXES]
+    for ix in indexes:
+        ix.table.indexes.discard(ix)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    finally:
+        for ix in indexes:
+            ix.table.indexes.add(ix)
+
+    try:
+        started = time.perf_counter()
+        await load(engine, args.jobs, args.seekers, args.applications)
+        print(f"Loaded {args.jobs} jobs, {args.seekers} seekers, {args.applications} applications "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        queries = hot_queries(recruiter_id=1, job_id=1, job_seeker_id=1)
+        before = await measure(engine, queries)
+        async with engine.begin() as conn:
+            for ix in indexes:
+                await conn.run_sync(ix.create)
+            for table in ("jobs", "applications"):
+                await conn.execute(text(f"ANALYZE TABLE {table}"))
+        after = await measure(engine, queries)
+
+        for name in queries:
+            print("=" * 78)
+            print(f"{name}: {before[name]['ms']:.2f} ms -> {after[name]['ms']:.2f} ms")
+            print(f"-- before\n{before[name]['plan']}\n-- after\n{after[name]['plan']}")
+    finally:
+        await engine.dispose()
+        if not args.keep:
+            async with server.begin() as conn:
+                await conn.execute(text(f"DROP DATABASE IF EXISTS `{args.database}`"))
+        await server.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=200000)
+    parser.add_argument("--seekers", type=int, default=50000)
+    parser.add_argument("--applications", type=int, default=1000000)
+    parser.add_argument("--database", default=os.getenv("BENCH_DB", f"{settings.MYSQL_DB}_bench"))
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,77 @@
+"""
+Throughput of the SMTP delivery backend against a local aiosmtpd server.
+
+Sends the same batch three ways and prints messages per second:
+  - one session per message (what a naive send-per-call client does);
+  - pooled persistent sessions (SMTP_POOL_SIZE workers);
+  - pooled sessions with identical messages shared per transaction.
+
+    python benchmark_smtp.py --messages 5000 --pool-size 8
+
+By default an aiosmtpd sink is started on 127.0.0.1:8025 (pip install
+aiosmtpd); pass --host/--port to measure against another server.
+"""
+import argparse
+import asyncio
+import time
+from app.services.notification_service.smtp import Email, SMTPBackend, SMTPPool
+
+class Sink:
+    """aiosmtpd handler that accepts and discards every message"""
+
+    def __init__(self):
+        self.messages = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 Message accepted for delivery"
+
+def build_batch(count: int, jobs: int) -> list:
+    # Applicants of the same job get identical status updates
+    return [
+        Email(
+            to=[f"applicant{i}@example.com"],
+            subject=f"Application update: Job {i % jobs}",
+            body=f"The status of your application for 'Job {i % jobs}' is now REJECTED."
+        )
+        for i in range(count)
+    ]
+
+async def measure(name: str, host: str, port: int, emails: list, pool_size: int, max_messages: int, share: bool):
+    pool = SMTPPool(host, port, size=pool_size, timeout=30, max_messages=max_messages, idle_timeout=30)
+    backend = SMTPBackend(pool, sender="bench@example.com", max_recipients=100)
+    started = time.perf_counter()
+    results = await backend.send_many(emails, share_identical=share)
+    elapsed = time.perf_counter() - started
+    await backend.close()
+    print(
+        f"{name:<32} {sum(results):>7} sent {elapsed:>8.2f}s {len(emails) / elapsed:>10.0f} msg/s "
+        f"{pool.opened:>6} sessions"
+    )
+
+async def main(args):
+    controller = None
+    host, port = args.host, args.port
+    if port is None:
+        from aiosmtpd.controller import Controller
+        controller = Controller(Sink(), hostname="127.0.0.1", port=8025)
+        controller.start()
+        host, port = "127.0.0.1", 8025
+    try:
+        emails = build_batch(args.messages, args.jobs)
+        print(f"{args.messages} messages, {args.jobs} distinct bodies, {host}:{port}")
+        await measure("one session per message", host, port, emails, args.pool_size, 1, False)
+        await measure("pooled sessions", host, port, emails, args.pool_size, args.messages, False)
+        await measure("pooled + shared transactions", host, port, emails, args.pool_size, args.messages, True)
+    finally:
+        if controller is not None:
+            controller.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=20, help="distinct job titles in the batch")
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -46,6 +46,26 @@ app.add_middleware(BaseHTTPMiddleware, dispatch=request_log_middleware)
 @app.on_event("startup")
 async def startup_event():
     logger.info("Initializing application startup...")
+    if settings.BCRYPT_TARGET_MS > 0:
+        from app.core.hashing import password_hasher
+        await password_hasher.autotune(settings.BCRYPT_TARGET_MS)
+    if settings.ACTIVITY_LOG_MAINTENANCE_HOURS > 0:
+        import asyncio
+        from app.db.partitions import get_partition_manager
+        app.state.partition_maintenance = asyncio.create_task(
+            get_partition_manager().run_forever(settings.ACTIVITY_LOG_MAINTENANCE_HOURS * 3600)
+        )
+    if settings.APPLICATION_INTAKE_MODE == "buffered":
+        from app.services.application_intake import application_intake
+        application_intake.start()
+    from app.services.outbox import outbox_dispatcher
+    outbox_dispatcher.start()
+    from app.services.saved_searches import saved_search_index
+    await saved_search_index.ensure()
+    if settings.JOB_MATCH_DIGEST_HOUR >= 0:
+        import asyncio
+        from app.services.job_matching import job_match_digest
+        app.state.job_match_digest = asyncio.create_task(job_match_digest.run_forever(settings.JOB_MATCH_DIGEST_HOUR))
     print("\n" + "="*50)
     print(f" API is running at: http://127.0.0.1:8080")
     print(f" Documentation at: http://127.0.0.1:8080/docs")
@@ -54,15 +74,42 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutting down...")
+    maintenance = getattr(app.state, "partition_maintenance", None)
+    if maintenance is not None:
+        maintenance.cancel()
+    digest = getattr(app.state, "job_match_digest", None)
+    if digest is not None:
+        digest.cancel()
+    from app.services.application_intake import application_intake
+    await application_intake.stop()
+    from app.services.outbox import outbox_dispatcher
+    await outbox_dispatcher.stop()
+    from app.services.notification_service.service import notification_service
+    await notification_service.close()
+    from app.services.activity_log import activity_log_buffer
+    await activity_log_buffer.close()
+    from app.core.rate_limit import close_rate_limiters
+    await close_rate_limiters()
+    from app.core.hashing import password_hasher
+    password_hasher.shutdown()
+    from app.db.slow_queries import slow_query_log
+    await slow_query_log.close()
+    from app.db.workload import workload_recorder
+    await workload_recorder.flush()
 
-from app.core.rate_limit import default_rate_limit
+from app.core.rate_limit_policy import policy_rate_limit
 
 app.include_router(
     api_router, 
     prefix=settings.API_V1_STR,
-    dependencies=[Depends(default_rate_limit)]
+    dependencies=[Depends(policy_rate_limit)]
 )
 
+from app.api.v1.endpoints import internal
+
+# Operational endpoints (admin only), outside the versioned API
+app.include_router(internal.router, prefix="/internal", tags=["internal"])
+
 from fastapi.responses import HTMLResponse, RedirectResponse
 
 @app.get("/", response_class=HTMLResponse)
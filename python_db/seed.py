@@ -1,7 +1,7 @@
 import asyncio
 from app.db.session import AsyncSessionLocal
 from app.models.models import User, UserRole, JobSeeker, Recruiter, Job, JobType, JobStatus, Skill, JobSeekerSkill, JobSkill, ProficiencyLevel, Application, ApplicationStatus, Interview, InterviewMode, InterviewResult, ActivityLog
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 from datetime import datetime
 
 async def seed_data():
@@ -13,7 +13,7 @@ async def seed_data():
             res = await db.execute(select(User).where(User.email == email))
             user = res.scalar_one_or_none()
             if not user:
-                user = User(email=email, password_hash=get_password_hash(password), role=role)
+                user = User(email=email, password_hash=await get_password_hash_async(password), role=role)
                 db.add(user)
                 await db.flush()
                 print(f"Created user: {email}")